@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Pattoo asynchronous HTTP data classes.
+
+The classes and functions here mirror those in phttp.py, but can be awaited
+on an asyncio event loop. This allows a single process, such as a relay, to
+post many AgentPolledData payloads at the same time.
+
+The posts are made by the phttp functions in a shared pool of threads. They
+use the same pooled connections, TLS and proxy settings as the blocking
+versions in phttp.py, which remain the API for agents that post one payload
+per polling cycle. Retries, circuit breakers, delta encoding and cached
+encrypted sessions work in the same way.
+
+"""
+
+# Standard libraries
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Pattoo libraries
+from pattoo_shared import phttp
+from pattoo_shared import cache
+from pattoo_shared.configuration import Config
+
+# ThreadPoolExecutor objects keyed by process ID. Threads aren't inherited by
+# forked children.
+EXECUTORS = {}
+EXECUTORS_LOCK = threading.Lock()
+
+
+class AsyncPost(phttp.Post):
+    """Class to prepare data for asynchronous posting to the pattoo server.
+
+    Data is posted by phttp.Post, so it is delta encoded, retried and
+    batched in the same way.
+
+    """
+
+    async def post(self):
+        """Post data to central server.
+
+        Args:
+            None
+
+        Returns:
+            success: True: if successful
+
+        """
+        # Return
+        success = await _call(phttp.Post.post, self)
+        return success
+
+    async def purge(self):
+        """Purge data from cache by posting to central server.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Purge
+        await _call(phttp.Post.purge, self)
+
+    def drain(self):
+        """Purge cached data in a background thread if there is any.
+
+        Args:
+            None
+
+        Returns:
+            result: threading.Thread object purging the cache. None if the
+                cache is empty or is already being purged.
+
+        """
+        # Return
+        result = cache.watcher(self._identifier).drain(
+            functools.partial(phttp.Post.purge, self))
+        return result
+
+
+class AsyncEncryptedPost(phttp.EncryptedPost):
+    """Asynchronous version of phttp.EncryptedPost.
+
+    Data is posted by phttp.EncryptedPost, so the encrypted session of the
+    agent is reused between posts instead of exchanging keys each time.
+
+    """
+
+    async def purge(self):
+        """Purge data from cache by posting encrypted data to the API server.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Purge
+        await _call(phttp.EncryptedPost.purge, self)
+
+    async def post(self):
+        """Send encrypted data to the API server.
+
+        Args:
+            None
+
+        Returns:
+            success: True if data was posted successfully
+
+        """
+        # Return
+        success = await _call(phttp.EncryptedPost.post, self)
+        return success
+
+    def drain(self):
+        """Purge cached data in a background thread if there is any.
+
+        Args:
+            None
+
+        Returns:
+            result: threading.Thread object purging the cache. None if the
+                cache is empty or is already being purged.
+
+        """
+        # Return
+        result = cache.watcher(self._identifier).drain(
+            functools.partial(phttp.EncryptedPost.purge, self))
+        return result
+
+
+class AsyncPostAgent(AsyncPost, phttp.PostAgent):
+    """Class to asynchronously post AgentPolledData to the pattoo server."""
+
+    pass
+
+
+class AsyncEncryptedPostAgent(AsyncEncryptedPost, phttp.EncryptedPostAgent):
+    """Class to asynchronously post encrypted AgentPolledData."""
+
+    pass
+
+
+def executor():
+    """Get the ThreadPoolExecutor that makes posts for this process.
+
+    Args:
+        None
+
+    Returns:
+        result: ThreadPoolExecutor object. It has a thread for each pooled
+            connection to the API server.
+
+    """
+    # Initialize key variables
+    key = os.getpid()
+
+    # Create a new object for new processes
+    with EXECUTORS_LOCK:
+        if key not in EXECUTORS:
+            EXECUTORS[key] = ThreadPoolExecutor(
+                max_workers=max(1, Config().agent_api_pool_size()))
+        result = EXECUTORS[key]
+    return result
+
+
+async def _call(function, *args, **kwargs):
+    """Run a blocking function in the executor without blocking the loop.
+
+    Args:
+        function: Function to run
+        args: Positional arguments for the function
+        kwargs: Keyword arguments for the function
+
+    Returns:
+        result: Result of the function
+
+    """
+    # Return
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(
+        executor(), functools.partial(function, *args, **kwargs))
+    return result
+
+
+def run(coroutine):
+    """Run a coroutine on a new event loop.
+
+    Args:
+        coroutine: Coroutine to run
+
+    Returns:
+        result: Result of the coroutine
+
+    """
+    # Initialize key variables
+    loop = asyncio.new_event_loop()
+
+    # Run
+    try:
+        asyncio.set_event_loop(loop)
+        result = loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    return result
+
+
+def post_all(items):
+    """Post data from many AsyncPost type objects on one event loop.
+
+    Args:
+        items: List of AsyncPost, AsyncEncryptedPost, AsyncPostAgent or
+            AsyncEncryptedPostAgent objects
+
+    Returns:
+        result: List of post() results in the same order as items
+
+    """
+    # Return
+    result = run(_gather([item.post() for item in items]))
+    return result
+
+
+async def _gather(coroutines):
+    """Run coroutines concurrently.
+
+    Args:
+        coroutines: List of coroutines
+
+    Returns:
+        result: List of results
+
+    """
+    # Return
+    result = await asyncio.gather(*coroutines)
+    return list(result)
+
+
+async def post(url, data, identifier, save=True):
+    """Post data to central server.
+
+    See phttp.post.
+
+    Args:
+        url: URL to receive posted data
+        identifier: Unique identifier for the source of the data. (AgentID)
+        data: Data dict to post, or its JSON as bytes
+        save: When True, save data to cache directory if posting fails
+
+    Returns:
+        success: True: if successful
+
+    """
+    # Return
+    success = await _call(phttp.post, url, data, identifier, save=save)
+    return success
+
+
+async def key_exchange(metadata):
+    """Exchange point for API and Agent public keys.
+
+    See phttp.key_exchange.
+
+    Args:
+        metadata: phttp._KeyExchange object
+
+    Returns:
+        success: True if successful
+
+    """
+    # Return
+    success = await _call(phttp.key_exchange, metadata)
+    return success
+
+
+async def encrypted_post(metadata, save=True):
+    """Post encrypted data to the API server.
+
+    See phttp.encrypted_post.
+
+    Args:
+        metadata: phttp._EncrypedPost object
+        save: If True, save data to cache if API server is inaccessible
+
+    Returns:
+        success: True if successful
+
+    """
+    # Return
+    success = await _call(phttp.encrypted_post, metadata, save=save)
+    return success
+
+
+async def purge(url, identifier, suite=phttp.post):
+    """Purge data from cache by posting to central server.
+
+    See phttp.purge. Cached data is posted by agent_api_purge_workers
+    threads.
+
+    Args:
+        url: URL to receive posted data
+        identifier: Unique identifier for the source of the data. (AgentID)
+        suite: Post function or phttp.EncryptionSuite. See phttp.purge
+
+    Returns:
+        None
+
+    """
+    # Purge
+    await _call(phttp.purge, url, identifier, suite=suite)
@@ -0,0 +1,2243 @@
+#!/usr/bin/env python3
+"""Pattoo storage for agent data that could not be posted."""
+
+# Standard imports
+import os
+import sys
+import fcntl
+import atexit
+import ctypes
+import struct
+import hashlib
+import ctypes.util
+import sqlite3
+import threading
+import collections
+from time import time, strftime, gmtime, monotonic
+
+# Pattoo imports
+from pattoo_shared import log
+from pattoo_shared import codec
+from pattoo_shared import spool
+from pattoo_shared import compress
+from pattoo_shared import manifest
+from pattoo_shared import converter
+from pattoo_shared.configuration import Config
+
+# Cached data returned by a store. The key is a string that identifies the
+# data within the store. It is also used as the payload ID in batch posts.
+# The data is either decoded or uncompressed JSON as bytes.
+Entry = collections.namedtuple('Entry', 'key data size')
+
+# Store objects keyed by process ID, backend and identifier
+STORES = {}
+STORES_LOCK = threading.Lock()
+
+# MemoryStore objects keyed by process ID and identifier
+QUEUES = {}
+
+# Watcher objects keyed by process ID and identifier
+WATCHERS = {}
+WATCHERS_LOCK = threading.Lock()
+
+# _Inotify objects keyed by process ID. The Watcher objects of a process
+# share one inotify file descriptor.
+INOTIFY = {}
+INOTIFY_LOCK = threading.Lock()
+
+# Suffixes of uncompressed and compressed cache files
+_SUFFIXES = ('.json', '.json.gz')
+
+# UTC time formats of the names of the subdirectories cache files are
+# sharded into for each cache_shard interval. Names sort oldest first.
+_SHARDS = {'hour': '%Y%m%d%H', 'day': '%Y%m%d00'}
+_SHARD_LENGTH = 10
+
+# SQLite synchronous settings for each cache_fsync policy
+_SYNCHRONOUS = {'always': 'FULL', 'segment': 'NORMAL', 'never': 'OFF'}
+
+# inotify flags for files created, written or moved into a directory
+_IN_MODIFY = 0x00000002
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_EVENTS = _IN_MODIFY | _IN_MOVED_TO | _IN_CREATE
+
+# Format of the header of each inotify event (watch descriptor, mask, cookie,
+# name length). The watch descriptor is -1 when the event queue overflowed.
+_IN_EVENT = struct.Struct('iIII')
+
+# Seconds between checks of the cache when inotify isn't available
+_POLL_INTERVAL = 30
+
+# Seconds since they were last written before cache files missing from the
+# manifest are added to it. Younger files may still be being written by
+# other processes.
+_GRACE_PERIOD = 60
+
+
+class _Store():
+    """Base class of the stores of cached agent data.
+
+    Stores save data that couldn't be posted and return it to be purged.
+    Data is removed from a store once it has been successfully posted, or
+    evicted once the store exceeds the cache_max_bytes and cache_max_age
+    quotas.
+
+    """
+
+    # True if data must be removed in the order it was returned
+    ordered = False
+
+    # Bytes used to store each item of data in addition to Entry.size
+    overhead = 0
+
+    # File in the cache directory locked by the process purging the store.
+    # Stores without one are only locked within the process.
+    lockfile = None
+
+    def __init__(self, identifier):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        config = Config()
+        self.identifier = identifier
+        self.directory = config.agent_cache_directory(identifier)
+        self.compression = config.cache_compression()
+
+        # Quotas
+        self.max_bytes = config.cache_max_bytes()
+        self.max_age = config.cache_max_age()
+        self.eviction = config.cache_eviction()
+        self.eviction_group = config.cache_eviction_group()
+
+        # Number of payloads evicted, the size of the store in bytes if known
+        # and the time of the last cache_max_age check
+        self.evicted = 0
+        self._usage = None
+        self._aged = 0
+
+        # Purge lock of threads and the descriptor of the locked lockfile
+        self._purging = threading.Lock()
+        self._locked = None
+
+    def save(self, data):
+        """Save data.
+
+        Args:
+            data: Data to save, or its JSON as bytes
+
+        Returns:
+            success: True if successful
+
+        """
+        # Return
+        success = self.save_many([data])
+        return success
+
+    def save_many(self, items):
+        """Save a list of data.
+
+        Args:
+            items: List of data to save, or their JSON as bytes
+
+        Returns:
+            success: True if successful
+
+        """
+        # Save each item
+        success = True
+        for data in items:
+            if self.save(data) is False:
+                success = False
+        return success
+
+    def entries(self, decode=True, claim=False):
+        """Read saved data, oldest first.
+
+        Args:
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes that can be posted as is
+            claim: If True, skip data claimed by other purgers and claim the
+                data returned until it is removed or released. Ignored by
+                stores that are only read by the purger holding their lock.
+
+        Yields:
+            result: Entry object
+
+        """
+        # Nothing to read
+        return iter([])
+
+    def remove(self, keys):
+        """Remove data that has been posted.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Nothing to remove
+        return
+
+    def release(self, keys):
+        """Release claimed data that wasn't posted so it can be purged again.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Nothing to release
+        return
+
+    def lock(self):
+        """Lock the store before purging it.
+
+        Only one thread of one process can hold the lock, so that data isn't
+        posted more than once by purgers reading the store at the same time.
+
+        Args:
+            None
+
+        Returns:
+            result: True if locked. False if another purger holds the lock.
+
+        """
+        # Lock the store for other threads
+        if self._purging.acquire(blocking=False) is False:
+            return False
+
+        # Lock the store for other processes
+        if self.lockfile is not None:
+            try:
+                self._locked = _claim(
+                    os.path.join(self.directory, self.lockfile), create=True)
+            except OSError:
+                self._locked = None
+            if self._locked is None:
+                self._purging.release()
+                return False
+        return True
+
+    def unlock(self):
+        """Unlock the store once it has been purged.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Unlock
+        if self._locked is not None:
+            os.close(self._locked)
+            self._locked = None
+        self._purging.release()
+
+    def contains(self, key):
+        """Determine whether the store holds a payload.
+
+        Args:
+            key: digest() of the payload
+
+        Returns:
+            result: True if the payload is saved. False if it isn't or the
+                store doesn't keep track of digests.
+
+        """
+        # Not supported
+        result = False
+        return result
+
+    def overwrite(self, key, data):
+        """Overwrite saved data without changing its position in the store.
+
+        Args:
+            key: Entry key
+            data: Data to save
+
+        Returns:
+            size: Size of the saved data in bytes. None if unsuccessful
+
+        """
+        # Not supported
+        size = None
+        return size
+
+    def flush(self):
+        """Write pending changes to disk.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Nothing to flush
+        return
+
+    def close(self):
+        """Close the files held open by the store.
+
+        The files are opened again when the store is next used.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Nothing to close
+        return
+
+    def usage(self):
+        """Get the size of the saved data.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Return
+        result = sum(
+            entry.size + self.overhead for entry in self.entries())
+        return result
+
+    def pending(self):
+        """Get the amount of saved data waiting to be purged.
+
+        Args:
+            None
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        # Initialize key variables
+        count = 0
+        size = 0
+
+        # Read data
+        for entry in self.entries(decode=False):
+            count += 1
+            size += entry.size
+
+        # Return
+        result = (count, size)
+        return result
+
+    def evict(self):
+        """Evict data that exceeds the cache quotas.
+
+        Data older than cache_max_age is deleted. If the store is larger than
+        cache_max_bytes the oldest data is then evicted using the
+        cache_eviction policy. Stores that must be purged in order can only
+        evict the oldest data.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of payloads evicted
+
+        """
+        # Initialize key variables
+        result = 0
+        now = time()
+
+        # Delete expired data. Don't read the store on every save.
+        if self.max_age > 0 and now - self._aged >= min(self.max_age, 60):
+            self._aged = now
+            result += self._evict_expired(int((now - self.max_age) * 1000))
+
+        # Evict data until the store fits in its quota
+        if self.max_bytes > 0:
+            if self._usage is None:
+                self._usage = self.usage()
+            if self._usage > self.max_bytes:
+                result += self._evict_excess(self._usage - self.max_bytes)
+
+        # Log
+        if bool(result) is True:
+            self.evicted += result
+            log_message = ('''\
+Evicted {} cached payloads for identifier {}. {} evicted since starting.\
+'''.format(result, self.identifier, self.evicted))
+            log.log2info(1238, log_message)
+        return result
+
+    def _evict_expired(self, oldest):
+        """Delete data from before a timestamp.
+
+        Args:
+            oldest: Timestamp in milliseconds of the oldest data to keep
+
+        Returns:
+            result: Number of payloads deleted
+
+        """
+        # Initialize key variables
+        keys = []
+
+        # Find expired data. Stop at data without a valid timestamp.
+        for entry in self.entries():
+            timestamp = entry.data.get('pattoo_agent_timestamp') if (
+                isinstance(entry.data, dict) is True) else None
+            if isinstance(timestamp, int) is False or timestamp >= oldest:
+                break
+            keys.append(entry.key)
+
+        # Delete
+        self._usage = None
+        self.remove(keys)
+        self.flush()
+        result = len(keys)
+        return result
+
+    def _evict_excess(self, excess):
+        """Evict the oldest data using the cache_eviction policy.
+
+        Args:
+            excess: Number of bytes to free
+
+        Returns:
+            result: Number of payloads evicted
+
+        """
+        # Initialize key variables
+        result = 0
+        freed = 0
+        usage = self._usage
+
+        # Thin or summarize groups of the oldest data
+        if self.ordered is False and self.eviction != 'oldest':
+            group = []
+            keys = []
+            for entry in self.entries():
+                if freed >= excess:
+                    break
+                group.append(entry)
+                if len(group) < self.eviction_group:
+                    continue
+
+                # Keep the first item of the group, summarized if required.
+                # The summary may be larger than the item it replaces.
+                if self.eviction == 'summarize':
+                    summary = converter.summarize_cache(
+                        [_.data for _ in group])
+                    if summary is not None:
+                        size = self.overwrite(group[0].key, summary)
+                        if size is not None:
+                            freed += group[0].size - size
+                keys.extend(_.key for _ in group[1:])
+                freed += sum(_.size + self.overhead for _ in group[1:])
+                group = []
+            self.remove(keys)
+            self.flush()
+            result += len(keys)
+
+        # Delete the oldest data
+        if freed < excess:
+            keys = []
+            for entry in self.entries():
+                if freed >= excess:
+                    break
+                keys.append(entry.key)
+                freed += entry.size + self.overhead
+            self.remove(keys)
+            self.flush()
+            result += len(keys)
+
+        # Return
+        self._usage = max(0, usage - freed)
+        return result
+
+
+class FileStore(_Store):
+    """Store that saves each item of data in its own JSON file.
+
+    Files are sharded into a subdirectory for each hour or day they were
+    saved in, depending on cache_shard, so that no directory gets too large
+    to list. Files are gzip compressed if cache_compression is set.
+    Compressed files have a '.json.gz' suffix.
+
+    The keys and sizes of the files are kept in a manifest.Manifest object,
+    so that files are purged after a restart without listing or reading the
+    whole cache directory.
+
+    Purgers claim each file they read with an exclusive lock, so that
+    several threads and processes can purge the cache at the same time
+    without posting the same file.
+
+    """
+
+    def __init__(self, identifier):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        _Store.__init__(self, identifier)
+        self.shard = Config().cache_shard()
+        self.manifest = manifest.Manifest(self.directory)
+
+        # Descriptors of claimed files keyed by Entry key, and the number of
+        # purgers reading the files
+        self._claims = {}
+        self._claims_lock = threading.Lock()
+        self._purgers = 0
+
+        # Find files that aren't in the manifest. The whole cache directory
+        # is only read if there is no manifest.
+        if self.manifest.exists is False:
+            self.manifest.rebuild(self._scan(self._filepaths()))
+        else:
+            self._reconcile()
+
+    def save(self, data):
+        """Save data to cache file.
+
+        Args:
+            data: Data to save
+
+        Returns:
+            success: True if successful
+
+        """
+        # Initialize key variables
+        success = False
+        timestamp = int(time() * 1000)
+        suffix = _SUFFIXES[1] if self.compression > 0 else _SUFFIXES[0]
+
+        directory = os.path.join(self.directory, self._shard(timestamp))
+
+        # Create a unique very long filename. Data saved within the same
+        # millisecond gets the next free timestamp to keep its order.
+        while True:
+            filename = ('''{}{}{}_{}{}\
+'''.format(directory, os.sep, timestamp, self.identifier, suffix))
+            if os.path.exists(filename) is False:
+                break
+            timestamp += 1
+
+        # Save data. Files are added to the manifest once written, so that
+        # incomplete files aren't purged.
+        try:
+            payload = compress.compress_json(data)
+            os.makedirs(directory, mode=0o750, exist_ok=True)
+            _write(filename, payload, self.compression)
+            size = os.path.getsize(filename)
+            self.manifest.add(
+                os.path.relpath(filename, self.directory), size,
+                digest=digest(payload))
+            success = True
+            if self._usage is not None:
+                self._usage += size
+        except Exception as err:
+            log_message = '{}'.format(err)
+            log.log2warning(1030, log_message)
+        except:
+            (etype, evalue, etraceback) = sys.exc_info()
+            log_message = ('''\
+Cache-file save error: [{}, {}, {}]'''.format(etype, evalue, etraceback))
+            log.log2warning(1031, log_message)
+
+        # Delete file if there is a failure.
+        # Helps to protect against full file systems.
+        if os.path.isfile(filename) is True and success is False:
+            os.remove(filename)
+            log_message = ('''\
+Deleting corrupted cache file {} for identifier {}.\
+'''.format(filename, self.identifier))
+            log.log2warning(1037, log_message)
+
+        # Return
+        return success
+
+    def entries(self, decode=True, claim=False):
+        """Read cache files, oldest first.
+
+        Args:
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes
+            claim: If True, skip files claimed by other purgers and claim
+                the files returned until they are removed or released
+
+        Yields:
+            result: Entry object. The key is the filepath relative to the
+                cache directory.
+
+        """
+        # Read the files in the manifest. Drop missing and corrupted files.
+        for (key, size) in self.manifest.items():
+            if claim is True:
+                try:
+                    if self._claim(key) is False:
+                        continue
+                except FileNotFoundError:
+                    # Purged by another process
+                    self.manifest.remove([key])
+                    continue
+            data = self._read(
+                os.path.join(self.directory, key), decode=decode, size=size)
+            if data is None:
+                self.manifest.remove([key])
+                self.release([key])
+                continue
+            yield Entry(key=key, data=data, size=size)
+
+    def remove(self, keys):
+        """Delete cache files.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        shards = set()
+        current = self._shard(int(time() * 1000))
+
+        # Delete files
+        self._usage = None
+        for key in keys:
+            filepath = os.path.join(self.directory, key)
+            if os.path.exists(filepath) is True:
+                os.remove(filepath)
+            shards.add(os.path.dirname(key))
+        self.manifest.remove(keys)
+        self.release(keys)
+
+        # Delete empty shards. The current shard is kept for new data.
+        for shard in shards - set(['', current]):
+            try:
+                os.rmdir(os.path.join(self.directory, shard))
+            except OSError:
+                # Not empty
+                pass
+
+    def overwrite(self, key, data):
+        """Overwrite a cache file, keeping its compression.
+
+        Args:
+            key: Entry key
+            data: Data to save
+
+        Returns:
+            size: Size of the cache file in bytes. None if unsuccessful
+
+        """
+        # Initialize key variables
+        size = None
+        filepath = os.path.join(self.directory, key)
+        level = max(1, self.compression) if (
+            key.endswith(_SUFFIXES[1]) is True) else 0
+
+        # Write to a temporary file then replace the cache file
+        temp_filepath = '{}.tmp'.format(filepath)
+        try:
+            payload = compress.compress_json(data)
+            _write(temp_filepath, payload, level)
+
+            # Keep the claim of a claimed file, so that other purgers can't
+            # claim its replacement
+            with self._claims_lock:
+                claimed = self._claims.get(key)
+                if claimed is not None:
+                    self._claims[key] = _claim(temp_filepath)
+                os.replace(temp_filepath, filepath)
+                if claimed is not None:
+                    os.close(claimed)
+            size = os.path.getsize(filepath)
+            self.manifest.add(key, size, digest=digest(payload))
+        except:
+            _exception = sys.exc_info()
+            log_message = ('''\
+Cache-file overwrite error for identifier {}'''.format(self.identifier))
+            log.log2exception(1239, _exception, message=log_message)
+            if os.path.isfile(temp_filepath) is True:
+                os.remove(temp_filepath)
+        self._usage = None
+        return size
+
+    def release(self, keys):
+        """Release claimed cache files.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Unlock files
+        with self._claims_lock:
+            for key in keys:
+                f_descriptor = self._claims.pop(key, None)
+                if f_descriptor is not None:
+                    os.close(f_descriptor)
+
+    def lock(self):
+        """Register a purger.
+
+        The cache files are claimed one at a time, so purgers don't need to
+        lock the whole store.
+
+        Args:
+            None
+
+        Returns:
+            result: True
+
+        """
+        # Count purgers
+        with self._claims_lock:
+            self._purgers += 1
+        return True
+
+    def unlock(self):
+        """Unregister a purger.
+
+        Files left claimed by purgers that failed are released once no
+        purgers are reading the files.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Count purgers
+        with self._claims_lock:
+            self._purgers = max(0, self._purgers - 1)
+            keys = list(self._claims) if self._purgers == 0 else []
+        self.release(keys)
+
+    def usage(self):
+        """Get the size of the cache files.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Return
+        result = self.manifest.size()
+        return result
+
+    def pending(self):
+        """Get the number and size of the files in the manifest.
+
+        Args:
+            None
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        # Return
+        result = (self.manifest.count(), self.manifest.size())
+        return result
+
+    def contains(self, key):
+        """Determine whether a cache file holds a payload.
+
+        Files found without being saved by this class, such as those saved
+        before a crash, aren't checked.
+
+        Args:
+            key: digest() of the payload
+
+        Returns:
+            result: True if the payload is saved
+
+        """
+        # Return
+        result = self.manifest.contains(key)
+        return result
+
+    def flush(self):
+        """Compact the manifest.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Compact
+        self.manifest.compact()
+
+    def close(self):
+        """Close the manifest journal.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        self.manifest.close()
+
+    def filepaths(self):
+        """Get the cache files, oldest first.
+
+        Args:
+            None
+
+        Returns:
+            result: List of cache filepaths
+
+        """
+        # Return
+        result = [
+            os.path.join(self.directory, key)
+            for (key, _) in self.manifest.items()]
+        return result
+
+    def migrate(self):
+        """Move cache files saved in the cache directory into shards.
+
+        Cache files used to be saved directly in the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of files moved
+
+        """
+        # Initialize key variables
+        result = 0
+
+        # Move files to the shard of the timestamp in their filename
+        for filename in self._filenames(self.directory):
+            try:
+                timestamp = int(filename.split('_')[0])
+            except ValueError:
+                continue
+            directory = os.path.join(self.directory, self._shard(timestamp))
+            try:
+                os.makedirs(directory, mode=0o750, exist_ok=True)
+                os.replace(
+                    os.path.join(self.directory, filename),
+                    os.path.join(directory, filename))
+            except OSError:
+                # Purged by another process
+                continue
+            result += 1
+
+        # Log
+        if bool(result) is True:
+            log_message = ('''\
+Moved {} cache files for identifier {} into shards of {}.\
+'''.format(result, self.identifier, self.directory))
+            log.log2info(1242, log_message)
+        return result
+
+    def _filepaths(self):
+        """Get the cache files, oldest first, one shard at a time.
+
+        Args:
+            None
+
+        Yields:
+            result: Cache filepath
+
+        """
+        # Shard files saved by older versions
+        self.migrate()
+
+        # Read shards in order. Filenames start with a timestamp, so sorting
+        # them processes the oldest data first.
+        for shard in self._shards():
+            directory = os.path.join(self.directory, shard)
+            for filename in self._filenames(directory):
+                yield os.path.join(directory, filename)
+
+    def _scan(self, filepaths, before=None):
+        """Get the manifest keys and sizes of cache files.
+
+        Args:
+            filepaths: Iterable of cache filepaths
+            before: Skip files last written at or after this timestamp.
+                None includes all files.
+
+        Returns:
+            result: List of (key, size) tuples
+
+        """
+        # Initialize key variables
+        result = []
+
+        # Get sizes
+        for filepath in filepaths:
+            try:
+                status = os.stat(filepath)
+            except OSError:
+                # Purged by another process
+                continue
+            if before is not None and status.st_mtime >= before:
+                continue
+            result.append(
+                (os.path.relpath(filepath, self.directory), status.st_size))
+        return result
+
+    def _reconcile(self):
+        """Add files in the newest shard that are missing from the manifest.
+
+        Files saved just before a crash may not have been added to the
+        manifest. Only the newest shard is read. Files written in the last
+        _GRACE_PERIOD seconds are skipped, as other processes may still be
+        writing them. They would be added with the wrong size, then deleted
+        as corrupted when read.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        shards = self._shards()
+        if bool(shards) is False:
+            return
+        directory = os.path.join(self.directory, shards[-1])
+        keys = set(key for (key, _) in self.manifest.items())
+
+        # Add missing files
+        for (key, size) in self._scan((
+                os.path.join(directory, filename)
+                for filename in self._filenames(directory)),
+                before=time() - _GRACE_PERIOD):
+            if key not in keys:
+                self.manifest.add(key, size)
+
+    def _filenames(self, directory):
+        """Get the names of the cache files in a directory.
+
+        Args:
+            directory: Directory
+
+        Returns:
+            result: Sorted list of filenames. Only files for our own
+                identifier are included.
+
+        """
+        # Read directory
+        try:
+            with os.scandir(directory) as iterator:
+                result = sorted([
+                    entry.name for entry in iterator
+                    if entry.name.endswith(_SUFFIXES) is True and (
+                        self.identifier in entry.name) and (
+                            entry.is_file() is True)])
+        except FileNotFoundError:
+            # Empty shard deleted by another process
+            result = []
+        return result
+
+    def _shards(self):
+        """Get the names of the shards in the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            result: List of shard names, oldest first
+
+        """
+        # Read directory
+        with os.scandir(self.directory) as iterator:
+            result = sorted([
+                entry.name for entry in iterator
+                if len(entry.name) == _SHARD_LENGTH and (
+                    entry.name.isdigit() is True) and (
+                        entry.is_dir() is True)])
+        return result
+
+    def _shard(self, timestamp):
+        """Get the name of the shard for a timestamp.
+
+        Args:
+            timestamp: Timestamp in milliseconds
+
+        Returns:
+            result: Shard name
+
+        """
+        # Return
+        result = strftime(_SHARDS[self.shard], gmtime(timestamp / 1000))
+        return result
+
+    def _claim(self, key):
+        """Claim a cache file.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            result: True if claimed. False if already claimed.
+
+        """
+        # Lock the file
+        with self._claims_lock:
+            if key in self._claims:
+                return False
+            f_descriptor = _claim(os.path.join(self.directory, key))
+            if f_descriptor is None:
+                return False
+            self._claims[key] = f_descriptor
+        return True
+
+    def _read(self, filepath, decode=True, size=None):
+        """Read cache file. Delete it if it is corrupted.
+
+        JSON that isn't decoded is only checked for truncation, as files
+        written by interrupted saves are the usual cause of corruption.
+
+        Args:
+            filepath: Cache filepath
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes
+            size: Expected size of the file. Files of another size are
+                treated as corrupted without being read.
+
+        Returns:
+            data: Data read from file. None if missing or corrupted.
+
+        """
+        # Read cache file
+        try:
+            with open(filepath, 'rb') as f_handle:
+                if size is not None and (
+                        os.fstat(f_handle.fileno()).st_size != size):
+                    raise ValueError('File size differs from the manifest')
+                data = compress.decompress_payload(f_handle.read())
+            if decode is True:
+                data = codec.decode(data)
+            elif data.strip()[:1] != b'{' or data.rstrip()[-1:] != b'}':
+                data = None
+        except FileNotFoundError:
+            # Purged by another process
+            return None
+        except:
+            data = None
+
+        # Delete file if unreadable
+        if data is None:
+            # Log removal
+            log_message = ('''\
+Error reading previously cached agent data file {} for identifier {}. May be \
+corrupted.'''.format(filepath, self.identifier))
+            log.log2warning(1064, log_message)
+
+            # Delete file
+            if os.path.isfile(filepath) is True:
+                os.remove(filepath)
+
+                log_message = ('''\
+Deleting corrupted cache file {} for identifier {}.\
+'''.format(filepath, self.identifier))
+                log.log2warning(1036, log_message)
+
+        # Return
+        return data
+
+
+class SpoolStore(_Store):
+    """Store that appends data to a spool.Spool object."""
+
+    # The spool cursor can only move forward
+    ordered = True
+    overhead = spool.RECORD_OVERHEAD
+    lockfile = 'spool.lock'
+
+    def __init__(self, identifier):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        _Store.__init__(self, identifier)
+        config = Config()
+        self.spool = spool.Spool(
+            os.path.join(self.directory, 'spool'),
+            segment_bytes=config.cache_segment_bytes(),
+            fsync=config.cache_fsync(),
+            compression=self.compression)
+
+    def save(self, data):
+        """Append data to the spool.
+
+        Args:
+            data: Data to save
+
+        Returns:
+            success: True if successful
+
+        """
+        # Initialize key variables
+        success = False
+
+        # Append
+        try:
+            self.spool.append(data)
+            success = True
+        except:
+            _exception = sys.exc_info()
+            log_message = ('''\
+Cache spool save error for identifier {}'''.format(self.identifier))
+            log.log2exception(1233, _exception, message=log_message)
+        return success
+
+    def entries(self, decode=True, claim=False):
+        """Read uncommitted spool records in the order they were appended.
+
+        Args:
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes
+            claim: Ignored. Records are only purged by the purger holding
+                the lock of the store.
+
+        Yields:
+            result: Entry object. The key is made from the record's position.
+
+        """
+        # Read records
+        records = self.spool.records(decode=decode)
+        try:
+            for (data, position, size) in records:
+                yield Entry(
+                    key='{:020d}_{:020d}'.format(*position),
+                    data=data, size=size)
+        finally:
+            records.close()
+
+    def remove(self, keys):
+        """Commit spool records up to the last key.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Commit
+        if bool(keys) is True:
+            (segment, offset) = max(keys).split('_')
+            self.spool.commit(
+                spool.Position(segment=int(segment), offset=int(offset)))
+
+    def flush(self):
+        """Save the spool cursor.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Save
+        self.spool.save()
+
+    def usage(self):
+        """Get the size of the uncommitted spool records.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Return
+        result = self.spool.size()
+        return result
+
+    def pending(self):
+        """Get the number and size of the uncommitted spool records.
+
+        Args:
+            None
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        # Return
+        result = (self.spool.count(), self.spool.size())
+        return result
+
+
+class SQLiteStore(_Store):
+    """Store that saves data in a SQLite database in the cache directory."""
+
+    # Number of rows read from the database at a time, and the number of
+    # removed rows held before they are deleted
+    page = 100
+    lockfile = 'cache.sqlite.lock'
+
+    def __init__(self, identifier):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        _Store.__init__(self, identifier)
+        self.filepath = os.path.join(self.directory, 'cache.sqlite')
+        self._lock = threading.RLock()
+        self._removed = set()
+
+        # Connect. The connection is shared by purge worker threads, so
+        # access to it is serialized with a lock.
+        self._connection = sqlite3.connect(
+            self.filepath, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous={}'.format(
+                _SYNCHRONOUS[Config().cache_fsync()]))
+            self._connection.execute('''\
+CREATE TABLE IF NOT EXISTS cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    digest TEXT)''')
+            self._connection.execute('''\
+CREATE INDEX IF NOT EXISTS cache_agent_id_timestamp \
+ON cache (agent_id, timestamp)''')
+
+            # Add digests to databases created by older versions
+            columns = [
+                row[1] for row in self._connection.execute(
+                    'PRAGMA table_info(cache)')]
+            if 'digest' not in columns:
+                self._connection.execute(
+                    'ALTER TABLE cache ADD COLUMN digest TEXT')
+            self._connection.execute('''\
+CREATE INDEX IF NOT EXISTS cache_agent_id_digest \
+ON cache (agent_id, digest)''')
+
+    def save_many(self, items):
+        """Insert a list of data in a single transaction.
+
+        Args:
+            items: List of data to save, or their JSON as bytes
+
+        Returns:
+            success: True if successful
+
+        """
+        # Initialize key variables
+        success = False
+        timestamp = int(time() * 1000)
+
+        # Insert
+        try:
+            payloads = [compress.compress_json(data) for data in items]
+            rows = [
+                (self.identifier, timestamp,
+                 compress.compress_json(payload, self.compression),
+                 digest(payload))
+                for payload in payloads]
+            with self._lock:
+                with self._connection:
+                    self._connection.execute('BEGIN')
+                    self._connection.executemany('''\
+INSERT INTO cache (agent_id, timestamp, data, digest) \
+VALUES (?, ?, ?, ?)''', rows)
+                if self._usage is not None:
+                    self._usage += sum(len(row[2]) for row in rows)
+            success = True
+        except:
+            _exception = sys.exc_info()
+            log_message = ('''\
+Cache database save error for identifier {}'''.format(self.identifier))
+            log.log2exception(1234, _exception, message=log_message)
+        return success
+
+    def entries(self, decode=True, claim=False):
+        """Read saved data, oldest first.
+
+        Rows are read a page at a time so that large caches aren't read into
+        memory all at once.
+
+        Args:
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes
+            claim: Ignored. Rows are only purged by the purger holding the
+                lock of the store.
+
+        Yields:
+            result: Entry object. The key is the row ID.
+
+        """
+        # Initialize key variables
+        last = (-1, -1)
+
+        while True:
+            # Read the next page
+            with self._lock:
+                rows = self._connection.execute('''\
+SELECT id, timestamp, data FROM cache WHERE agent_id = ? AND \
+(timestamp > ? OR (timestamp = ? AND id > ?)) ORDER BY timestamp, id \
+LIMIT ?''', (
+                    self.identifier, last[0], last[0], last[1], self.page
+                )).fetchall()
+            if bool(rows) is False:
+                return
+
+            # Return data
+            for (row_id, timestamp, blob) in rows:
+                last = (timestamp, row_id)
+                try:
+                    data = compress.decompress_payload(blob)
+                    if decode is True:
+                        data = codec.decode(data)
+                except:
+                    log_message = ('''\
+Deleting corrupted row {} in cache database {} for identifier {}.\
+'''.format(row_id, self.filepath, self.identifier))
+                    log.log2warning(1235, log_message)
+                    self.remove([str(row_id)])
+                    continue
+                yield Entry(key=str(row_id), data=data, size=len(blob))
+
+    def remove(self, keys):
+        """Remove rows once a page of them has been posted.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Delete rows in batches
+        with self._lock:
+            self._usage = None
+            self._removed.update(int(key) for key in keys)
+            if len(self._removed) >= self.page:
+                self.flush()
+
+    def overwrite(self, key, data):
+        """Overwrite the data of a row.
+
+        Args:
+            key: Entry key
+            data: Data to save
+
+        Returns:
+            size: Size of the saved data in bytes. None if unsuccessful
+
+        """
+        # Initialize key variables
+        size = None
+
+        # Update
+        try:
+            payload = compress.compress_json(data)
+            saved = compress.compress_json(payload, self.compression)
+            with self._lock:
+                self._connection.execute('''\
+UPDATE cache SET data = ?, digest = ? WHERE agent_id = ? AND id = ?''', (
+                    saved, digest(payload), self.identifier, int(key)))
+                self._usage = None
+            size = len(saved)
+        except:
+            _exception = sys.exc_info()
+            log_message = ('''\
+Cache database overwrite error for identifier {}'''.format(self.identifier))
+            log.log2exception(1240, _exception, message=log_message)
+        return size
+
+    def contains(self, key):
+        """Determine whether a row holds a payload.
+
+        Args:
+            key: digest() of the payload
+
+        Returns:
+            result: True if the payload is saved
+
+        """
+        # Rows waiting to be deleted don't count
+        with self._lock:
+            rows = self._connection.execute('''\
+SELECT id FROM cache WHERE agent_id = ? AND digest = ?''', (
+                self.identifier, key)).fetchall()
+            result = any(
+                row_id not in self._removed for (row_id,) in rows)
+        return result
+
+    def usage(self):
+        """Get the size of the data in the database.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        with self._lock:
+            # Delete removed rows first
+            self.flush()
+            (result,) = self._connection.execute('''\
+SELECT COALESCE(SUM(LENGTH(data)), 0) FROM cache WHERE agent_id = ?''', (
+                self.identifier,)).fetchone()
+        return result
+
+    def pending(self):
+        """Get the number and size of the rows in the database.
+
+        Args:
+            None
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        with self._lock:
+            # Delete removed rows first
+            self.flush()
+            result = self._connection.execute('''\
+SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM cache \
+WHERE agent_id = ?''', (self.identifier,)).fetchone()
+        return result
+
+    def flush(self):
+        """Delete removed rows. Consecutive rows are deleted as ranges.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        ranges = []
+
+        with self._lock:
+            if bool(self._removed) is False:
+                return
+
+            # Group consecutive row IDs
+            for row_id in sorted(self._removed):
+                if bool(ranges) is True and ranges[-1][1] == row_id - 1:
+                    ranges[-1][1] = row_id
+                else:
+                    ranges.append([row_id, row_id])
+
+            # Delete
+            try:
+                with self._connection:
+                    self._connection.execute('BEGIN')
+                    self._connection.executemany('''\
+DELETE FROM cache WHERE agent_id = ? AND id BETWEEN ? AND ?''', [
+                        (self.identifier, first, last)
+                        for (first, last) in ranges])
+                self._removed.clear()
+            except:
+                _exception = sys.exc_info()
+                log_message = ('''\
+Cache database purge error for identifier {}'''.format(self.identifier))
+                log.log2exception(1236, _exception, message=log_message)
+
+
+class MemoryStore(_Store):
+    """Store that holds recently failed posts in memory to be retried.
+
+    Data is spilled to the store of the cache_backend once the queue holds
+    more than agent_api_retry_queue payloads, once it is older than
+    agent_api_retry_queue_age seconds, or when the process exits. Data held
+    in memory is lost if the process is killed.
+
+    """
+
+    def __init__(self, identifier):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        _Store.__init__(self, identifier)
+        config = Config()
+        self.maximum = config.agent_api_retry_queue()
+        self.age = config.agent_api_retry_queue_age()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        # Queued [data, size, time queued, digest] lists keyed by Entry key,
+        # and the Entry keys of payload digests
+        self._queue = collections.OrderedDict()
+        self._digests = {}
+        self._count = 0
+
+    def save(self, data):
+        """Add data to the queue.
+
+        Args:
+            data: Data to save, or its JSON as bytes
+
+        Returns:
+            success: True if successful
+
+        """
+        # Add
+        payload = compress.compress_json(data)
+        key = digest(payload)
+        with self._lock:
+            self._count += 1
+            self._queue[str(self._count)] = [
+                payload, len(payload), monotonic(), key]
+            self._digests[key] = str(self._count)
+        success = True
+        return success
+
+    def entries(self, decode=True, claim=False):
+        """Read queued data, oldest first.
+
+        Args:
+            decode: Return decoded data if True, otherwise JSON as bytes
+            claim: Ignored. The queue is only purged by the thread holding
+                its lock.
+
+        Yields:
+            result: Entry object
+
+        """
+        # Read a copy of the queue so that data can be removed while reading
+        with self._lock:
+            items = [
+                (key, payload, size)
+                for (key, (payload, size, _, _)) in self._queue.items()]
+        for (key, payload, size) in items:
+            data = codec.decode(payload) if decode is True else payload
+            yield Entry(key=key, data=data, size=size)
+
+    def remove(self, keys):
+        """Remove data from the queue.
+
+        Args:
+            keys: List of Entry keys
+
+        Returns:
+            None
+
+        """
+        # Remove
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def contains(self, key):
+        """Determine whether the queue holds a payload.
+
+        Args:
+            key: digest() of the payload
+
+        Returns:
+            result: True if the payload is queued
+
+        """
+        # Return
+        with self._lock:
+            result = key in self._digests
+        return result
+
+    def pending(self):
+        """Get the number and size of the queued payloads.
+
+        Args:
+            None
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        # Return
+        with self._lock:
+            result = (
+                len(self._queue),
+                sum(size for (_, size, _, _) in self._queue.values()))
+        return result
+
+    def usage(self):
+        """Get the size of the queued data.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Return
+        result = self.pending()[1]
+        return result
+
+    def evict(self):
+        """Spill data that is too old or doesn't fit in the queue to disk.
+
+        The store of the cache_backend then evicts data that exceeds its
+        quotas.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of payloads evicted from the cache_backend store
+
+        """
+        # Initialize key variables
+        result = 0
+        oldest = monotonic() - self.age
+
+        # Find data to spill
+        with self._lock:
+            excess = len(self._queue) - self.maximum
+            keys = [
+                key for (index, (key, (_, _, queued, _))) in enumerate(
+                    self._queue.items())
+                if index < excess or queued < oldest]
+
+        # Spill
+        if bool(keys) is True:
+            result = self._spill(keys)
+        return result
+
+    def spill(self):
+        """Save all queued data to disk.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Only the process that queued the data may save it
+        if os.getpid() != self._pid:
+            return
+        with self._lock:
+            keys = list(self._queue.keys())
+        if bool(keys) is True:
+            self._spill(keys)
+
+    def _spill(self, keys):
+        """Move queued data to the store of the cache_backend.
+
+        Args:
+            keys: List of Entry keys, oldest first
+
+        Returns:
+            result: Number of payloads evicted from the cache_backend store
+
+        """
+        # Remove data from the queue
+        with self._lock:
+            items = [
+                self._pop(key)[0] for key in keys if key in self._queue]
+
+        # Save
+        _store = store(self.identifier)
+        _store.save_many(items)
+        result = _store.evict()
+        return result
+
+    def _pop(self, key):
+        """Remove data from the queue.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            result: [data, size, time queued, digest] list. None if not
+                queued.
+
+        """
+        # Remove
+        result = self._queue.pop(key, None)
+        if result is not None and self._digests.get(result[3]) == key:
+            del self._digests[result[3]]
+        return result
+
+
+def digest(payload):
+    """Get the digest of a payload, used as its idempotency key.
+
+    Args:
+        payload: JSON as bytes
+
+    Returns:
+        result: Hex SHA-256 digest
+
+    """
+    # Return
+    result = hashlib.sha256(payload).hexdigest()
+    return result
+
+
+def _claim(filepath, create=False):
+    """Lock a file without waiting for other processes to unlock it.
+
+    Args:
+        filepath: Path of file
+        create: Create the file if it doesn't exist
+
+    Returns:
+        result: Descriptor of the locked file. None if another process has
+            locked the file, or has replaced it since it was opened.
+
+    """
+    # Initialize key variables
+    flags = (os.O_RDONLY | os.O_CREAT) if create is True else os.O_RDONLY
+
+    # Lock. Raises FileNotFoundError if the file has been deleted.
+    result = os.open(filepath, flags, 0o640)
+    try:
+        fcntl.flock(result, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        locked = os.stat(filepath).st_ino == os.fstat(result).st_ino
+    except BlockingIOError:
+        locked = False
+    except:
+        os.close(result)
+        raise
+    if locked is False:
+        os.close(result)
+        result = None
+    return result
+
+
+def _write(filepath, data, level):
+    """Write data to a JSON file.
+
+    Args:
+        filepath: Path of file
+        data: Data to write
+        level: gzip compression level. 0 doesn't compress.
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    payload = compress.compress_json(data, level)
+
+    # Write
+    with open(filepath, 'wb') as f_handle:
+        f_handle.write(payload)
+
+
+# Store classes for each cache_backend
+_BACKENDS = {'files': FileStore, 'spool': SpoolStore, 'sqlite': SQLiteStore}
+
+
+def store(identifier):
+    """Get the store for the cached data of an identifier.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: Store object for the configured cache_backend
+
+    """
+    # Initialize key variables
+    backend = Config().cache_backend()
+    index = (os.getpid(), backend, identifier)
+
+    # Create a new object for new identifiers
+    with STORES_LOCK:
+        if index not in STORES:
+            STORES[index] = _BACKENDS[backend](identifier)
+        result = STORES[index]
+    return result
+
+
+def queue(identifier):
+    """Get the retry queue for the failed posts of an identifier.
+
+    Queued data is saved to disk when the process exits.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: MemoryStore object. None if agent_api_retry_queue is 0.
+
+    """
+    # Initialize key variables
+    result = None
+    index = (os.getpid(), identifier)
+
+    # Create a new object for new identifiers
+    if Config().agent_api_retry_queue() > 0:
+        with STORES_LOCK:
+            if index not in QUEUES:
+                QUEUES[index] = MemoryStore(identifier)
+                atexit.register(QUEUES[index].spill)
+            result = QUEUES[index]
+    return result
+
+
+def spill():
+    """Save the retry queues of all identifiers to disk.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    pid = os.getpid()
+
+    # Spill
+    with STORES_LOCK:
+        queues = [
+            _queue for (index, _queue) in QUEUES.items() if index[0] == pid]
+    for _queue in queues:
+        _queue.spill()
+
+
+def stores(identifier):
+    """Get the stores to purge for an identifier.
+
+    Cache files are always purged so that data saved before switching to
+    another cache_backend is still posted. The retry queue holds the newest
+    data, so it is purged last.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: List of store objects, cache files first
+
+    """
+    # Initialize key variables
+    result = [store(identifier)]
+
+    # Add cache files. Keep the FileStore so that its manifest isn't opened
+    # again each time.
+    if isinstance(result[0], FileStore) is False:
+        index = (os.getpid(), 'files', identifier)
+        with STORES_LOCK:
+            if index not in STORES:
+                STORES[index] = FileStore(identifier)
+            result.insert(0, STORES[index])
+
+    # Add the retry queue
+    _queue = queue(identifier)
+    if _queue is not None:
+        result.append(_queue)
+    return result
+
+
+class Watcher():
+    """Tracks whether the cache of an identifier has data to purge.
+
+    The cache is only read when it may have changed, so that agents with
+    nothing cached don't read the cache every time they post. Changes made
+    by this process are reported with notify(). Changes made by other
+    processes are detected with inotify on Linux, or by checking the cache
+    every _POLL_INTERVAL seconds elsewhere. All the Watcher objects of a
+    process share one inotify file descriptor.
+
+    """
+
+    def __init__(self, identifier, interval=_POLL_INTERVAL):
+        """Initialize the class.
+
+        Args:
+            identifier: Unique identifier for the source of the data. (AgentID)
+            interval: Seconds between checks of the cache if inotify isn't
+                available
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        config = Config()
+        self.identifier = identifier
+        self.interval = interval
+        self._lock = threading.RLock()
+        self._thread = None
+
+        # Whether there is a backlog. None until the cache is first checked
+        self._backlog = None
+        self._checked = 0
+
+        # Watch the directories written by the cache_backend
+        directories = [config.agent_cache_directory(identifier)]
+        if config.cache_backend() == 'spool':
+            directories.append(os.path.join(directories[0], 'spool'))
+            os.makedirs(directories[1], mode=0o750, exist_ok=True)
+        self._inotify = _inotify()
+        self._watches = None
+        self._events = 0
+        if self._inotify is not None:
+            self._watches = self._inotify.watch(directories)
+
+    def backlog(self):
+        """Determine whether the cache has data to purge.
+
+        Args:
+            None
+
+        Returns:
+            result: True if there is data to purge
+
+        """
+        with self._lock:
+            # Check the cache if it may have changed
+            changed = self._changed()
+            if changed is None:
+                changed = monotonic() - self._checked >= self.interval
+            if self._backlog is None or changed is True:
+                self.check()
+            result = self._backlog
+        return result
+
+    def _changed(self):
+        """Determine whether inotify reported changes since the last call.
+
+        Args:
+            None
+
+        Returns:
+            result: True if the watched directories changed. None if they
+                aren't watched with inotify.
+
+        """
+        # Initialize key variables
+        result = None
+
+        # Compare the number of events with the last call
+        if self._watches is not None:
+            events = self._inotify.events(self._watches)
+            if events is not None:
+                result = events != self._events
+                self._events = events
+        return result
+
+    def check(self, _stores=None):
+        """Check the cache for data to purge.
+
+        Args:
+            _stores: List of store objects to check. The stores returned by
+                stores() if None.
+
+        Returns:
+            result: Tuple of (number of payloads, size in bytes)
+
+        """
+        # Initialize key variables
+        count = 0
+        size = 0
+        if _stores is None:
+            _stores = stores(self.identifier)
+
+        # Add up the stores
+        with self._lock:
+            for _store in _stores:
+                (_count, _size) = _store.pending()
+                count += _count
+                size += _size
+            self._backlog = bool(count)
+            self._checked = monotonic()
+
+        # Return
+        result = (count, size)
+        return result
+
+    def notify(self):
+        """Record that data has been saved to the cache by this process.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Update
+        with self._lock:
+            self._backlog = True
+
+    def drain(self, function):
+        """Purge the cache in a background thread if it has data to purge.
+
+        Only one thread purges the cache at a time.
+
+        Args:
+            function: Function that purges the cache
+
+        Returns:
+            result: threading.Thread object. None if nothing was started.
+
+        """
+        # Initialize key variables
+        result = None
+
+        with self._lock:
+            # Start draining
+            if self.backlog() is True and (
+                    self._thread is None or self._thread.is_alive() is False):
+                self._thread = threading.Thread(
+                    target=self._drain, args=(function,), daemon=True)
+                self._thread.start()
+                result = self._thread
+        return result
+
+    def _drain(self, function):
+        """Purge the cache.
+
+        Args:
+            function: Function that purges the cache
+
+        Returns:
+            None
+
+        """
+        # Purge
+        try:
+            function()
+        except:
+            _exception = sys.exc_info()
+            log_message = ('''\
+Cache purge failure for identifier {}'''.format(self.identifier))
+            log.log2exception(1245, _exception, message=log_message)
+        finally:
+            self.check()
+
+
+class _Inotify():
+    """Reports changes to directories using Linux inotify.
+
+    There is one watch for each directory, however many Watcher objects
+    watch it.
+
+    """
+
+    def __init__(self, f_descriptor, libc):
+        """Initialize the class.
+
+        Args:
+            f_descriptor: Non-blocking inotify file descriptor
+            libc: ctypes.CDLL object of the C library
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._fd = f_descriptor
+        self._libc = libc
+        self._lock = threading.Lock()
+
+        # Watch descriptors keyed by directory, and the number of events
+        # read for each watch descriptor
+        self._watches = {}
+        self._events = collections.Counter()
+
+    @classmethod
+    def create(cls):
+        """Create an inotify file descriptor.
+
+        Args:
+            None
+
+        Returns:
+            result: _Inotify object. None if inotify isn't available.
+
+        """
+        # Initialize key variables
+        result = None
+
+        # Create
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            f_descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError, TypeError):
+            # Not Linux
+            return result
+        if f_descriptor >= 0:
+            result = cls(f_descriptor, libc)
+        return result
+
+    def watch(self, directories):
+        """Watch directories for files being created, written or moved.
+
+        Args:
+            directories: List of directories
+
+        Returns:
+            result: Tuple of watch descriptors. None if a directory can't
+                be watched.
+
+        """
+        # Initialize key variables
+        result = []
+
+        with self._lock:
+            if self._fd is None:
+                return None
+
+            # Add watches for directories that aren't already watched
+            for directory in directories:
+                if directory not in self._watches:
+                    w_descriptor = self._libc.inotify_add_watch(
+                        self._fd, os.fsencode(directory), _IN_EVENTS)
+                    if w_descriptor < 0:
+                        return None
+                    self._watches[directory] = w_descriptor
+                result.append(self._watches[directory])
+        return tuple(result)
+
+    def events(self, watches):
+        """Get the number of events read for watch descriptors.
+
+        Args:
+            watches: Tuple of watch descriptors returned by watch()
+
+        Returns:
+            result: Number of events, including event queue overflows. None
+                if the file descriptor is closed.
+
+        """
+        with self._lock:
+            if self._fd is None:
+                return None
+
+            # Read all pending events
+            while True:
+                try:
+                    data = os.read(self._fd, 65536)
+                except BlockingIOError:
+                    break
+                if bool(data) is False:
+                    break
+                offset = 0
+                while offset + _IN_EVENT.size <= len(data):
+                    (w_descriptor, _, _, length) = _IN_EVENT.unpack_from(
+                        data, offset)
+                    self._events[w_descriptor] += 1
+                    offset += _IN_EVENT.size + length
+
+            # Return
+            result = self._events[-1] + sum(
+                self._events[_] for _ in watches)
+        return result
+
+    def close(self):
+        """Close the inotify file descriptor.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._watches.clear()
+
+
+def _inotify():
+    """Get the _Inotify object shared by the Watcher objects of the process.
+
+    Args:
+        None
+
+    Returns:
+        result: _Inotify object. None if inotify isn't available.
+
+    """
+    # Initialize key variables
+    index = os.getpid()
+
+    # Create a new object for new processes
+    with INOTIFY_LOCK:
+        if index not in INOTIFY:
+            INOTIFY[index] = _Inotify.create()
+            if INOTIFY[index] is not None:
+                atexit.register(INOTIFY[index].close)
+        result = INOTIFY[index]
+    return result
+
+
+def watcher(identifier):
+    """Get the Watcher object for the cache of an identifier.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: Watcher object
+
+    """
+    # Initialize key variables
+    index = (os.getpid(), identifier)
+
+    # Create a new object for new identifiers
+    with WATCHERS_LOCK:
+        if index not in WATCHERS:
+            WATCHERS[index] = Watcher(identifier)
+        result = WATCHERS[index]
+    return result
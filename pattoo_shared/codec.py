@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Pattoo JSON codec.
+
+Uses orjson when it is installed, otherwise the standard json library.
+
+"""
+
+# Standard imports
+import json
+
+# PIP imports
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name of the JSON library in use
+BACKEND = 'json' if orjson is None else 'orjson'
+
+# Compact output for the standard library, like orjson
+_SEPARATORS = (',', ':')
+
+
+def encode(data):
+    """Convert data to JSON.
+
+    Args:
+        data: Data to convert. Integer dict keys are converted to strings.
+
+    Returns:
+        result: JSON as UTF-8 bytes
+
+    """
+    # Use orjson if possible
+    if orjson is not None:
+        try:
+            result = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+            return result
+        except TypeError:
+            # orjson doesn't support integers larger than 64 bits
+            pass
+
+    # Return
+    result = json.dumps(
+        data, separators=_SEPARATORS, ensure_ascii=False).encode()
+    return result
+
+
+def dumps(data):
+    """Convert data to a JSON string.
+
+    Args:
+        data: Data to convert
+
+    Returns:
+        result: JSON string
+
+    """
+    # Return
+    result = encode(data).decode()
+    return result
+
+
+def decode(data):
+    """Convert JSON to data.
+
+    Args:
+        data: JSON as a string or UTF-8 bytes
+
+    Returns:
+        result: Decoded data. ValueError is raised if the JSON is invalid.
+
+    """
+    # Return
+    if orjson is not None:
+        result = orjson.loads(data)
+    else:
+        result = json.loads(data)
+    return result
+
+
+def decode_nested(data):
+    """Convert JSON to data, decoding JSON encoded as a JSON string.
+
+    Agents encode encrypted posts twice unless the
+    agent_api_encrypted_json_object option is enabled. The pattoo API
+    server can use this to read both formats.
+
+    Args:
+        data: JSON as a string or UTF-8 bytes
+
+    Returns:
+        result: Decoded data. ValueError is raised if the JSON is invalid.
+
+    """
+    # Return
+    result = decode(data)
+    if isinstance(result, str) is True:
+        result = decode(result)
+    return result
+
+
+def read(filepath):
+    """Read a JSON file.
+
+    Args:
+        filepath: Path of file
+
+    Returns:
+        result: Decoded data. ValueError is raised if the JSON is invalid.
+
+    """
+    # Return
+    with open(filepath, 'rb') as f_handle:
+        result = decode(f_handle.read())
+    return result
+
+
+def write(filepath, data):
+    """Write data to a JSON file.
+
+    Args:
+        filepath: Path of file
+        data: Data to write
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    body = encode(data)
+
+    # Write
+    with open(filepath, 'wb') as f_handle:
+        f_handle.write(body)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Pattoo HTTP request body compression."""
+
+# Standard imports
+import sys
+import zlib
+
+# Pattoo imports
+from pattoo_shared import log
+from pattoo_shared import codec
+from pattoo_shared.constants import COMPRESSION_ENCODINGS
+
+# First bytes of every gzip stream. JSON can't start with them.
+GZIP_MAGIC = b'\x1f\x8b'
+
+# zlib window sizes for each Content-Encoding. Some clients send raw deflate
+# streams without the zlib header, so those are accepted too.
+_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'x-gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+
+
+def compress(body, encoding):
+    """Compress an HTTP request body.
+
+    Args:
+        body: Body as bytes
+        encoding: Content-Encoding to use. One of COMPRESSION_ENCODINGS
+
+    Returns:
+        result: Compressed body as bytes. The body is unchanged if the
+            encoding isn't supported.
+
+    """
+    # Check encoding
+    if encoding not in COMPRESSION_ENCODINGS:
+        log_message = ('''\
+Unsupported Content-Encoding "{}". Body not compressed.'''.format(encoding))
+        log.log2warning(1217, log_message)
+        return body
+
+    # Compress
+    compressor = zlib.compressobj(wbits=_WBITS[encoding])
+    result = compressor.compress(body) + compressor.flush()
+    return result
+
+
+def decompress(body, encoding, maximum=None):
+    """Decompress an HTTP request body.
+
+    Used by the pattoo API server to read bodies compressed by agents.
+
+    Args:
+        body: Body as bytes
+        encoding: Value of the request's Content-Encoding header. None if
+            there was no header.
+        maximum: Maximum size of the decompressed body in bytes. None is
+            unlimited.
+
+    Returns:
+        result: Decompressed body as bytes. None if the encoding isn't
+            supported, the body is corrupt or it is too large.
+
+    """
+    # Initialize key variables
+    result = None
+    encoding = '' if encoding is None else encoding.strip().lower()
+
+    # Return uncompressed bodies as is
+    if encoding in ['', 'identity']:
+        return body
+    if encoding not in _WBITS:
+        log_message = ('''\
+Unsupported Content-Encoding "{}"'''.format(encoding))
+        log.log2warning(1218, log_message)
+        return result
+
+    # Decompress
+    wbits = [_WBITS[encoding]]
+    if encoding == 'deflate':
+        wbits.append(-zlib.MAX_WBITS)
+    for _wbits in wbits:
+        try:
+            result = _inflate(body, _wbits, maximum)
+            break
+        except zlib.error:
+            continue
+        except:
+            _exception = sys.exc_info()
+            log_message = ('Request body decompression failure')
+            log.log2exception(1219, _exception, message=log_message)
+            return None
+
+    # Log failures
+    if result is None:
+        log_message = ('''\
+Invalid or oversized request body with Content-Encoding "{}"\
+'''.format(encoding))
+        log.log2warning(1220, log_message)
+    return result
+
+
+def json_body(data, encoding=None, threshold=0):
+    """Create a JSON HTTP request body, compressing it if large enough.
+
+    Args:
+        data: Data to convert to JSON, or JSON as bytes
+        encoding: Content-Encoding to use. One of COMPRESSION_ENCODINGS.
+            None disables compression.
+        threshold: Minimum size in bytes of bodies that are compressed
+
+    Returns:
+        result: Tuple of (body as bytes, dict of request headers)
+
+    """
+    # Initialize key variables
+    body = data if isinstance(data, bytes) else codec.encode(data)
+    headers = {'Content-Type': 'application/json'}
+
+    # Compress
+    if encoding in COMPRESSION_ENCODINGS and len(body) >= threshold:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+
+    # Return
+    result = (body, headers)
+    return result
+
+
+def json_data(body, encoding, maximum=None):
+    """Read a JSON HTTP request body that may be compressed.
+
+    Used by the pattoo API server to read bodies created by json_body.
+
+    Args:
+        body: Body as bytes
+        encoding: Value of the request's Content-Encoding header. None if
+            there was no header.
+        maximum: Maximum size of the decompressed body in bytes. None is
+            unlimited.
+
+    Returns:
+        result: Data decoded from JSON. None if the body is invalid.
+
+    """
+    # Initialize key variables
+    result = None
+
+    # Decompress
+    _body = decompress(body, encoding, maximum=maximum)
+    if _body is None:
+        return result
+
+    # Decode
+    try:
+        result = codec.decode(_body)
+    except:
+        log_message = ('Request body is not valid JSON')
+        log.log2warning(1221, log_message)
+    return result
+
+
+def compress_json(data, level=0):
+    """Convert data to JSON, gzip compressing it for storage.
+
+    Args:
+        data: Data to convert, or JSON as bytes
+        level: gzip compression level from 1 to 9. 0 doesn't compress.
+
+    Returns:
+        result: JSON as bytes
+
+    """
+    # Initialize key variables
+    result = data if isinstance(data, bytes) else codec.encode(data)
+
+    # Compress
+    if level > 0:
+        compressor = zlib.compressobj(level, wbits=_WBITS['gzip'])
+        result = compressor.compress(result) + compressor.flush()
+    return result
+
+
+def decompress_json(payload):
+    """Read JSON created by compress_json.
+
+    gzip compressed JSON is recognized by its header, so JSON can be read
+    whether or not it was compressed.
+
+    Args:
+        payload: JSON as bytes
+
+    Returns:
+        result: Decoded data. ValueError is raised if the JSON is invalid.
+
+    """
+    # Return
+    result = codec.decode(decompress_payload(payload))
+    return result
+
+
+def decompress_payload(payload):
+    """Get the JSON bytes of JSON created by compress_json.
+
+    The JSON is not decoded.
+
+    Args:
+        payload: JSON as bytes
+
+    Returns:
+        result: Uncompressed JSON as bytes. ValueError is raised if the gzip
+            data is invalid.
+
+    """
+    # Initialize key variables
+    result = payload
+
+    # Decompress
+    if payload[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        try:
+            result = zlib.decompress(payload, _WBITS['gzip'])
+        except zlib.error as err:
+            raise ValueError('Invalid gzip data: {}'.format(err))
+    return result
+
+
+def _inflate(body, wbits, maximum):
+    """Decompress a complete zlib, gzip or raw deflate stream.
+
+    Args:
+        body: Compressed bytes
+        wbits: zlib window size that selects the stream format
+        maximum: Maximum size of the decompressed body in bytes. None is
+            unlimited.
+
+    Returns:
+        result: Decompressed bytes. None if the stream is too large or
+            truncated.
+
+    """
+    # Initialize key variables
+    decompressor = zlib.decompressobj(wbits=wbits)
+
+    # Decompress no more than the maximum
+    if maximum is None:
+        result = decompressor.decompress(body)
+    else:
+        result = decompressor.decompress(body, maximum + 1)
+        if len(result) > maximum:
+            return None
+    result += decompressor.flush()
+
+    # The stream must be complete
+    if decompressor.eof is False:
+        return None
+    return result
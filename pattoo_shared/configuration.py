@@ -10,7 +10,8 @@ from pattoo_shared import files
 from pattoo_shared import log
 from pattoo_shared import url
 from pattoo_shared.constants import (
-    PATTOO_API_AGENT_PREFIX)
+    PATTOO_API_AGENT_PREFIX, COMPRESSION_ENCODINGS, CACHE_BACKENDS,
+    CACHE_FSYNC_POLICIES, CACHE_EVICTION_POLICIES, CACHE_SHARD_INTERVALS)
 from pattoo_shared.variables import PollingPoint
 
 
@@ -208,6 +209,240 @@ class BaseConfig():
         # Return
         return result
 
+    def cache_backend(self):
+        """Get cache_backend.
+
+        Args:
+            None
+
+        Returns:
+            result: Format for storing cached agent data
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_backend'
+
+        # Get result
+        result = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if bool(result) is False:
+            return 'files'
+
+        # Check value
+        result = str(result).strip().lower()
+        if result not in CACHE_BACKENDS:
+            log_message = (
+                '{}:{} must be one of {}. Not "{}"'.format(
+                    key, sub_key, ', '.join(CACHE_BACKENDS), result))
+            log.log2die_safe(1229, log_message)
+        return result
+
+    def cache_segment_bytes(self):
+        """Get cache_segment_bytes.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes of each cache spool segment file
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_segment_bytes'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 4194304
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def cache_fsync(self):
+        """Get cache_fsync.
+
+        Args:
+            None
+
+        Returns:
+            result: When cache spool data is flushed to disk
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_fsync'
+
+        # Get result
+        result = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if bool(result) is False:
+            return 'segment'
+
+        # Check value
+        result = str(result).strip().lower()
+        if result not in CACHE_FSYNC_POLICIES:
+            log_message = (
+                '{}:{} must be one of {}. Not "{}"'.format(
+                    key, sub_key, ', '.join(CACHE_FSYNC_POLICIES), result))
+            log.log2die_safe(1230, log_message)
+        return result
+
+    def cache_shard(self):
+        """Get cache_shard.
+
+        Args:
+            None
+
+        Returns:
+            result: Interval of the subdirectories cache files are saved in
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_shard'
+
+        # Get result
+        result = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if bool(result) is False:
+            return 'hour'
+
+        # Check value
+        result = str(result).strip().lower()
+        if result not in CACHE_SHARD_INTERVALS:
+            log_message = (
+                '{}:{} must be one of {}. Not "{}"'.format(
+                    key, sub_key, ', '.join(CACHE_SHARD_INTERVALS), result))
+            log.log2die_safe(1241, log_message)
+        return result
+
+    def cache_compression(self):
+        """Get cache_compression.
+
+        Args:
+            None
+
+        Returns:
+            result: gzip compression level of cached agent data. 0 stores
+                uncompressed JSON.
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_compression'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0
+        else:
+            result = min(9, max(0, int(intermediate)))
+        return result
+
+    def cache_max_bytes(self):
+        """Get cache_max_bytes.
+
+        Args:
+            None
+
+        Returns:
+            result: Maximum size in bytes of each agent's cache. 0 is
+                unlimited.
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_max_bytes'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def cache_max_age(self):
+        """Get cache_max_age.
+
+        Args:
+            None
+
+        Returns:
+            result: Maximum age in seconds of cached agent data. 0 is
+                unlimited.
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_max_age'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def cache_eviction(self):
+        """Get cache_eviction.
+
+        Args:
+            None
+
+        Returns:
+            result: How cached agent data is evicted when the cache is full
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_eviction'
+
+        # Get result
+        result = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if bool(result) is False:
+            return 'oldest'
+
+        # Check value
+        result = str(result).strip().lower()
+        if result not in CACHE_EVICTION_POLICIES:
+            log_message = (
+                '{}:{} must be one of {}. Not "{}"'.format(
+                    key, sub_key, ', '.join(CACHE_EVICTION_POLICIES), result))
+            log.log2die_safe(1237, log_message)
+        return result
+
+    def cache_eviction_group(self):
+        """Get cache_eviction_group.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of evicted payloads thinned or summarized into one
+
+        """
+        # Initialize key variables
+        key = 'pattoo'
+        sub_key = 'cache_eviction_group'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._base_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 10
+        else:
+            result = max(2, int(intermediate))
+        return result
+
     def daemon_directory(self):
         """Determine the daemon_directory.
 
@@ -411,113 +646,628 @@ class Config(BaseConfig):
             result = int(intermediate)
         return result
 
-    def agent_api_uri(self):
-        """Get agent_api_uri.
+    def agent_api_pool_size(self):
+        """Get agent_api_pool_size.
 
         Args:
             None
 
         Returns:
-            result: result
+            result: Maximum number of pooled connections to the API server
 
         """
-        # Return
-        result = '{}/receive'.format(PATTOO_API_AGENT_PREFIX)
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'pool_size'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 10
+        else:
+            result = max(1, int(intermediate))
         return result
 
-    def agent_api_key(self):
-        """Get URL for key exchange.
+    def agent_api_keep_alive(self):
+        """Get agent_api_keep_alive.
 
         Args:
             None
 
         Returns:
-            url (str): URL of the key exchange point
+            result: True if HTTP connections to the API server are persistent
+
         """
-        url_ = '{}/key'.format(PATTOO_API_AGENT_PREFIX)
-        return url_
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'keep_alive'
 
-    def agent_api_validation(self):
-        """Get URL to validate encryption status.
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = True
+        else:
+            result = bool(intermediate)
+        return result
+
+    def agent_api_session_ttl(self):
+        """Get agent_api_session_ttl.
 
         Args:
             None
 
         Returns:
-            url (str): URL of the validation point
+            result: Seconds to reuse an encrypted session before exchanging
+                keys with the API server again
+
         """
-        url_ = '{}/validation'.format(PATTOO_API_AGENT_PREFIX)
-        return url_
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'session_ttl'
 
-    def agent_api_encrypted(self):
-        """Get URL to receive encrypted data.
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 3600
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_api_batch_size(self):
+        """Get agent_api_batch_size.
 
         Args:
             None
 
         Returns:
-            result: result
+            result: Maximum number of cached payloads to post in each request
+                when purging the cache. 1 disables batching.
 
         """
-        # Return
-        result = '{}/encrypted'.format(PATTOO_API_AGENT_PREFIX)
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'batch_size'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 1
+        else:
+            result = max(1, int(intermediate))
         return result
 
-    def agent_api_server_url(self, agent_id):
-        """Get pattoo server's remote URL.
+    def agent_api_batch_bytes(self):
+        """Get agent_api_batch_bytes.
 
         Args:
-            agent_id: Agent ID
+            None
 
         Returns:
-            result: URL.
+            result: Maximum number of cached bytes to post in each batch
 
         """
-        # Return
-        _ip = url.url_ip_address(self.agent_api_ip_address())
-        result = (
-            'http://{}:{}{}/{}'.format(
-                _ip,
-                self.agent_api_ip_bind_port(),
-                self.agent_api_uri(), agent_id))
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'batch_bytes'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 1048576
+        else:
+            result = max(1, int(intermediate))
         return result
 
-    def agent_api_key_url(self):
-        """Exchange point for public keys.
+    def agent_api_purge_workers(self):
+        """Get agent_api_purge_workers.
 
         Args:
             None
 
         Returns:
-            link (str): Link of the key exchange point
+            result: Number of threads posting cached data concurrently when
+                purging the cache
 
         """
         # Initialize key variables
-        _ip = url.url_ip_address(self.agent_api_ip_address())
-        link = (
-            'http://{}:{}{}'.format(
-                _ip,
-                self.agent_api_ip_bind_port(),
-                self.agent_api_key()
-                )
-            )
+        key = 'pattoo_agent_api'
+        sub_key = 'purge_workers'
 
-        return link
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 1
+        else:
+            result = max(1, int(intermediate))
+        return result
 
-    def agent_api_validation_url(self):
-        """Validation point for encryption.
+    def agent_api_purge_rate(self):
+        """Get agent_api_purge_rate.
 
         Args:
             None
 
         Returns:
-            link (str): Link of the validation point
+            result: Maximum number of requests per second made when purging
+                the cache. 0 is unlimited.
 
         """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'purge_rate'
 
-        _ip = url.url_ip_address(self.agent_api_ip_address())
-        link = (
-            'http://{}:{}{}'.format(
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0
+        else:
+            result = max(0, float(intermediate))
+        return result
+
+    def agent_api_retries(self):
+        """Get agent_api_retries.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of times a failed post is retried before its data is
+                cached
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'retries'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 2
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_api_retry_queue(self):
+        """Get agent_api_retry_queue.
+
+        Args:
+            None
+
+        Returns:
+            result: Maximum number of failed posts held in memory to be
+                retried before their data is cached on disk. 0 caches data on
+                disk straight away.
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'retry_queue'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_api_retry_queue_age(self):
+        """Get agent_api_retry_queue_age.
+
+        Args:
+            None
+
+        Returns:
+            result: Seconds failed posts are held in memory before their data
+                is cached on disk
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'retry_queue_age'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 60
+        else:
+            result = max(0, float(intermediate))
+        return result
+
+    def agent_api_backoff(self):
+        """Get agent_api_backoff.
+
+        Args:
+            None
+
+        Returns:
+            result: Seconds to wait before the first retry. The wait doubles
+                with each retry.
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'backoff'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 0.5
+        else:
+            result = max(0, float(intermediate))
+        return result
+
+    def agent_api_backoff_max(self):
+        """Get agent_api_backoff_max.
+
+        Args:
+            None
+
+        Returns:
+            result: Maximum number of seconds to wait between retries
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'backoff_max'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 30
+        else:
+            result = max(0, float(intermediate))
+        return result
+
+    def agent_api_breaker_threshold(self):
+        """Get agent_api_breaker_threshold.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of consecutive failures after which posting to the
+                API server stops until the breaker timeout expires. 0
+                disables the circuit breaker.
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'breaker_threshold'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 5
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_api_breaker_timeout(self):
+        """Get agent_api_breaker_timeout.
+
+        Args:
+            None
+
+        Returns:
+            result: Seconds to wait before posting to the API server again
+                after the circuit breaker opens
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'breaker_timeout'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 60
+        else:
+            result = max(0, float(intermediate))
+        return result
+
+    def agent_api_compression(self):
+        """Get agent_api_compression.
+
+        Args:
+            None
+
+        Returns:
+            result: Content-Encoding used to compress posted data. None if
+                posts aren't compressed.
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'compression'
+
+        # Get result
+        result = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if bool(result) is False:
+            return None
+
+        # Check value
+        result = str(result).strip().lower()
+        if result not in COMPRESSION_ENCODINGS:
+            log_message = (
+                '{}:{} must be one of {}. Not "{}"'.format(
+                    key, sub_key, ', '.join(COMPRESSION_ENCODINGS), result))
+            log.log2die_safe(1216, log_message)
+        return result
+
+    def agent_api_compression_threshold(self):
+        """Get agent_api_compression_threshold.
+
+        Args:
+            None
+
+        Returns:
+            result: Minimum size in bytes of posts that are compressed
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'compression_threshold'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = 1024
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_api_delta_encoding(self):
+        """Get agent_api_delta_encoding.
+
+        Args:
+            None
+
+        Returns:
+            result: True if only the changes to a dictionary of key-value
+                pairs shared with the API server are posted
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'delta_encoding'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = False
+        else:
+            result = bool(intermediate)
+        return result
+
+    def agent_api_encrypted_json_object(self):
+        """Get agent_api_encrypted_json_object.
+
+        Args:
+            None
+
+        Returns:
+            result: True if encrypted data is posted as a JSON object
+                instead of a JSON string containing JSON
+
+        """
+        # Initialize key variables
+        key = 'pattoo_agent_api'
+        sub_key = 'encrypted_json_object'
+
+        # Get result
+        intermediate = search(
+            key, sub_key, self._agent_yaml_configuration, die=False)
+        if intermediate is None:
+            result = False
+        else:
+            result = bool(intermediate)
+        return result
+
+    def agent_api_uri(self):
+        """Get agent_api_uri.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Return
+        result = '{}/receive'.format(PATTOO_API_AGENT_PREFIX)
+        return result
+
+    def agent_api_key(self):
+        """Get URL for key exchange.
+
+        Args:
+            None
+
+        Returns:
+            url (str): URL of the key exchange point
+        """
+        url_ = '{}/key'.format(PATTOO_API_AGENT_PREFIX)
+        return url_
+
+    def agent_api_validation(self):
+        """Get URL to validate encryption status.
+
+        Args:
+            None
+
+        Returns:
+            url (str): URL of the validation point
+        """
+        url_ = '{}/validation'.format(PATTOO_API_AGENT_PREFIX)
+        return url_
+
+    def agent_api_encrypted(self):
+        """Get URL to receive encrypted data.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Return
+        result = '{}/encrypted'.format(PATTOO_API_AGENT_PREFIX)
+        return result
+
+    def agent_api_batch(self):
+        """Get URI to receive batches of cached data.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Return
+        result = '{}/batch'.format(PATTOO_API_AGENT_PREFIX)
+        return result
+
+    def agent_api_encrypted_batch(self):
+        """Get URI to receive encrypted batches of cached data.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Return
+        result = '{}/batch'.format(self.agent_api_encrypted())
+        return result
+
+    def agent_api_delta(self):
+        """Get URI to receive delta encoded data.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Return
+        result = '{}/delta'.format(PATTOO_API_AGENT_PREFIX)
+        return result
+
+    def agent_api_server_url(self, agent_id):
+        """Get pattoo server's remote URL.
+
+        Args:
+            agent_id: Agent ID
+
+        Returns:
+            result: URL.
+
+        """
+        # Return
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        result = (
+            'http://{}:{}{}/{}'.format(
+                _ip,
+                self.agent_api_ip_bind_port(),
+                self.agent_api_uri(), agent_id))
+        return result
+
+    def agent_api_batch_url(self, agent_id):
+        """Get URL to receive batches of cached data.
+
+        Args:
+            agent_id: Agent ID
+
+        Returns:
+            result: URL.
+
+        """
+        # Return
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        result = (
+            'http://{}:{}{}/{}'.format(
+                _ip,
+                self.agent_api_ip_bind_port(),
+                self.agent_api_batch(), agent_id))
+        return result
+
+    def agent_api_delta_url(self, agent_id):
+        """Get URL to receive delta encoded data.
+
+        Args:
+            agent_id: Agent ID
+
+        Returns:
+            result: URL.
+
+        """
+        # Return
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        result = (
+            'http://{}:{}{}/{}'.format(
+                _ip,
+                self.agent_api_ip_bind_port(),
+                self.agent_api_delta(), agent_id))
+        return result
+
+    def agent_api_key_url(self):
+        """Exchange point for public keys.
+
+        Args:
+            None
+
+        Returns:
+            link (str): Link of the key exchange point
+
+        """
+        # Initialize key variables
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        link = (
+            'http://{}:{}{}'.format(
+                _ip,
+                self.agent_api_ip_bind_port(),
+                self.agent_api_key()
+                )
+            )
+
+        return link
+
+    def agent_api_validation_url(self):
+        """Validation point for encryption.
+
+        Args:
+            None
+
+        Returns:
+            link (str): Link of the validation point
+
+        """
+
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        link = (
+            'http://{}:{}{}'.format(
                 _ip,
                 self.agent_api_ip_bind_port(),
                 self.agent_api_validation()
@@ -548,6 +1298,28 @@ class Config(BaseConfig):
 
         return link
 
+    def agent_api_encrypted_batch_url(self):
+        """Encrypted batch data reception point.
+
+        Args:
+            None
+
+        Returns:
+            link (str): Link of encrypted batch data receive point
+
+        """
+
+        _ip = url.url_ip_address(self.agent_api_ip_address())
+        link = (
+            'http://{}:{}{}'.format(
+                _ip,
+                self.agent_api_ip_bind_port(),
+                self.agent_api_encrypted_batch()
+                )
+            )
+
+        return link
+
 
 def agent_config_filename(agent_program):
     """Get the configuration file name.
@@ -23,6 +23,10 @@ DATA_NONE = None
 
 MAX_KEYPAIR_LENGTH = 512
 
+# Number of DataPoint checksums to cache between polling cycles. Each cached
+# checksum uses about 250 bytes. See tests/bin/benchmark_variables.py
+CHECKSUM_CACHE_SIZE = 100000
+
 # Groupings of reserved keys
 DATAPOINT_KEYS = (
     'pattoo_checksum', 'pattoo_metadata', 'pattoo_data_type', 'pattoo_key',
@@ -48,6 +52,46 @@ CACHE_KEYS = (
     'pattoo_agent_id', 'pattoo_datapoints', 'pattoo_agent_polling_interval',
     'pattoo_agent_timestamp')
 
+# Keys of batches of posted cached data, the payloads in the batch, and the
+# acknowledgement of payloads received by the pattoo API
+BATCH_KEYS = ('pattoo_agent_id', 'pattoo_payloads')
+BATCH_PAYLOAD_KEYS = ('pattoo_payload_id', 'pattoo_payload')
+BATCH_ACKNOWLEDGEMENT_KEY = 'pattoo_payload_ids'
+
+# Keys of delta encoded posted data and of the dictionary of key-value pairs
+# it is based on. Based on keys in CACHE_KEYS
+DELTA_KEYS = (
+    'pattoo_agent_id', 'pattoo_datapoints', 'pattoo_agent_polling_interval',
+    'pattoo_agent_timestamp', 'pattoo_dictionary')
+DELTA_DICTIONARY_KEYS = (
+    'pattoo_dictionary_id', 'pattoo_dictionary_version', 'key_value_pairs')
+
+# Maximum number of key-value pairs in the dictionary of delta encoded data
+DELTA_DICTIONARY_SIZE = 1000000
+
+# Request header of the digest of posted data, so that the pattoo API can
+# ignore data posted more than once
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+
+# Formats for storing cached agent data, and policies for flushing spooled
+# cache data to disk
+CACHE_BACKENDS = ('files', 'spool', 'sqlite')
+CACHE_FSYNC_POLICIES = ('always', 'segment', 'never')
+
+# Intervals of the subdirectories cache files are sharded into
+CACHE_SHARD_INTERVALS = ('hour', 'day')
+
+# Ways of evicting cached agent data when the cache exceeds its quota
+CACHE_EVICTION_POLICIES = ('oldest', 'thin', 'summarize')
+
+# Content-Encoding values supported for compressed request bodies
+COMPRESSION_ENCODINGS = ('gzip', 'deflate')
+
+# Seconds a daemon stopped by SIGTERM waits to save its retry queues, and
+# seconds to wait for a daemon to exit when stopping it
+DAEMON_SPILL_TIMEOUT = 10
+DAEMON_STOP_TIMEOUT = 30
+
 ###############################################################################
 # Constants for pattoo Agent API
 ###############################################################################
@@ -3,17 +3,20 @@
 
 # Standard imports
 import re
+from collections import defaultdict
 
 # Pattoo libraries
 from .variables import (
-    ConverterMetadata, DataPoint, AgentPolledData,
+    ConverterMetadata, DataPoint, DataPointBatch, AgentPolledData,
     PostingDataPoints)
 from .constants import (
     DATA_FLOAT, DATA_INT, DATA_COUNT64, DATA_COUNT, DATA_STRING, DATA_NONE,
     MAX_KEYPAIR_LENGTH, PattooDBrecord, RESERVED_KEYS, CACHE_KEYS,
-    AGENT_METADATA_KEYS)
+    AGENT_METADATA_KEYS, BATCH_KEYS, BATCH_PAYLOAD_KEYS,
+    BATCH_ACKNOWLEDGEMENT_KEY)
 from pattoo_shared import data
 from pattoo_shared import log
+from pattoo_shared import codec
 
 
 class Counter():
@@ -145,6 +148,179 @@ def cache_to_keypairs(_data):
     return result
 
 
+def summarize_cache(items):
+    """Merge agent cache data into a single coarser summary.
+
+    Numeric gauge values of each datapoint are averaged. Counters and
+    strings keep their latest value, as do the datapoint timestamps.
+
+    Args:
+        items: List of data read from the cache, oldest first
+
+    Returns:
+        result: Dict of cache data. None if no item is valid.
+
+    """
+    # Initialize key variables
+    result = None
+    datapoints = {}
+    values = defaultdict(list)
+    counter = Counter()
+    all_dps = []
+
+    # Get the datapoints of each item keyed by checksum
+    for _data in items:
+        if bool(cache_to_keypairs(_data)) is False:
+            continue
+        result = _data
+        key_value_pairs = _data['pattoo_datapoints']['key_value_pairs']
+        for pair_ids in _data['pattoo_datapoints']['datapoint_pairs']:
+            item = dict(
+                key_value_pairs[str(pair_id)] for pair_id in pair_ids)
+            checksum = item['pattoo_checksum']
+            datapoints[checksum] = item
+            values[checksum].append(item['pattoo_value'])
+    if result is None:
+        return result
+
+    # Average gauges
+    for checksum, item in datapoints.items():
+        if item['pattoo_data_type'] in [DATA_FLOAT, DATA_INT]:
+            try:
+                average = sum(
+                    float(value) for value in values[checksum]) / len(
+                        values[checksum])
+            except (TypeError, ValueError):
+                average = item['pattoo_value']
+            else:
+                if item['pattoo_data_type'] == DATA_INT:
+                    average = int(round(average))
+            item['pattoo_value'] = average
+
+        # Encode the datapoint
+        all_dps.append([
+            counter.counter(key, value) for key, value in item.items()])
+
+    # Return
+    result = {
+        'pattoo_agent_timestamp': result['pattoo_agent_timestamp'],
+        'pattoo_agent_id': result['pattoo_agent_id'],
+        'pattoo_agent_polling_interval': result[
+            'pattoo_agent_polling_interval'],
+        'pattoo_datapoints': {
+            'key_value_pairs': counter.inverse_pairs,
+            'datapoint_pairs': all_dps}}
+    return result
+
+
+def payloads_to_batch(agent_id, payloads):
+    """Create a batch of cached data to post to the pattoo API.
+
+    Args:
+        agent_id: Unique ID of agent posting data
+        payloads: List of (payload_id, cache data) tuples
+
+    Returns:
+        result: Dict of batch data to post
+
+    """
+    # Return
+    result = {
+        'pattoo_agent_id': agent_id,
+        'pattoo_payloads': [
+            {'pattoo_payload_id': payload_id, 'pattoo_payload': payload}
+            for (payload_id, payload) in payloads]
+    }
+    return result
+
+
+def encode_batch(agent_id, payloads):
+    """Create the JSON of a batch of cached data to post to the pattoo API.
+
+    Cached data that is already JSON is inserted into the batch without
+    being decoded. Otherwise the result is the same as payloads_to_batch.
+
+    Args:
+        agent_id: Unique ID of agent posting data
+        payloads: List of (payload_id, cache data) tuples. Cache data may be
+            JSON as bytes.
+
+    Returns:
+        result: JSON as bytes
+
+    """
+    # Initialize key variables
+    items = []
+
+    # Create payloads
+    for (payload_id, payload) in payloads:
+        if isinstance(payload, bytes) is False:
+            payload = codec.encode(payload)
+        items.append(b''.join([
+            b'{', codec.encode(BATCH_PAYLOAD_KEYS[0]), b':',
+            codec.encode(payload_id), b',',
+            codec.encode(BATCH_PAYLOAD_KEYS[1]), b':', payload, b'}']))
+
+    # Return
+    result = b''.join([
+        b'{', codec.encode(BATCH_KEYS[0]), b':', codec.encode(agent_id), b',',
+        codec.encode(BATCH_KEYS[1]), b':[', b','.join(items), b']}'])
+    return result
+
+
+def batch_to_payloads(_data):
+    """Extract cached data from a batch posted to the pattoo API.
+
+    Args:
+        _data: Batch data received by the pattoo API
+
+    Returns:
+        result: List of (payload_id, cache data) tuples. Each cache data dict
+            can be processed with cache_to_keypairs. [] if invalid.
+
+    """
+    # Initialize key variables
+    result = []
+    _log_message = 'Invalid batch data.'
+
+    # Basic validation
+    if isinstance(_data, dict) is False:
+        log.log2warning(1203, _log_message)
+        return []
+    if sorted(_data.keys()) != sorted(BATCH_KEYS):
+        log.log2warning(1204, _log_message)
+        return []
+    if isinstance(_data['pattoo_payloads'], list) is False:
+        log.log2warning(1205, _log_message)
+        return []
+
+    # Process each payload
+    for item in _data['pattoo_payloads']:
+        if isinstance(item, dict) is False or sorted(
+                item.keys()) != sorted(BATCH_PAYLOAD_KEYS):
+            log.log2warning(1206, _log_message)
+            return []
+        result.append((item['pattoo_payload_id'], item['pattoo_payload']))
+
+    # Return
+    return result
+
+
+def batch_acknowledgement(payload_ids):
+    """Create the pattoo API response to a batch of posted cached data.
+
+    Args:
+        payload_ids: List of IDs of payloads that were successfully received
+
+    Returns:
+        result: Dict of acknowledged payload IDs
+
+    """
+    # Return
+    result = {BATCH_ACKNOWLEDGEMENT_KEY: list(payload_ids)}
+    return result
+
+
 def _make_pattoo_db_record(item):
     """Ingest data.
 
@@ -268,7 +444,7 @@ def datapoints_to_dicts(items):
     """Convert a list of DataPoint objects to a standardized dict for posting.
 
     Args:
-        items: List of datapoints to convert
+        items: List of DataPoint and DataPointBatch objects to convert
 
     Returns:
         result: Dict of 'key_value_pairs' and 'pattoo_datapoints' dicts
@@ -285,11 +461,16 @@ def datapoints_to_dicts(items):
     if isinstance(items, list) is False:
         items = [items]
     for item in items:
-        if isinstance(item, DataPoint):
+        if isinstance(item, (DataPoint, DataPointBatch)):
             datapoints.append(item)
 
     # Populate dict to get unique key-value pairs
     for datapoint in datapoints:
+        # Convert the columns of batches without creating DataPoints
+        if isinstance(datapoint, DataPointBatch) is True:
+            all_dps.extend(_batch_pairs(datapoint, counter))
+            continue
+
         # Only convert valid data
         if datapoint.valid is True:
             dp_pair_ids = []
@@ -322,6 +503,40 @@ def datapoints_to_dicts(items):
     return result
 
 
+def _batch_pairs(batch, counter):
+    """Get the key-value pair IDs of each DataPoint in a DataPointBatch.
+
+    Args:
+        batch: DataPointBatch object
+        counter: Counter object of the key-value pairs being posted
+
+    Returns:
+        result: List of lists of key-value pair IDs, one for each DataPoint
+
+    """
+    # Initialize key variables
+    result = []
+    if batch.valid is False:
+        return result
+
+    # Metadata is the same for all DataPoints
+    metadata = [
+        counter.counter(key, value) for key, value in batch.metadata.items()]
+
+    # Process columns
+    for key, value, timestamp, checksum in zip(
+            batch.keys, batch.values, batch.timestamps, batch.checksums()):
+        dp_pair_ids = list(metadata)
+        dp_pair_ids.extend([
+            counter.counter('pattoo_key', key),
+            counter.counter('pattoo_data_type', batch.data_type),
+            counter.counter('pattoo_value', value),
+            counter.counter('pattoo_timestamp', timestamp),
+            counter.counter('pattoo_checksum', checksum)])
+        result.append(dp_pair_ids)
+    return result
+
+
 def agentdata_to_post(agentdata):
     """Create data to post to the pattoo API.
 
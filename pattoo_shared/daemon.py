@@ -6,9 +6,13 @@ import signal
 import sys
 import os
 import time
+import threading
 
 # Pattoo imports
 from pattoo_shared import log
+from pattoo_shared import cache
+from pattoo_shared.configuration import Config
+from pattoo_shared.constants import DAEMON_SPILL_TIMEOUT, DAEMON_STOP_TIMEOUT
 
 
 class Daemon():
@@ -95,8 +99,10 @@ file and directory permissions.'''.format(daemon_log_file)
         os.dup2(f_handle_so.fileno(), sys.stdout.fileno())
         os.dup2(f_handle_se.fileno(), sys.stderr.fileno())
 
-        # write pidfile
+        # write pidfile. Save the retry queues when stopped.
         atexit.register(self.delpid)
+        if Config().agent_api_retry_queue() > 0:
+            signal.signal(signal.SIGTERM, _terminate)
         pid = str(os.getpid())
         with open(self.pidfile, 'w+') as f_handle:
             f_handle.write('{}\n'.format(pid))
@@ -220,6 +226,15 @@ file and directory permissions.'''.format(daemon_log_file)
                 ''.format(self.pidfile))
             log.log2die(1066, log_message)
 
+        # Wait for the daemon to exit so that it isn't left running without
+        # a PID file
+        if _wait(pid) is False:
+            log_message = (
+                'Daemon {} did not stop within {} seconds - PID file: {}'
+                ''.format(self.name, DAEMON_STOP_TIMEOUT, self.pidfile))
+            log.log2warning(1257, log_message)
+            return
+
         # Log success
         self.delpid()
         self.dellock()
@@ -423,3 +438,57 @@ def _pid(pidfile):
 
     # Return
     return result
+
+
+def _wait(pid, timeout=DAEMON_STOP_TIMEOUT):
+    """Wait for a process to exit.
+
+    Args:
+        pid: Process ID
+        timeout: Seconds to wait
+
+    Returns:
+        result: True if the process exited
+
+    """
+    # Initialize key variables
+    result = False
+    deadline = time.time() + timeout
+
+    # Wait
+    while time.time() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            result = True
+            break
+        except PermissionError:
+            # Running as another user
+            pass
+        time.sleep(0.1)
+    return result
+
+
+def _terminate(signum, frame):
+    """Save the retry queues, then stop when the daemon receives SIGTERM.
+
+    The queues are saved by another thread, as the signal may interrupt code
+    holding their locks. The daemon stops anyway if they can't be saved in
+    time.
+
+    Args:
+        signum: Signal number
+        frame: Current stack frame
+
+    Returns:
+        None
+
+    """
+    # Save queued data
+    thread = threading.Thread(target=cache.spill, daemon=True)
+    thread.start()
+    thread.join(DAEMON_SPILL_TIMEOUT)
+
+    # Stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.kill(os.getpid(), signal.SIGTERM)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Pattoo delta encoding of posted agent data.
+
+Agents and the pattoo API share a versioned dictionary of the key-value
+pairs of posted datapoints. Each post only contains the pairs the pattoo API
+hasn't received yet, and the positions of the others in the dictionary. The
+values and timestamps of datapoints change with each post, so they are
+posted with each datapoint instead of being added to the dictionary.
+
+"""
+
+# Standard imports
+import os
+import uuid
+import threading
+
+# Pattoo imports
+from pattoo_shared import log
+from pattoo_shared.constants import (
+    CACHE_KEYS, DELTA_KEYS, DELTA_DICTIONARY_KEYS, DELTA_DICTIONARY_SIZE)
+
+# Encoder objects keyed by process ID and identifier
+ENCODERS = {}
+ENCODERS_LOCK = threading.Lock()
+
+
+class Encoder():
+    """Delta encode the data posted by an agent."""
+
+    def __init__(self, size=DELTA_DICTIONARY_SIZE):
+        """Initialize the class.
+
+        Args:
+            size: Maximum number of key-value pairs in the dictionary. A new
+                dictionary is started when it would be exceeded.
+
+        Returns:
+            None
+
+        Variables:
+            self.dictionary_id: Unique ID of the dictionary
+            self.version: Number of key-value pairs in the dictionary
+
+        """
+        # Initialize key variables
+        self._size = size
+        self._pairs = {}
+        self._pending = {}
+        self.dictionary_id = None
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new, empty dictionary.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Reset
+        self.dictionary_id = uuid.uuid4().hex
+        self._pairs = {}
+        self._pending = {}
+        self.version = 0
+
+    def encode(self, _data):
+        """Delta encode data to post.
+
+        Key-value pairs that aren't in the dictionary are added to it when
+        commit() is called after the data is posted successfully.
+
+        Args:
+            _data: Dict of data to post created by
+                converter.posting_data_points
+
+        Returns:
+            result: Dict of delta encoded data
+
+        """
+        # Start a new dictionary if this one would become too large
+        result = self._encode(_data)
+        if self.version + len(self._pending) > self._size:
+            self.reset()
+            result = self._encode(_data)
+        return result
+
+    def commit(self):
+        """Add the key-value pairs of the last encoded data to the dictionary.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Commit
+        self._pairs.update(self._pending)
+        self.version = len(self._pairs)
+        self._pending = {}
+
+    def _encode(self, _data):
+        """Delta encode data to post using the current dictionary.
+
+        Args:
+            _data: Dict of data to post
+
+        Returns:
+            result: Dict of delta encoded data
+
+        """
+        # Initialize key variables
+        self._pending = {}
+        references = {}
+        datapoints = []
+        key_value_pairs = _data['pattoo_datapoints']['key_value_pairs']
+
+        # Get the dictionary position of each key-value pair. Values and
+        # timestamps are referenced by their key.
+        for pair_id, (key, value) in key_value_pairs.items():
+            if key in ['pattoo_value', 'pattoo_timestamp']:
+                references[pair_id] = key
+                continue
+            pair = (key, value)
+            index = self._pairs.get(pair)
+            if index is None:
+                index = self._pending.setdefault(
+                    pair, self.version + len(self._pending))
+            references[pair_id] = index
+
+        # Encode datapoints as [positions, value, timestamp]
+        for pair_ids in _data['pattoo_datapoints']['datapoint_pairs']:
+            item = [[], None, None]
+            for pair_id in pair_ids:
+                index = references[pair_id]
+                if index == 'pattoo_value':
+                    item[1] = key_value_pairs[pair_id][1]
+                elif index == 'pattoo_timestamp':
+                    item[2] = key_value_pairs[pair_id][1]
+                else:
+                    item[0].append(index)
+            datapoints.append(item)
+
+        # Return
+        result = {
+            'pattoo_agent_id': _data['pattoo_agent_id'],
+            'pattoo_agent_polling_interval': _data[
+                'pattoo_agent_polling_interval'],
+            'pattoo_agent_timestamp': _data['pattoo_agent_timestamp'],
+            'pattoo_dictionary': {
+                'pattoo_dictionary_id': self.dictionary_id,
+                'pattoo_dictionary_version': self.version,
+                'key_value_pairs': [
+                    list(pair) for pair in self._pending.keys()]},
+            'pattoo_datapoints': datapoints}
+        return result
+
+
+class Decoder():
+    """Decode delta encoded data posted by agents.
+
+    The dictionaries of the agents are kept in the memory of the process.
+    The pattoo API must therefore decode delta encoded posts in a single
+    worker process. With more workers, each post that reaches a worker
+    without the agent's dictionary gets HTTP 409, and the agent posts the
+    whole dictionary again.
+
+    """
+
+    def __init__(self):
+        """Initialize the class.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Dictionaries keyed by agent ID
+        self._dictionaries = {}
+        self._lock = threading.Lock()
+
+    def decode(self, _data):
+        """Decode delta encoded data posted by an agent.
+
+        Args:
+            _data: Dict of delta encoded data
+
+        Returns:
+            result: Dict of data that can be processed by
+                converter.cache_to_keypairs. None if the data is invalid or
+                is based on a dictionary the pattoo API doesn't have. The
+                agent must then post its dictionary again.
+
+        """
+        # Initialize key variables
+        result = None
+        _log_message = 'Invalid delta encoded data.'
+
+        # Basic validation
+        if isinstance(_data, dict) is False or sorted(
+                _data.keys()) != sorted(DELTA_KEYS):
+            log.log2warning(1248, _log_message)
+            return result
+        dictionary = _data['pattoo_dictionary']
+        if isinstance(dictionary, dict) is False or sorted(
+                dictionary.keys()) != sorted(DELTA_DICTIONARY_KEYS):
+            log.log2warning(1249, _log_message)
+            return result
+        version = dictionary['pattoo_dictionary_version']
+        if False in [
+                isinstance(version, int),
+                isinstance(version, bool) is False,
+                isinstance(_data['pattoo_agent_id'], str),
+                isinstance(dictionary['key_value_pairs'], list),
+                isinstance(_data['pattoo_datapoints'], list)]:
+            log.log2warning(1250, _log_message)
+            return result
+
+        # Get the key-value pairs of the dictionary. Pairs posted after the
+        # version the data is based on are replaced, as their post may not
+        # have been acknowledged.
+        index = _data['pattoo_agent_id']
+        with self._lock:
+            (dictionary_id, pairs) = self._dictionaries.get(index, (None, []))
+            if dictionary_id != dictionary['pattoo_dictionary_id']:
+                pairs = []
+            if version > len(pairs) or version < 0:
+                log_message = ('''\
+Delta encoded data from agent ID {} is based on unknown dictionary {} \
+version {}.'''.format(
+                    index, dictionary['pattoo_dictionary_id'], version))
+                log.log2info(1251, log_message)
+                return result
+            pairs = pairs[:version]
+            pairs.extend(dictionary['key_value_pairs'])
+            self._dictionaries[index] = (
+                dictionary['pattoo_dictionary_id'], pairs)
+
+        # Decode datapoints
+        datapoint_pairs = _decoded_pairs(_data['pattoo_datapoints'], pairs)
+        if datapoint_pairs is None:
+            log.log2warning(1252, _log_message)
+            return result
+
+        # Return
+        result = {
+            'pattoo_agent_id': _data['pattoo_agent_id'],
+            'pattoo_agent_polling_interval': _data[
+                'pattoo_agent_polling_interval'],
+            'pattoo_agent_timestamp': _data['pattoo_agent_timestamp'],
+            'pattoo_datapoints': datapoint_pairs}
+        return result
+
+
+def encoder(identifier):
+    """Get the Encoder object for the data posted by an identifier.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: Encoder object
+
+    """
+    # Initialize key variables
+    index = (os.getpid(), identifier)
+
+    # Create a new object for new identifiers
+    with ENCODERS_LOCK:
+        if index not in ENCODERS:
+            ENCODERS[index] = Encoder()
+        result = ENCODERS[index]
+    return result
+
+
+def encodable(_data):
+    """Determine whether data can be delta encoded.
+
+    Args:
+        _data: Data to post
+
+    Returns:
+        result: True if the data was created by
+            converter.posting_data_points
+
+    """
+    # Return
+    result = False
+    if isinstance(_data, dict) is False or sorted(
+            _data.keys()) != sorted(CACHE_KEYS):
+        return result
+    datapoints = _data['pattoo_datapoints']
+    if isinstance(datapoints, dict) is False:
+        return result
+    result = False not in [
+        isinstance(datapoints.get('key_value_pairs'), dict),
+        isinstance(datapoints.get('datapoint_pairs'), list)]
+    return result
+
+
+def _decoded_pairs(datapoints, pairs):
+    """Convert delta encoded datapoints to key-value pairs.
+
+    Args:
+        datapoints: List of delta encoded datapoints
+        pairs: List of the key-value pairs in the dictionary
+
+    Returns:
+        result: Dict of 'key_value_pairs' and 'datapoint_pairs'. None if
+            the datapoints are invalid.
+
+    """
+    # Initialize key variables
+    key_value_pairs = {}
+    ids = {}
+    datapoint_pairs = []
+
+    # Process each datapoint
+    for item in datapoints:
+        if isinstance(item, list) is False or len(item) != 3:
+            return None
+        (positions, value, timestamp) = item
+        if isinstance(positions, list) is False:
+            return None
+
+        # Assign an ID to each key-value pair. The IDs are strings, as they
+        # would be if the data was read from JSON.
+        pair_ids = []
+        items = [('pattoo_value', value), ('pattoo_timestamp', timestamp)]
+        for position in positions:
+            if isinstance(position, int) is False or (
+                    0 <= position < len(pairs)) is False:
+                return None
+            items.append(pairs[position])
+        for pair in items:
+            if isinstance(pair, (list, tuple)) is False or len(pair) != 2:
+                return None
+            try:
+                pair_ids.append(_pair_id(tuple(pair), ids, key_value_pairs))
+            except TypeError:
+                # Unhashable values
+                return None
+        datapoint_pairs.append(pair_ids)
+
+    # Return
+    result = {
+        'key_value_pairs': key_value_pairs,
+        'datapoint_pairs': datapoint_pairs}
+    return result
+
+
+def _pair_id(pair, ids, key_value_pairs):
+    """Get the ID of a key-value pair.
+
+    Args:
+        pair: Tuple of (key, value)
+        ids: Dict of IDs keyed by key-value pair
+        key_value_pairs: Dict of key-value pairs keyed by ID
+
+    Returns:
+        result: ID
+
+    """
+    # Return
+    result = ids.get(pair)
+    if result is None:
+        result = str(len(ids))
+        ids[pair] = result
+        key_value_pairs[result] = list(pair)
+    return result
@@ -4,7 +4,6 @@
 import os
 import time
 import sys
-import json
 import stat
 from random import random
 import subprocess
@@ -15,6 +14,7 @@ import yaml
 # Pattoo libraries
 from pattoo_shared import log
 from pattoo_shared import data
+from pattoo_shared import codec
 
 
 class _Directory():
@@ -344,8 +344,7 @@ def read_json_file(filepath, die=True):
     # Read file
     if filepath.endswith('.json'):
         try:
-            with open(filepath, 'r') as file_handle:
-                result = json.load(file_handle)
+            result = codec.read(filepath)
         except:
             log_message = ('''\
 Error reading file {}. Check permissions, existence and file syntax.\
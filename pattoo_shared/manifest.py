@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""Pattoo manifest of the cache files waiting to be purged."""
+
+# Standard imports
+import os
+import fcntl
+import threading
+import collections
+
+# Pattoo imports
+from pattoo_shared import log
+
+# Filename of the manifest journal
+_JOURNAL = 'manifest.log'
+
+# Journal records. Keys must not contain tabs or newlines. Digests are
+# optional.
+_ADD = '+\t{}\t{}\n'
+_ADD_DIGEST = '+\t{}\t{}\t{}\n'
+_REMOVE = '-\t{}\n'
+
+# Minimum number of removed keys in the journal before it is compacted
+_COMPACT_MINIMUM = 1000
+
+
+class Manifest():
+    """Ordered record of the keys, sizes and digests of pending cache files.
+
+    The manifest is an append-only journal of added and removed keys kept in
+    the cache directory, so that the pending files can be found after a
+    restart without listing the cache directory or reading the files. Keys
+    are returned in the order they were added. Journal records are appended
+    atomically, so several processes may share a manifest. The journal is
+    compacted once most of its records are for removed keys.
+
+    """
+
+    def __init__(self, directory):
+        """Initialize the class.
+
+        Args:
+            directory: Directory for the journal
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._directory = directory
+        self._filepath = os.path.join(directory, _JOURNAL)
+        self._lock = threading.RLock()
+
+        # Pending keys and sizes, the keys of digests, the total size, and
+        # the number of removals in the journal
+        self._pending = collections.OrderedDict()
+        self._digests = {}
+        self._size = 0
+        self._removals = 0
+
+        # Journal being read and its read offset
+        self._fd = None
+        self._offset = 0
+
+        # Read the journal
+        os.makedirs(directory, mode=0o750, exist_ok=True)
+        self.exists = os.path.isfile(self._filepath)
+        with self._lock:
+            self._refresh()
+
+    def add(self, key, size, digest=None):
+        """Add a key, or update its size.
+
+        Args:
+            key: Key
+            size: Size in bytes
+            digest: Digest of the data of the key. None if unknown.
+
+        Returns:
+            None
+
+        """
+        # Append
+        with self._lock:
+            self._append(_record(key, size, digest))
+            self._add(key, size, digest)
+
+    def remove(self, keys):
+        """Remove keys.
+
+        Args:
+            keys: List of keys
+
+        Returns:
+            None
+
+        """
+        # Append
+        with self._lock:
+            keys = [key for key in keys if key in self._pending]
+            if bool(keys) is True:
+                self._append(''.join(_REMOVE.format(key) for key in keys))
+                for key in keys:
+                    self._remove(key)
+
+    def items(self):
+        """Get the pending keys.
+
+        Args:
+            None
+
+        Returns:
+            result: List of (key, size) tuples in the order they were added
+
+        """
+        # Return
+        with self._lock:
+            self._refresh()
+            result = [
+                (key, size) for (key, (size, _)) in self._pending.items()]
+        return result
+
+    def contains(self, digest):
+        """Determine whether a pending key has a digest.
+
+        Args:
+            digest: Digest
+
+        Returns:
+            result: True if a pending key has the digest
+
+        """
+        # Return
+        with self._lock:
+            self._refresh()
+            result = digest in self._digests
+        return result
+
+    def size(self):
+        """Get the total size of the pending keys.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Return
+        with self._lock:
+            self._refresh()
+            result = self._size
+        return result
+
+    def count(self):
+        """Get the number of pending keys.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of keys
+
+        """
+        # Return
+        with self._lock:
+            self._refresh()
+            result = len(self._pending)
+        return result
+
+    def rebuild(self, items):
+        """Replace the journal with a list of keys.
+
+        Args:
+            items: List of (key, size) or (key, size, digest) tuples, oldest
+                first
+
+        Returns:
+            None
+
+        """
+        # Write
+        with self._lock:
+            self._write(items)
+
+    def compact(self):
+        """Rewrite the journal without removed keys if most are removed.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Write
+        with self._lock:
+            self._refresh()
+            if self._removals >= max(_COMPACT_MINIMUM, len(self._pending)):
+                self._write()
+
+    def close(self):
+        """Close the journal.
+
+        The journal is read again when the manifest is next used.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        with self._lock:
+            self._close()
+
+    def __del__(self):
+        """Close the journal when the manifest is garbage collected.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        if getattr(self, '_fd', None) is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _write(self, items=None):
+        """Replace the journal.
+
+        Processes appending to the journal wait until it has been replaced.
+
+        Args:
+            items: List of (key, size) or (key, size, digest) tuples to
+                write. The pending keys are written if None.
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        temp_filepath = '{}.{}.tmp'.format(self._filepath, os.getpid())
+
+        with open(self._filepath, 'a') as f_handle:
+            fcntl.flock(f_handle, fcntl.LOCK_EX)
+
+            # Get the keys, including any appended by other processes
+            if items is None:
+                self._refresh()
+                items = [
+                    (key, size, digest)
+                    for (key, (size, digest)) in self._pending.items()]
+            self._pending = collections.OrderedDict()
+            self._digests = {}
+            self._size = 0
+            for item in items:
+                self._add(*item)
+
+            # Write to a temporary file then replace the journal
+            journal = ''.join(_record(*item) for item in items).encode()
+            with open(temp_filepath, 'wb') as t_handle:
+                t_handle.write(journal)
+            os.replace(temp_filepath, self._filepath)
+
+            # Read the new journal from its end
+            self._close()
+            self._fd = os.open(self._filepath, os.O_RDONLY)
+            self._offset = len(journal)
+            self._removals = 0
+            self.exists = True
+
+    def _append(self, records):
+        """Append records to the journal.
+
+        Args:
+            records: Records as a string
+
+        Returns:
+            None
+
+        """
+        # Retry if another process replaced the journal while waiting
+        while True:
+            f_descriptor = os.open(
+                self._filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o640)
+            try:
+                fcntl.flock(f_descriptor, fcntl.LOCK_SH)
+                if _replaced(f_descriptor, self._filepath) is False:
+                    os.write(f_descriptor, records.encode())
+                    break
+            finally:
+                os.close(f_descriptor)
+
+        # Skip our own records when reading the journal, unless other
+        # processes have appended records since it was last read
+        if self._fd is not None and os.fstat(
+                self._fd).st_size == self._offset + len(records.encode()):
+            self._offset += len(records.encode())
+        self.exists = True
+
+    def _refresh(self):
+        """Read records appended to the journal since it was last read.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Start again if the journal was replaced by another process
+        if self._fd is None or _replaced(self._fd, self._filepath) is True:
+            self._close()
+            self._pending = collections.OrderedDict()
+            self._digests = {}
+            self._size = 0
+            self._removals = 0
+            try:
+                self._fd = os.open(self._filepath, os.O_RDONLY)
+            except FileNotFoundError:
+                return
+
+        # Read new complete records. Incomplete records are left unread.
+        data = os.pread(
+            self._fd, os.fstat(self._fd).st_size - self._offset,
+            self._offset)
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        for line in data[:end].decode(errors='replace').splitlines():
+            fields = line.split('\t')
+            try:
+                if fields[0] == '+' and len(fields) in [3, 4]:
+                    self._add(fields[1], int(fields[2]), *fields[3:])
+                    continue
+                if fields[0] == '-' and len(fields) == 2:
+                    self._remove(fields[1])
+                    continue
+            except ValueError:
+                pass
+            log_message = ('''\
+Invalid record "{}" in cache manifest {}. Skipping.\
+'''.format(line, self._filepath))
+            log.log2warning(1243, log_message)
+
+    def _add(self, key, size, digest=None):
+        """Add a key to the pending keys.
+
+        Args:
+            key: Key
+            size: Size in bytes
+            digest: Digest of the data of the key. None if unknown.
+
+        Returns:
+            None
+
+        """
+        # Replace any previous size and digest of the key in place
+        (previous, _digest) = self._pending.get(key, (0, None))
+        if self._digests.get(_digest) == key:
+            del self._digests[_digest]
+
+        # Add
+        self._size += size - previous
+        self._pending[key] = (size, digest)
+        if digest is not None:
+            self._digests[digest] = key
+
+    def _remove(self, key):
+        """Remove a key from the pending keys.
+
+        Args:
+            key: Key
+
+        Returns:
+            None
+
+        """
+        # Remove
+        self._removals += 1
+        (size, digest) = self._pending.pop(key, (0, None))
+        self._size -= size
+        if self._digests.get(digest) == key:
+            del self._digests[digest]
+
+    def _close(self):
+        """Close the journal being read.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._offset = 0
+
+
+def _replaced(f_descriptor, filepath):
+    """Determine whether an open file has been replaced or deleted.
+
+    Args:
+        f_descriptor: File descriptor
+        filepath: Path the file was opened with
+
+    Returns:
+        result: True if the path no longer refers to the open file
+
+    """
+    # Compare inodes
+    try:
+        result = os.stat(filepath).st_ino != os.fstat(f_descriptor).st_ino
+    except FileNotFoundError:
+        result = True
+    return result
+
+
+def _record(key, size, digest=None):
+    """Create the journal record of an added key.
+
+    Args:
+        key: Key
+        size: Size in bytes
+        digest: Digest of the data of the key. None if unknown.
+
+    Returns:
+        result: Record as a string
+
+    """
+    # Return
+    if digest is None:
+        result = _ADD.format(key, size)
+    else:
+        result = _ADD_DIGEST.format(key, size, digest)
+    return result
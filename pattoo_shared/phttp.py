@@ -5,18 +5,30 @@
 import os
 import sys
 import json
-import urllib
+import random
+import email.utils
 import collections
-from time import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import time, monotonic, sleep
+from urllib.parse import urlsplit
 
 # pip3 libraries
 import requests
+from requests.adapters import HTTPAdapter
 
 # Pattoo libraries
 from pattoo_shared import log
 from pattoo_shared.configuration import Config
 from pattoo_shared import converter
 from pattoo_shared import encrypt
+from pattoo_shared import compress
+from pattoo_shared import codec
+from pattoo_shared import cache
+from pattoo_shared import delta
+from pattoo_shared.constants import BATCH_ACKNOWLEDGEMENT_KEY
+from pattoo_shared.constants import IDEMPOTENCY_KEY_HEADER
 
 # Save items needed for encrypted purging inside a named tuple
 EncryptionSuite = collections.namedtuple(
@@ -31,6 +43,378 @@ _EncrypedPost = collections.namedtuple(
     '_EncrypedPost',
     'encryption session symmetric_key encryption_url data identifier')
 
+# Validated encrypted sessions for reuse between posts
+EncryptedSession = collections.namedtuple(
+    'EncryptedSession', 'session symmetric_key expiry')
+
+# EncryptedSession objects keyed by process ID, identifier and agent email.
+# SESSION_LOCKS has a lock for each key so that agents don't wait for each
+# other's key exchanges.
+SESSIONS = {}
+SESSION_LOCKS = {}
+SESSIONS_LOCK = threading.Lock()
+
+# Process-wide Transport objects keyed by process ID. Connection pools must
+# not be shared between a parent and its forked children.
+TRANSPORT = {}
+
+# CircuitBreaker objects keyed by process ID and API server endpoint
+BREAKERS = {}
+BREAKERS_LOCK = threading.Lock()
+
+# HTTP status codes of temporary server conditions worth retrying
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# HTTP status codes of encrypted sessions the API server doesn't accept
+REJECTED_STATUS_CODES = (401, 403)
+
+
+class Transport():
+    """Pooled, persistent HTTP connections to the pattoo API server."""
+
+    def __init__(self, pool_size=10, keep_alive=True):
+        """Initialize the class.
+
+        Args:
+            pool_size: Maximum number of connections kept open per host
+            keep_alive: Reuse connections between requests if True
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.pool_size = pool_size
+        self.keep_alive = bool(keep_alive)
+
+        # All sessions created by this object share this connection pool
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session = self.session()
+
+    def session(self):
+        """Create a requests Session that uses the shared connection pool.
+
+        Sessions are needed where cookies must be kept separate for each
+        agent, such as during encryption key exchanges. Closing the session
+        would close the shared pool, so it should simply be discarded.
+
+        Args:
+            None
+
+        Returns:
+            result: requests.Session object
+
+        """
+        # Mount the shared adapter
+        result = requests.Session()
+        result.mount('http://', self._adapter)
+        result.mount('https://', self._adapter)
+
+        # Ask the server to close the connection after each request
+        if self.keep_alive is False:
+            result.headers['Connection'] = 'close'
+        return result
+
+    def post(self, url, **kwargs):
+        """Post to a URL using a pooled connection.
+
+        Args:
+            url: URL to post to
+            kwargs: Keyword arguments for requests.Session.post
+
+        Returns:
+            result: requests.Response object
+
+        """
+        # Return
+        result = self._session.post(url, **kwargs)
+        return result
+
+    def get(self, url, **kwargs):
+        """Get a URL using a pooled connection.
+
+        Args:
+            url: URL to get
+            kwargs: Keyword arguments for requests.Session.get
+
+        Returns:
+            result: requests.Response object
+
+        """
+        # Return
+        result = self._session.get(url, **kwargs)
+        return result
+
+    def close(self):
+        """Close all pooled connections.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        self._session.close()
+
+
+class RateLimiter():
+    """Limit the rate at which threads make requests."""
+
+    def __init__(self, rate=0):
+        """Initialize the class.
+
+        Args:
+            rate: Maximum number of requests per second. 0 is unlimited.
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.rate = rate
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Wait until the next request can be made.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Don't wait if unlimited
+        if self.rate <= 0:
+            return
+
+        # Reserve the next available time slot
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next)
+            self._next = start + 1 / self.rate
+
+        # Wait for the time slot
+        if start > now:
+            sleep(start - now)
+
+
+class CircuitBreaker():
+    """Stop making requests to an API server endpoint that keeps failing.
+
+    The circuit opens after a number of consecutive failures and no requests
+    are made until its timeout expires. A single probe request is then
+    allowed. The circuit closes if the probe succeeds and opens again if it
+    fails. A Retry-After delay sent by the server keeps the circuit open for
+    at least that long.
+
+    """
+
+    def __init__(self, threshold=5, timeout=60):
+        """Initialize the class.
+
+        Args:
+            threshold: Number of consecutive failures that open the circuit.
+                0 never opens it.
+            timeout: Seconds the circuit stays open
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.threshold = threshold
+        self.timeout = timeout
+        self._failures = 0
+        self._until = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def blocked(self):
+        """Determine whether requests are currently refused.
+
+        Args:
+            None
+
+        Returns:
+            result: True if the circuit is open or a probe is in progress
+
+        """
+        # Return
+        with self._lock:
+            result = (
+                monotonic() < self._until or (
+                    self._tripped() is True and self._probing is True))
+        return result
+
+    def allow(self):
+        """Determine whether a request can be made.
+
+        Only one caller at a time is allowed to probe an open circuit whose
+        timeout has expired.
+
+        Args:
+            None
+
+        Returns:
+            result: True if the request can be made
+
+        """
+        # Initialize key variables
+        result = False
+
+        with self._lock:
+            # Refuse requests while open
+            if monotonic() < self._until:
+                return result
+
+            # Allow a single probe once the timeout expires
+            if self._tripped() is True:
+                if self._probing is False:
+                    self._probing = True
+                    result = True
+            else:
+                result = True
+        return result
+
+    def success(self):
+        """Record a successful request and close the circuit.
+
+        Args:
+            None
+
+        Returns:
+            result: True if the circuit was open
+
+        """
+        # Close circuit
+        with self._lock:
+            result = self._tripped()
+            self._failures = 0
+            self._until = 0
+            self._probing = False
+        return result
+
+    def failure(self, retry_after=None):
+        """Record a failed request.
+
+        Args:
+            retry_after: Seconds the server asked us to wait before making
+                another request. None if it didn't ask.
+
+        Returns:
+            result: Seconds the circuit will stay open. 0 if it is closed.
+
+        """
+        # Initialize key variables
+        result = 0
+
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+
+            # Open the circuit. Jitter keeps agents from probing in unison
+            if self._tripped() is True:
+                result = backoff(0, self.timeout, self.timeout)
+
+            # Honor the server's request to wait
+            if retry_after is not None:
+                result = max(result, retry_after)
+            if result > 0:
+                self._until = monotonic() + result
+        return result
+
+    def _tripped(self):
+        """Determine whether there have been too many consecutive failures.
+
+        Args:
+            None
+
+        Returns:
+            result: True if the threshold has been reached
+
+        """
+        # Return
+        result = self.threshold > 0 and self._failures >= self.threshold
+        return result
+
+
+def transport():
+    """Get the Transport object shared by all posts made by this process.
+
+    Args:
+        None
+
+    Returns:
+        result: Transport object
+
+    """
+    # Initialize key variables
+    pid = os.getpid()
+
+    # Create a new object for new processes
+    if pid not in TRANSPORT:
+        # Connections inherited from a parent process must not be reused
+        TRANSPORT.clear()
+        config = Config()
+        TRANSPORT[pid] = Transport(
+            pool_size=config.agent_api_pool_size(),
+            keep_alive=config.agent_api_keep_alive())
+
+    # Return
+    result = TRANSPORT[pid]
+    return result
+
+
+def breaker(url):
+    """Get the CircuitBreaker object for the API server endpoint of a URL.
+
+    Args:
+        url: URL
+
+    Returns:
+        result: CircuitBreaker object
+
+    """
+    # Initialize key variables
+    parts = urlsplit(url)
+    index = (os.getpid(), parts.scheme, parts.netloc)
+
+    # Create a new object for new endpoints
+    with BREAKERS_LOCK:
+        if index not in BREAKERS:
+            config = Config()
+            BREAKERS[index] = CircuitBreaker(
+                threshold=config.agent_api_breaker_threshold(),
+                timeout=config.agent_api_breaker_timeout())
+        result = BREAKERS[index]
+    return result
+
+
+def backoff(attempt, base, maximum):
+    """Get the time to wait before retrying a failed request.
+
+    The wait doubles with each attempt up to a maximum. Half of it is
+    random so that agents don't retry in unison.
+
+    Args:
+        attempt: Number of previous retries
+        base: Seconds to wait before the first retry
+        maximum: Maximum number of seconds to wait
+
+    Returns:
+        result: Seconds to wait
+
+    """
+    # Return
+    delay = min(maximum, base * (2 ** attempt))
+    result = (delay / 2) + random.uniform(0, delay / 2)
+    return result
+
 
 class _Post():
     """Abstract class to prepare data for posting to remote pattoo server."""
@@ -76,6 +460,21 @@ class _Post():
         """
         pass
 
+    def drain(self):
+        """Purge cached data in a background thread if there is any.
+
+        Args:
+            None
+
+        Returns:
+            result: threading.Thread object purging the cache. None if the
+                cache is empty or is already being purged.
+
+        """
+        # Return
+        result = cache.watcher(self._identifier).drain(self.purge)
+        return result
+
 
 class Post(_Post):
     """Class to prepare data for posting to remote pattoo server."""
@@ -109,9 +508,15 @@ class Post(_Post):
         # Initialize key variables
         success = False
 
-        # Post data
+        # Post data. Delta encode it if configured.
         if bool(self._data) is True:
-            success = post(self._url, self._data, self._identifier)
+            if self.config.agent_api_delta_encoding() is True and (
+                    delta.encodable(self._data) is True):
+                success = post_delta(
+                    self.config.agent_api_delta_url(self._identifier),
+                    self._data, self._identifier)
+            else:
+                success = post(self._url, self._data, self._identifier)
         else:
             log_message = ('''\
 Blank data. No data to post from identifier {}.'''.format(self._identifier))
@@ -129,8 +534,17 @@ Blank data. No data to post from identifier {}.'''.format(self._identifier))
             None
 
         """
-        # Initialize key variables
-        purge(self._url, self._identifier)
+        # Don't read the cache unless it has data to purge
+        if cache.watcher(self._identifier).backlog() is False:
+            return
+
+        # Post batches of cached data if configured
+        if self.config.agent_api_batch_size() > 1:
+            purge_batch(
+                self.config.agent_api_batch_url(self._identifier),
+                self._identifier)
+        else:
+            purge(self._url, self._identifier)
 
 
 class EncryptedPost(_Post):
@@ -198,38 +612,24 @@ class EncryptedPost(_Post):
             None
 
         """
-        # Initialize key variables
-        success = False
-        key = encrypt.generate_key(20)
-
-        # Create a session and post data
-        with requests.Session() as session:
-            # Turn off HTTP Persistent connection
-            session.keep_alive = False
-
-            # Exchange keys
-            success = key_exchange(
-                _KeyExchange(
-                    encryption=self._encryption,
-                    session=session,
-                    key_exchange_url=self.config.agent_api_key_url(),
-                    symmetric_key_url=self.config.agent_api_validation_url(),
-                    symmetric_key=key
-                )
-            )
+        # Don't exchange keys with a failing API server, or when the cache
+        # has no data to purge
+        url = self.config.agent_api_encrypted_url()
+        if breaker(url).blocked() is True or (
+                cache.watcher(self._identifier).backlog() is False):
+            return
 
         # Purge data, encrypt and send to API
-        if success is True:
-            purge(
-                self.config.agent_api_encrypted_url(),
+        if self._session() is None:
+            return
+        if self.config.agent_api_batch_size() > 1:
+            purge_batch(
+                self.config.agent_api_encrypted_batch_url(),
                 self._identifier,
-                suite=EncryptionSuite(
-                    encrypted_post=encrypted_post,
-                    encryption=self._encryption,
-                    symmetric_key=key,
-                    session=session
-                )
+                suite=self._post_batch
             )
+        else:
+            purge(url, self._identifier, suite=self._post)
 
     def post(self):
         """Send encrypted data to the API server.
@@ -243,15 +643,155 @@ class EncryptedPost(_Post):
         """
         # Initialize key variables
         success = False
-        key = encrypt.generate_key(20)
 
-        # Create a session and post data
-        with requests.Session() as session:
-            # Turn off HTTP Persistent connection
-            session.keep_alive = False
+        # Post data
+        if bool(self._data) is True:
+            success = self._post(
+                self.config.agent_api_encrypted_url(),
+                self._data,
+                self._identifier
+            )
+
+        else:
+            log_message = '''\
+Blank data. No data to post from identifier {}.'''.format(self._identifier)
+            log.log2warning(1056, log_message)
+
+        return success
+
+    def _post(self, url, data, identifier, save=True):
+        """Post encrypted data using the cached encrypted session.
+
+        Args:
+            url: URL to receive posted data
+            data: Data dict to post, or its JSON as bytes
+            identifier: Unique identifier for the source of the data.
+            save: When True, save data to cache directory if posting fails
+
+        Returns:
+            success: True if data was posted successfully
+
+        """
+        # Return
+        response = self._send(url, data, identifier, save=save)
+        success = response is not None and response.status_code == 202
+        return success
+
+    def _post_batch(self, url, payloads, identifier):
+        """Post an encrypted batch of cached data.
+
+        Args:
+            url: URL to receive the batch
+            payloads: List of (payload_id, cache data as JSON bytes) tuples
+            identifier: Unique identifier for the source of the data.
+
+        Returns:
+            result: List of payload IDs acknowledged by the API server
+
+        """
+        # Return
+        response = self._send(
+            url, converter.encode_batch(identifier, payloads),
+            identifier, save=False)
+        result = _acknowledged(response, payloads, 202)
+        return result
+
+    def _send(self, url, data, identifier, save=True):
+        """Post encrypted data using the cached encrypted session.
+
+        The session is renewed with a new key exchange if the API server
+        rejects it with HTTP 401 or 403.
+
+        Args:
+            url: URL to receive posted data
+            data: Data dict to post, or its JSON as bytes
+            identifier: Unique identifier for the source of the data.
+            save: When True, save data to cache directory if posting fails
+
+        Returns:
+            response: requests.Response object. None if there was no response
+
+        """
+        # Initialize key variables
+        response = None
+        session = None
+        circuit = breaker(url)
+
+        for _ in range(2):
+            # Don't exchange keys with a failing API server
+            if circuit.blocked() is True:
+                if save is True:
+                    _save_data(data, identifier)
+                break
+
+            # Return if exchange failed
+            session = self._session(rejected=session)
+            if session is None:
+                circuit.failure()
+                if save is True:
+                    _save_data(data, identifier)
+                break
+
+            # Post data
+            response = _encrypted_post(
+                _EncrypedPost(
+                    encryption=self._encryption,
+                    session=session.session,
+                    symmetric_key=session.symmetric_key,
+                    encryption_url=url,
+                    data=data,
+                    identifier=identifier
+                ),
+                save=save
+            )
+
+            # Stop unless the API server rejected the session
+            if response is None:
+                break
+            status = response.status_code
+            if status not in REJECTED_STATUS_CODES:
+                break
+            log_message = '''\
+Encrypted session for identifier {} rejected by API server. Status: {}. \
+Renewing.'''.format(identifier, status)
+            log.log2info(1202, log_message)
+
+        # Return
+        return response
+
+    def _session(self, rejected=None):
+        """Get the cached encrypted session or exchange keys for a new one.
+
+        Args:
+            rejected: EncryptedSession object rejected by the API server. It
+                is replaced if it is still cached.
+
+        Returns:
+            result: EncryptedSession object. None if the key exchange failed
+
+        """
+        # Initialize key variables
+        index = (os.getpid(), self._identifier, self._encryption.email)
+        with SESSIONS_LOCK:
+            lock = SESSION_LOCKS.setdefault(index, threading.Lock())
+
+        # Only one thread at a time may exchange keys for the agent
+        with lock:
+            # Use the cached session if it hasn't expired
+            now = time()
+            with SESSIONS_LOCK:
+                result = SESSIONS.get(index)
+                if result is not None and result is not rejected:
+                    if result.expiry > now:
+                        return result
+                SESSIONS.pop(index, None)
+
+            # Create a session that uses the shared connection pool
+            key = encrypt.generate_key(20)
+            session = transport().session()
 
             # Exchange keys
-            result = key_exchange(
+            success = key_exchange(
                 _KeyExchange(
                     encryption=self._encryption,
                     session=session,
@@ -260,29 +800,17 @@ class EncryptedPost(_Post):
                     symmetric_key=key
                 )
             )
-            # Return if exchange failed
-            if result is False:
-                return success
-
-            # Post data
-            if bool(self._data) is True:
-                success = encrypted_post(
-                    _EncrypedPost(
-                        encryption=self._encryption,
-                        session=session,
-                        symmetric_key=key,
-                        encryption_url=self.config.agent_api_encrypted_url(),
-                        data=self._data,
-                        identifier=self._identifier
-                    )
-                )
-
-            else:
-                log_message = '''\
-Blank data. No data to post from identifier {}.'''.format(self._identifier)
-                log.log2warning(1056, log_message)
-
-        return success
+            if success is False:
+                return None
+
+            # Cache session
+            ttl = self.config.agent_api_session_ttl()
+            result = EncryptedSession(
+                session=session, symmetric_key=key, expiry=now + ttl)
+            if ttl > 0:
+                with SESSIONS_LOCK:
+                    SESSIONS[index] = result
+        return result
 
 
 class PostAgent(Post):
@@ -367,135 +895,524 @@ class PassiveAgent():
         self._identifier = identifier
         self._agent_program = agent_program
 
-    def relay(self):
+        # Validators of the last data retrieved, for conditional requests
+        self._etag = None
+        self._last_modified = None
+
+    def url(self):
+        """Get the URL of the passive Pattoo agent.
+
+        Args:
+            None
+
+        Returns:
+            result: URL
+
+        """
+        # Return
+        result = self._url
+        return result
+
+    def relay(self, timeout=None):
         """Forward data polled from remote pattoo passive agent.
 
         Args:
+            timeout: Seconds to wait for the passive agent to respond. None
+                waits indefinitely.
+
+        Returns:
+            None
+
+        """
+        # Get data
+        data = self.get(timeout=timeout)
+        identifier = self._identifier
+
+        # Post data
+        if bool(data) is True:
+            # Log message that ties the identifier to an agent_program
+            _log(self._agent_program, identifier)
+
+            # Post to remote server
+            server = Post(identifier, data)
+            success = server.post()
+
+            # Purge cache in the background if success is True
+            if success is True:
+                server.drain()
+
+    def get(self, timeout=None):
+        """Get JSON from remote URL.
+
+        Conditional requests are made so that the passive agent only returns
+        data that has changed since it was last retrieved.
+
+        Args:
+            timeout: Seconds to wait for the passive agent to respond. None
+                waits indefinitely.
+
+        Returns:
+            result: dict of JSON retrieved. Empty if the data is unchanged.
+
+        """
+        # Initialize key variables
+        result = {}
+        url = self._url
+        headers = {}
+
+        # Only get data that has changed
+        if self._etag is not None:
+            headers['If-None-Match'] = self._etag
+        if self._last_modified is not None:
+            headers['If-Modified-Since'] = self._last_modified
+
+        # Get URL
+        try:
+            response = transport().get(url, headers=headers, timeout=timeout)
+        except:
+            # Most likely no connectivity or the TCP port is unavailable
+            (etype, evalue, etraceback) = sys.exc_info()
+            log_message = (
+                'Error contacting URL {}: [{}, {}, {}]'
+                ''.format(url, etype, evalue, etraceback))
+            log.log2info(1186, log_message)
+            return result
+
+        # Check response
+        if response.status_code == 304:
+            log_message = 'Data from URL {} is unchanged'.format(url)
+            log.log2debug(1222, log_message)
+            return result
+        if response.status_code != 200:
+            log_message = 'HTTP {} error from URL {}'.format(
+                response.status_code, url)
+            log.log2info(1223, log_message)
+            return result
+
+        # Read data
+        try:
+            result = codec.decode(response.content)
+        except:
+            (etype, evalue, etraceback) = sys.exc_info()
+            log_message = (
+                'Error reading JSON from URL {}: [{}, {}, {}]'
+                ''.format(url, etype, evalue, etraceback))
+            log.log2info(1008, log_message)
+            return {}
+
+        # Save validators for the next request
+        self._etag = response.headers.get('ETag')
+        self._last_modified = response.headers.get('Last-Modified')
+
+        # Return
+        return result
+
+
+class PassiveAgentPool():
+    """Relays data from many passive Pattoo Agents concurrently."""
+
+    def __init__(self, agents=None, workers=None, timeout=10):
+        """Initialize the class.
+
+        Args:
+            agents: List of PassiveAgent objects
+            workers: Number of passive agents polled at the same time. The
+                default is the pool_size of the shared connection pool.
+            timeout: Seconds to wait for each passive agent to respond
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.timeout = timeout
+        if workers is None:
+            workers = Config().agent_api_pool_size()
+        self.workers = workers
+
+        # PassiveAgent objects keyed by URL
+        self._agents = collections.OrderedDict()
+        if agents is not None:
+            for agent in agents:
+                self.add(agent)
+
+    def add(self, agent):
+        """Add a passive agent to the pool.
+
+        Agents whose URL is already in the pool are ignored so that the
+        existing agent keeps the validators needed for conditional requests.
+
+        Args:
+            agent: PassiveAgent object
+
+        Returns:
+            None
+
+        """
+        # Add
+        if agent.url() not in self._agents:
+            self._agents[agent.url()] = agent
+
+    def agents(self):
+        """Get the passive agents in the pool.
+
+        Args:
+            None
+
+        Returns:
+            result: List of PassiveAgent objects
+
+        """
+        # Return
+        result = list(self._agents.values())
+        return result
+
+    def relay(self):
+        """Forward data polled from all the passive agents in the pool.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Relay
+        _run(self.workers, self._relay, self.agents())
+
+    def _relay(self, agent):
+        """Forward data polled from a passive agent.
+
+        Args:
+            agent: PassiveAgent object
+
+        Returns:
             None
 
-        Returns:
-            None
+        """
+        # Don't let one passive agent stop the others from being relayed
+        try:
+            agent.relay(timeout=self.timeout)
+        except:
+            _exception = sys.exc_info()
+            log_message = 'Relay failure for URL {}'.format(agent.url())
+            log.log2exception(1224, _exception, message=log_message)
+
+
+def post(url, data, identifier, save=True):
+    """Post data to central server.
+
+    Args:
+        url: URL to receive posted data
+        identifier: Unique identifier for the source of the data. (AgentID)
+        data: Data dict to post, or its JSON as bytes when purging the cache
+        save: When True, save data to cache directory if posting fails
+
+    Returns:
+        success: True: if successful
+
+    """
+    # Initialize key variables
+    success = False
+
+    # Fail if nothing to post
+    if isinstance(data, (dict, bytes)) is False or bool(data) is False:
+        return success
+
+    # Convert the data to JSON once. The same bytes are posted and cached.
+    payload = _payload(data)
+
+    # Post data
+    (body, headers) = _body(payload, payload=payload)
+    response = _request(
+        url, lambda: transport().post(url, data=body, headers=headers),
+        'Data posting failure')
+
+    # Define success
+    if response is not None:
+        if response.status_code == 200:
+            success = True
+        else:
+            log_message = ('''\
+HTTP {} error for identifier "{}" posted to server {}\
+'''.format(response.status_code, identifier, url))
+            log.log2warning(1017, log_message)
+
+    # Save data to cache if this fails
+    if success is False and save is True:
+        _save_data(payload, identifier)
+
+    # Log message
+    if success is True:
+        log_message = ('''\
+Data for identifier "{}" posted to server {}\
+'''.format(identifier, url))
+        log.log2debug(1027, log_message)
+    else:
+        log_message = ('''\
+Data for identifier "{}" failed to post to server {}\
+'''.format(identifier, url))
+        log.log2warning(1028, log_message)
+
+    # Return
+    return success
+
+
+def post_delta(url, data, identifier, save=True):
+    """Post delta encoded data to central server.
+
+    The dictionary of key-value pairs shared with the API server is posted
+    again if the API server responds with HTTP 409.
+
+    Args:
+        url: URL to receive delta encoded data
+        data: Data dict to post created by converter.posting_data_points
+        identifier: Unique identifier for the source of the data. (AgentID)
+        save: When True, save data to cache directory if posting fails. The
+            data is cached without delta encoding.
+
+    Returns:
+        success: True: if successful
+
+    """
+    # Initialize key variables
+    success = False
+    encoder = delta.encoder(identifier)
+    response = None
+
+    for _ in range(2):
+        # Post data
+        payload = codec.encode(encoder.encode(data))
+        (body, headers) = _body(payload, payload=payload)
+        response = _request(
+            url, lambda: transport().post(url, data=body, headers=headers),
+            'Data posting failure')
+
+        # Post the whole dictionary again if the API server doesn't have it
+        if response is None or response.status_code != 409:
+            break
+        log_message = ('''\
+Dictionary {} for identifier "{}" unknown to server {}. Posting it again.\
+'''.format(encoder.dictionary_id, identifier, url))
+        log.log2info(1253, log_message)
+        encoder.reset()
+
+    # Define success
+    if response is not None:
+        if response.status_code == 200:
+            success = True
+            encoder.commit()
+        else:
+            log_message = ('''\
+HTTP {} error for identifier "{}" posted to server {}\
+'''.format(response.status_code, identifier, url))
+            log.log2warning(1254, log_message)
+
+    # Save data to cache if this fails
+    if success is False and save is True:
+        _save_data(data, identifier)
+
+    # Log message
+    if success is True:
+        log_message = ('''\
+Delta encoded data for identifier "{}" posted to server {}\
+'''.format(identifier, url))
+        log.log2debug(1255, log_message)
+    else:
+        log_message = ('''\
+Delta encoded data for identifier "{}" failed to post to server {}\
+'''.format(identifier, url))
+        log.log2warning(1256, log_message)
+
+    # Return
+    return success
+
+
+def _request(url, request, message):
+    """Make a request to the API server, retrying temporary failures.
+
+    Failed connections and HTTP 429, 502, 503 and 504 responses are retried
+    after a backoff, or after the delay in the Retry-After header of the
+    response. Requests aren't made while the endpoint's circuit breaker is
+    open.
+
+    Args:
+        url: URL of the request
+        request: Function without arguments that makes the request and
+            returns a requests.Response object
+        message: Log message for request exceptions
+
+    Returns:
+        response: requests.Response object of the last attempt. None if
+            there was no response.
+
+    """
+    # Initialize key variables
+    config = Config()
+    retries = config.agent_api_retries()
+    maximum = config.agent_api_backoff_max()
+    circuit = breaker(url)
+    response = None
+
+    for attempt in range(retries + 1):
+        # Don't make requests to failing endpoints
+        if circuit.allow() is False:
+            log_message = ('''\
+Circuit breaker for {} is open. Request not made.'''.format(url))
+            log.log2debug(1211, log_message)
+            break
+
+        # Make request
+        try:
+            response = request()
+        except:
+            _exception = sys.exc_info()
+            log.log2exception(1215, _exception, message=message)
+            response = None
+
+        # Stop on success, or on errors that won't improve by retrying
+        if response is not None and response.status_code < 500 and (
+                response.status_code not in RETRY_STATUS_CODES):
+            if circuit.success() is True:
+                log_message = 'Circuit breaker for {} closed.'.format(url)
+                log.log2info(1212, log_message)
+            break
+
+        # Record the failure
+        delay = None if response is None else _retry_after(response)
+        opened = circuit.failure(retry_after=delay)
+        if opened > 0:
+            log_message = ('''\
+Circuit breaker for {} open for {:.1f}s.'''.format(url, opened))
+            log.log2warning(1213, log_message)
+
+        # Stop if the failure can't be retried
+        if response is not None and (
+                response.status_code not in RETRY_STATUS_CODES):
+            break
+        if attempt >= retries:
+            break
+
+        # Wait before retrying unless the server wants us to wait too long
+        if delay is None:
+            delay = backoff(attempt, config.agent_api_backoff(), maximum)
+        if delay > maximum:
+            break
+        log_message = ('''\
+Retrying request to {} in {:.1f}s.'''.format(url, delay))
+        log.log2debug(1214, log_message)
+        sleep(delay)
+
+    # Return
+    return response
+
+
+def _retry_after(response):
+    """Get the delay requested by the Retry-After header of a response.
+
+    Args:
+        response: requests.Response object
+
+    Returns:
+        result: Seconds to wait. None if there is no valid header.
+
+    """
+    # Initialize key variables
+    result = None
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return result
+
+    # The value is either a number of seconds or an HTTP date
+    try:
+        result = max(0, float(value))
+    except:
+        try:
+            result = max(0, email.utils.parsedate_to_datetime(
+                value).timestamp() - time())
+        except:
+            pass
+    return result
+
 
-        """
-        # Get data
-        data = self.get()
-        identifier = self._identifier
+def _body(data, payload=None):
+    """Create the JSON body of a post, compressing it if configured.
 
-        # Post data
-        if bool(data) is True:
-            # Log message that ties the identifier to an agent_program
-            _log(self._agent_program, identifier)
+    Args:
+        data: Data to post, or its JSON as bytes
+        payload: JSON of the agent data in the post as bytes. Its digest is
+            sent as the idempotency key of the post. No key is sent if None.
 
-            # Post to remote server
-            server = Post(identifier, data)
-            success = server.post()
+    Returns:
+        result: Tuple of (body as bytes, dict of request headers)
 
-            # Purge cache if success is True
-            if success is True:
-                server.purge()
+    """
+    # Create the body
+    config = Config()
+    result = compress.json_body(
+        data,
+        encoding=config.agent_api_compression(),
+        threshold=config.agent_api_compression_threshold())
 
-    def get(self):
-        """Get JSON from remote URL.
+    # Return
+    if payload is not None:
+        result[1][IDEMPOTENCY_KEY_HEADER] = cache.digest(payload)
+    return result
 
-        Args:
-            None
 
-        Returns:
-            result: dict of JSON retrieved.
+def _payload(data):
+    """Get the JSON of data to post.
 
-        """
-        # Initialize key variables
-        result = {}
-        url = self._url
+    Args:
+        data: Data dict, or its JSON as bytes
 
-        # Get URL
-        try:
-            with urllib.request.urlopen(url) as u_handle:
-                try:
-                    result = json.loads(u_handle.read().decode())
-                except:
-                    (etype, evalue, etraceback) = sys.exc_info()
-                    log_message = (
-                        'Error reading JSON from URL {}: [{}, {}, {}]'
-                        ''.format(url, etype, evalue, etraceback))
-                    log.log2info(1008, log_message)
-        except:
-            # Most likely no connectivity or the TCP port is unavailable
-            (etype, evalue, etraceback) = sys.exc_info()
-            log_message = (
-                'Error contacting URL {}: [{}, {}, {}]'
-                ''.format(url, etype, evalue, etraceback))
-            log.log2info(1186, log_message)
+    Returns:
+        result: JSON as bytes
 
-        # Return
-        return result
+    """
+    # Return
+    result = data if isinstance(data, bytes) else codec.encode(data)
+    return result
 
 
-def post(url, data, identifier, save=True):
-    """Post data to central server.
+def _envelope(payload, identifier):
+    """Create the JSON string of data to encrypt for an encrypted post.
+
+    The string decodes to {'data': data, 'source': identifier}. The
+    payload is inserted as is rather than decoded and encoded again.
 
     Args:
-        url: URL to receive posted data
-        identifier: Unique identifier for the source of the data. (AgentID)
-        data: Data dict to post. If None, then uses self._post_data (
-            Used for testing and cache purging)
-        save: When True, save data to cache directory if posting fails
+        payload: JSON of the data as bytes
+        identifier: Agent identifier
 
     Returns:
-        success: True: if successful
+        result: JSON string
 
     """
-    # Initialize key variables
-    success = False
-    response = False
+    # Return
+    result = '{{"data":{},"source":{}}}'.format(
+        payload.decode(), codec.dumps(identifier))
+    return result
 
-    # Fail if nothing to post
-    if isinstance(data, dict) is False or bool(data) is False:
-        return success
 
-    # Post data save to cache if this fails
-    try:
-        result = requests.post(url, json=data)
-        response = True
-    except:
-        _exception = sys.exc_info()
-        log_message = ('Data posting failure')
-        log.log2exception(1097, _exception, message=log_message)
-        if save is True:
-            # Save data to cache
-            _save_data(data, identifier)
-        else:
-            # Proceed normally if there is a failure.
-            # This will be logged later
-            pass
+def _encrypted_body(encrypted_data):
+    """Create the data of an encrypted post.
 
-    # Define success
-    if response is True:
-        if result.status_code == 200:
-            success = True
-        else:
-            log_message = ('''\
-HTTP {} error for identifier "{}" posted to server {}\
-'''.format(result.status_code, identifier, url))
-            log.log2warning(1017, log_message)
-            # Save data to cache, remote webserver isn't
-            # working properly
-            _save_data(data, identifier)
+    The data is a JSON string containing JSON, which is what pattoo API
+    servers expect, unless agent_api_encrypted_json_object is True.
 
-    # Log message
-    if success is True:
-        log_message = ('''\
-Data for identifier "{}" posted to server {}\
-'''.format(identifier, url))
-        log.log2debug(1027, log_message)
-    else:
-        log_message = ('''\
-Data for identifier "{}" failed to post to server {}\
-'''.format(identifier, url))
-        log.log2warning(1028, log_message)
+    Args:
+        encrypted_data: Encrypted data
 
+    Returns:
+        result: Data to post
+
+    """
     # Return
-    return success
+    result = {'encrypted_data': encrypted_data}
+    if Config().agent_api_encrypted_json_object() is False:
+        result = codec.dumps(result)
+    return result
 
 
 def key_exchange(metadata):
@@ -721,67 +1638,72 @@ def encrypted_post(metadata, save=True):
             session: Requests session object
             symmetric_key: Symmetric key
             encryption_url: API URL to post the data to
-            data: Data to post as a dict
+            data: Data to post as a dict, or its JSON as bytes
             identifier: Agent identifier
         save: If True, save data to cache if API server is inaccessible
 
     Returns:
         success: True if successful
 
+    """
+    # Return
+    response = _encrypted_post(metadata, save=save)
+    success = response is not None and response.status_code == 202
+    return success
+
+
+def _encrypted_post(metadata, save=True):
+    """Post encrypted data to the API server and get the response.
+
+    Args:
+        metadata: _EncrypedPost object
+        save: If True, save data to cache if API server is inaccessible
+
+    Returns:
+        response: requests.Response object. None if there was no response
+            or nothing to post.
+
     """
     # Initialize key variables
-    success = False
     status = None
+    response = None
 
     # Fail if nothing to post
-    if isinstance(metadata.data, dict) is False or bool(
+    if isinstance(metadata.data, (dict, bytes)) is False or bool(
             metadata.data) is False:
-        return success
+        return response
 
     # Prepare data for posting
-    data = json.dumps(
-        {
-            'data': metadata.data,
-            'source': metadata.identifier
-        }
-    )
+    payload = _payload(metadata.data)
+    data = _envelope(payload, metadata.identifier)
 
     # Symmetrically encrypt data
     encrypted_data = metadata.encryption.sencrypt(data, metadata.symmetric_key)
 
     # Post data save to cache if this fails
-    try:
-        response = metadata.session.post(
-            metadata.encryption_url,
-            json=json.dumps({'encrypted_data': encrypted_data})
-        )
+    (body, headers) = _body(_encrypted_body(encrypted_data), payload=payload)
+    response = _request(
+        metadata.encryption_url,
+        lambda: metadata.session.post(
+            metadata.encryption_url, data=body, headers=headers),
+        'Encrypted posting failure')
+    if response is not None:
         status = response.status_code
-    except:
-        _exception = sys.exc_info()
-        log_message = ('Encrypted posting failure')
-        log.log2exception(1075, _exception, message=log_message)
-        if save is True:
-            # Save data to cache
-            _save_data(metadata.data, metadata.identifier)
-        else:
-            # Proceed normally if there is a failure.
-            # This will be logged later
-            pass
+    elif save is True:
+        # Save data to cache
+        _save_data(payload, metadata.identifier)
 
     # Checks if data was posted successfully
     if status == 202:
         log_message = 'Posted to API. Response "{}" from URL: "{}"'.format(
             status, metadata.encryption_url)
         log.log2debug(1059, log_message)
-
-        # The data was accepted successfully
-        success = True
     else:
         log_message = 'Error posting. Response "{}" from URL: "{}"'.format(
             status, metadata.encryption_url)
         log.log2warning(1058, log_message)
 
-    return success
+    return response
 
 
 def purge(url, identifier, suite=post):
@@ -801,121 +1723,465 @@ def purge(url, identifier, suite=post):
     """
     # Initialize key variables
     config = Config()
-    cache_dir = config.agent_cache_directory(identifier)
-
-    # Add files in cache directory to list only if they match the
-    # cache suffix
-    all_filenames = [filename for filename in os.listdir(
-        cache_dir) if os.path.isfile(
-            os.path.join(cache_dir, filename))]
-    filenames = [
-        filename for filename in all_filenames if filename.endswith(
-            '.json')]
-
-    # Read cache file
-    for filename in filenames:
-        # Only post files for our own UID value
-        if identifier not in filename:
+    limiter = RateLimiter(config.agent_api_purge_rate())
+    stop = threading.Event()
+
+    # Don't read the cache if the server isn't accepting data
+    if breaker(url).blocked() is True:
+        return
+
+    # Post cached data. Stores that must be purged in order are posted
+    # serially and stop at the first failure.
+    _stores = cache.stores(identifier)
+    for store in _stores:
+        if _lock(store, identifier) is False:
             continue
+        workers = 1 if store.ordered is True else (
+            config.agent_api_purge_workers())
+        try:
+            _run(
+                workers,
+                functools.partial(
+                    _purge_entry, url, identifier, suite, limiter, store,
+                    stop),
+                _entries(store, stop))
+        finally:
+            store.flush()
+            store.unlock()
+        if stop.is_set() is True:
+            break
 
-        # Get the full filepath for the cache file and post
-        filepath = os.path.join(cache_dir, filename)
-        with open(filepath, 'r') as f_handle:
-            try:
-                data = json.load(f_handle)
-            except:
-                # Log removal
-                log_message = ('''\
-Error reading previously cached agent data file {} for identifier {}. May be \
-corrupted.'''.format(filepath, identifier))
-                log.log2warning(1064, log_message)
-
-                # Delete file
-                if os.path.isfile(filepath) is True:
-                    os.remove(filepath)
-
-                    log_message = ('''\
-Deleting corrupted cache file {} for identifier {}.\
-'''.format(filepath, identifier))
-                    log.log2warning(1036, log_message)
-
-                # Go to the next file.
-                continue
-
-        # Post file
-        if callable(suite):  # Is it a function?
-            # Post unencrypted data
-            success = suite(url, data, identifier, save=False)
-        elif isinstance(suite, EncryptionSuite):  # Is it EncryptionSuite?
-            # Post encrypted data
-            success = suite.encrypted_post(
-                _EncrypedPost(
-                    encryption=suite.encryption,
-                    session=suite.session,
-                    symmetric_key=suite.symmetric_key,
-                    encryption_url=url,
-                    data=data,
-                    identifier=identifier
-                )
-            )
+    # Record and report the data still waiting to be purged
+    _log_pending(identifier, cache.watcher(identifier).check(_stores))
+
+
+def _purge_entry(url, identifier, suite, limiter, store, stop, entry):
+    """Post a single item of cached data and remove it if successful.
+
+    Args:
+        url: URL to receive posted data
+        identifier: Unique identifier for the source of the data. (AgentID)
+        suite: Post function or EncryptionSuite. See purge()
+        limiter: RateLimiter object
+        store: Store object the data was read from
+        stop: threading.Event object. Set if an ordered store fails to post.
+        entry: cache.Entry object
 
-        # Delete file if successful
-        if success is True:
-            if os.path.exists(filepath) is True:
-                os.remove(filepath)
+    Returns:
+        None
 
-                # Log removal
-                log_message = ('''\
-    Purging cache file {} after successfully contacting server {}\
-    '''.format(filepath, url))
-                log.log2info(1007, log_message)
+    """
+    # Stop reading the cache if the server stops accepting data
+    if breaker(url).blocked() is True:
+        stop.set()
+        store.release([entry.key])
+        return
 
+    # Post data
+    limiter.wait()
+    success = _post_cached(url, identifier, suite, entry.data)
 
-def _save_data(data, identifier):
-    """Save data to cache file.
+    # Remove data if successful
+    if success is True:
+        store.remove([entry.key])
+
+        # Log removal
+        log_message = ('''\
+Purging cached data {} for identifier {} after successfully contacting \
+server {}'''.format(entry.key, identifier, url))
+        log.log2info(1007, log_message)
+
+    else:
+        store.release([entry.key])
+        if store.ordered is True:
+            stop.set()
+
+
+def _post_cached(url, identifier, suite, data):
+    """Post data read from the cache.
 
     Args:
-        data: Dict to save
+        url: URL to receive posted data
         identifier: Unique identifier for the source of the data. (AgentID)
+        suite: Post function or EncryptionSuite. See purge()
+        data: Cached data as JSON bytes
 
     Returns:
-        success: True: if successful
+        success: True if successful
 
     """
     # Initialize key variables
     success = False
+
+    # Post data
+    if callable(suite):  # Is it a function?
+        # Post unencrypted data
+        success = suite(url, data, identifier, save=False)
+    elif isinstance(suite, EncryptionSuite):  # Is it EncryptionSuite?
+        # Post encrypted data
+        success = suite.encrypted_post(
+            _EncrypedPost(
+                encryption=suite.encryption,
+                session=suite.session,
+                symmetric_key=suite.symmetric_key,
+                encryption_url=url,
+                data=data,
+                identifier=identifier
+            ),
+            save=False
+        )
+    return success
+
+
+def post_batch(url, payloads, identifier):
+    """Post a batch of cached data to the central server.
+
+    Args:
+        url: URL to receive the batch
+        payloads: List of (payload_id, cache data) tuples. Cache data may be
+            JSON as bytes.
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: List of payload IDs acknowledged by the server
+
+    """
+    # Initialize key variables
+    data = converter.encode_batch(identifier, payloads)
+
+    # Post data
+    (body, headers) = _body(data)
+    response = _request(
+        url, lambda: transport().post(url, data=body, headers=headers),
+        'Batch posting failure')
+
+    # Return
+    result = _acknowledged(response, payloads, 200)
+    return result
+
+
+def purge_batch(url, identifier, suite=post_batch):
+    """Purge data from cache by posting batches of it to central server.
+
+    Batches are limited by the number of cached payloads and by their size
+    on disk. Cached data is only removed if the server acknowledges it.
+
+    Args:
+        url: URL to receive the batches
+        identifier: Unique identifier for the source of the data. (AgentID)
+        suite: Function that posts a batch. It must accept the same
+            arguments and return the same values as post_batch.
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    config = Config()
+    limiter = RateLimiter(config.agent_api_purge_rate())
+    stop = threading.Event()
+
+    # Don't read the cache if the server isn't accepting data
+    if breaker(url).blocked() is True:
+        return
+
+    # Post batches of cached data
+    _stores = cache.stores(identifier)
+    for store in _stores:
+        if _lock(store, identifier) is False:
+            continue
+        workers = 1 if store.ordered is True else (
+            config.agent_api_purge_workers())
+        try:
+            _run(
+                workers,
+                functools.partial(
+                    _purge_batch, url, identifier, suite, limiter, store,
+                    stop),
+                _batches(store, stop))
+        finally:
+            store.flush()
+            store.unlock()
+        if stop.is_set() is True:
+            break
+
+    # Record and report the data still waiting to be purged
+    _log_pending(identifier, cache.watcher(identifier).check(_stores))
+
+
+def _entries(store, stop):
+    """Read cached data until told to stop.
+
+    The data is read as JSON bytes so that it can be posted without being
+    decoded and encoded again. Data claimed by other purgers is skipped.
+
+    Args:
+        store: Store object
+        stop: threading.Event object. No more data is read once set.
+
+    Yields:
+        result: cache.Entry object
+
+    """
+    # Read data
+    for entry in store.entries(decode=False, claim=True):
+        if stop.is_set() is True:
+            store.release([entry.key])
+            return
+        yield entry
+
+
+def _lock(store, identifier):
+    """Lock a cache store before purging it.
+
+    Args:
+        store: Store object
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        result: True if locked
+
+    """
+    # Lock
+    result = store.lock()
+    if result is False:
+        log_message = ('''\
+Skipping {} cache of identifier {} being purged by another process or thread\
+'''.format(type(store).__name__, identifier))
+        log.log2debug(1247, log_message)
+    return result
+
+
+def _batches(store, stop):
+    """Read cached data in batches.
+
+    Args:
+        store: Store object
+        stop: threading.Event object. No more batches are read once set.
+
+    Yields:
+        payloads: OrderedDict of cached data keyed by payload ID
+
+    """
+    # Initialize key variables
     config = Config()
-    cache_dir = config.agent_cache_directory(identifier)
-    timestamp = int(time() * 1000)
+    batch_size = config.agent_api_batch_size()
+    batch_bytes = config.agent_api_batch_bytes()
+    payloads = collections.OrderedDict()
+    size = 0
+
+    # Read cached data
+    for entry in _entries(store, stop):
+        # Return the batch when full
+        if bool(payloads) is True and (
+                len(payloads) >= batch_size or
+                size + entry.size > batch_bytes):
+            yield payloads
+            payloads = collections.OrderedDict()
+            size = 0
+
+            # Stop if the server isn't accepting data
+            if stop.is_set() is True:
+                store.release([entry.key])
+                return
+
+        # Add data to the batch
+        payloads[entry.key] = entry.data
+        size += entry.size
+
+    # Return remaining data
+    if bool(payloads) is True:
+        yield payloads
+
+
+def _purge_batch(url, identifier, suite, limiter, store, stop, payloads):
+    """Post a batch of cached data and remove the acknowledged data.
+
+    Args:
+        url: URL to receive the batch
+        identifier: Unique identifier for the source of the data. (AgentID)
+        suite: Function that posts the batch
+        limiter: RateLimiter object
+        store: Store object the data was read from
+        stop: threading.Event object. Set if nothing is acknowledged, or if
+            an ordered store's batch isn't completely acknowledged.
+        payloads: OrderedDict of cached data keyed by payload ID
+
+    Returns:
+        None
+
+    """
+    # Don't post if another batch has already failed
+    limiter.wait()
+    if stop.is_set() is True:
+        store.release(list(payloads))
+        return
+
+    # Post
+    acknowledged = suite(url, list(payloads.items()), identifier)
+
+    # Ordered stores can only remove data acknowledged along with all the
+    # data before it
+    if store.ordered is True:
+        _acknowledged = set(acknowledged)
+        acknowledged = []
+        for payload_id in payloads:
+            if payload_id not in _acknowledged:
+                stop.set()
+                break
+            acknowledged.append(payload_id)
+
+    # Remove data. Release the rest so that it can be purged again.
+    store.remove(acknowledged)
+    _acknowledged = set(acknowledged)
+    store.release([
+        payload_id for payload_id in payloads
+        if payload_id not in _acknowledged])
+
+    # Log
+    log_message = ('''\
+Server {} acknowledged {} of {} cached payloads for identifier {}\
+'''.format(url, len(acknowledged), len(payloads), identifier))
+    log.log2debug(1208, log_message)
 
-    # Create a unique very long filename to reduce risk of
-    filename = ('''{}{}{}_{}.json\
-'''.format(cache_dir, os.sep, timestamp, identifier))
+    # Stop purging if the server accepted nothing
+    if bool(acknowledged) is False:
+        stop.set()
 
-    # Save data
+
+def _acknowledged(response, payloads, status):
+    """Get the IDs of payloads acknowledged in a response to a batch post.
+
+    Args:
+        response: requests.Response object. None if there was no response
+        payloads: List of (payload_id, cache data) tuples that were posted
+        status: HTTP status code expected for a successful post
+
+    Returns:
+        result: List of acknowledged payload IDs
+
+    """
+    # Initialize key variables
+    result = []
+
+    # Check response
+    if response is None:
+        return result
+    if response.status_code != status:
+        log_message = ('''\
+HTTP {} error for batch posted to server {}\
+'''.format(response.status_code, response.url))
+        log.log2warning(1209, log_message)
+        return result
+
+    # Only accept IDs that were sent
     try:
-        with open(filename, 'w') as f_handle:
-            json.dump(data, f_handle)
-        success = True
-    except Exception as err:
-        log_message = '{}'.format(err)
-        log.log2warning(1030, log_message)
+        _result = set(response.json()[BATCH_ACKNOWLEDGEMENT_KEY])
     except:
-        (etype, evalue, etraceback) = sys.exc_info()
         log_message = ('''\
-Cache-file save error: [{}, {}, {}]'''.format(etype, evalue, etraceback))
-        log.log2warning(1031, log_message)
+Invalid batch acknowledgement from server {}\
+'''.format(response.url))
+        log.log2warning(1210, log_message)
+        return result
+    sent = [payload_id for payload_id, _ in payloads]
+    result = [payload_id for payload_id in sent if payload_id in _result]
+    return result
 
-    # Delete file if there is a failure.
-    # Helps to protect against full file systems.
-    if os.path.isfile(filename) is True and success is False:
-        os.remove(filename)
+
+def _run(workers, function, items):
+    """Call a function for each item using a pool of worker threads.
+
+    Items are read from the iterable as workers become free so that large
+    caches are not read into memory all at once.
+
+    Args:
+        workers: Number of worker threads. 1 calls the function serially.
+        function: Function to call with each item
+        items: Iterable of items
+
+    Returns:
+        None
+
+    """
+    # Process serially
+    if workers <= 1:
+        for item in items:
+            function(item)
+        return
+
+    # Use workers
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for item in items:
+            # Limit the number of items waiting for a worker
+            if len(pending) >= workers * 2:
+                (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(function, item))
+
+        # Wait for remaining items
+        for future in pending:
+            future.result()
+
+
+def _log_pending(identifier, pending):
+    """Log the amount of cached data waiting to be purged.
+
+    Args:
+        identifier: Unique identifier for the source of the data. (AgentID)
+        pending: Tuple of (number of payloads, size in bytes)
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    (count, size) = pending
+
+    # Log
+    if bool(count) is True:
         log_message = ('''\
-Deleting corrupted cache file {} for identifier {}.\
-'''.format(filename, identifier))
-        log.log2warning(1037, log_message)
+{} cached payloads of {} bytes still pending for identifier {}\
+'''.format(count, size, identifier))
+        log.log2info(1244, log_message)
+
+
+def _save_data(data, identifier):
+    """Save data to the agent cache, evicting data that exceeds its quotas.
+
+    Data is held in the memory of the agent_api_retry_queue if it is
+    enabled. Data that is already cached isn't saved again.
+
+    Args:
+        data: Dict to save, or its JSON as bytes
+        identifier: Unique identifier for the source of the data. (AgentID)
+
+    Returns:
+        success: True: if successful
+
+    """
+    # Initialize key variables. Hold data in memory for a quick retry if
+    # configured.
+    payload = _payload(data)
+    key = cache.digest(payload)
+    store = cache.queue(identifier)
+    if store is None:
+        store = cache.store(identifier)
+
+    # Skip data that is already cached
+    for _store in cache.stores(identifier):
+        if _store.contains(key) is True:
+            log_message = ('''\
+Data with digest {} for identifier {} is already cached. Skipping.\
+'''.format(key, identifier))
+            log.log2debug(1246, log_message)
+            return True
 
     # Return
+    success = store.save(payload)
+    cache.watcher(identifier).notify()
+    store.evict()
     return success
 
 
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Pattoo append-only spool for cached agent data."""
+
+# Standard imports
+import os
+import zlib
+import struct
+import threading
+import collections
+
+# Pattoo imports
+from pattoo_shared import log
+from pattoo_shared import codec
+from pattoo_shared import compress
+
+# Position of a record in the spool. The offset is the end of the record.
+Position = collections.namedtuple('Position', 'segment offset')
+
+# Record header of the payload length and the CRC32 of the payload
+_HEADER = struct.Struct('>II')
+
+# Bytes added to each payload in a segment
+RECORD_OVERHEAD = _HEADER.size
+
+# Suffix of segment filenames and the name of the cursor file
+_SUFFIX = '.spool'
+_CURSOR = 'cursor.json'
+
+# Number of commits between cursor saves when fsync is not 'always'
+_CURSOR_INTERVAL = 100
+
+
+class Spool():
+    """Append-only spool of data made of size-capped segment files.
+
+    Each record is a JSON payload, gzip compressed if required, prefixed by
+    its length and checksum. A
+    cursor saved in the spool directory marks the first record that has not
+    been committed. It is read again before the spool is read, so that
+    records committed by other processes aren't returned. Segments are
+    deleted once all their records have been committed.
+
+    """
+
+    def __init__(
+            self, directory, segment_bytes=4194304, fsync='segment',
+            compression=0):
+        """Initialize the class.
+
+        Args:
+            directory: Directory for the segment and cursor files
+            segment_bytes: Size in bytes after which a new segment is started
+            fsync: When data is flushed to disk. 'always' after every
+                append and commit, 'segment' when a segment is full, or
+                'never' to leave it to the operating system
+            compression: gzip compression level of appended payloads. 0
+                doesn't compress.
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._fsync = fsync
+        self._compression = compression
+        self._lock = threading.RLock()
+
+        # Segment being written
+        self._handle = None
+        self._segment = None
+
+        # Read the cursor
+        os.makedirs(directory, mode=0o750, exist_ok=True)
+        self._cursor = self._read_cursor()
+        self._commits = 0
+
+    def append(self, data):
+        """Append data to the spool.
+
+        Args:
+            data: Data to append, or its JSON as bytes
+
+        Returns:
+            None
+
+        """
+        # Create record
+        payload = compress.compress_json(data, self._compression)
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        # Write record
+        with self._lock:
+            handle = self._writer(len(record))
+            handle.write(record)
+            handle.flush()
+            if self._fsync == 'always':
+                os.fsync(handle.fileno())
+
+    def records(self, decode=True):
+        """Read uncommitted records in the order they were appended.
+
+        Corrupted records are skipped. Records appended while reading may
+        not be returned until the next call.
+
+        Args:
+            decode: Return decoded data if True, otherwise uncompressed JSON
+                as bytes
+
+        Yields:
+            result: Tuple of (data, Position object, size of the data in
+                bytes). Commit the position once the data has been
+                processed.
+
+        """
+        # Get segments to read
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+            self._refresh()
+            segments = self._segments()
+            cursor = self._cursor
+
+        # Read segments
+        for segment in segments:
+            if segment < cursor.segment:
+                continue
+            offset = cursor.offset if segment == cursor.segment else 0
+            for (payload, end) in self._read(segment, offset):
+                try:
+                    data = compress.decompress_payload(payload)
+                    if decode is True:
+                        data = codec.decode(data)
+                except:
+                    log_message = ('''\
+Invalid data in spool segment {} before offset {}. Skipping.\
+'''.format(self._filepath(segment), end))
+                    log.log2warning(1226, log_message)
+                    continue
+                yield (
+                    data, Position(segment=segment, offset=end), len(payload))
+
+    def commit(self, position):
+        """Mark all records up to a position as processed.
+
+        Args:
+            position: Position object returned by records()
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            # Update cursor. It only moves forward, as data evicted while
+            # the spool is being purged may commit an older position.
+            self._refresh()
+            self._cursor = max(self._cursor, position)
+            position = self._cursor
+            self._commits += 1
+
+            # Delete segments that have been completely processed
+            removed = False
+            for segment in self._segments():
+                filepath = self._filepath(segment)
+                if segment == position.segment:
+                    if position.offset < os.path.getsize(filepath):
+                        break
+                    self._cursor = Position(segment=segment + 1, offset=0)
+                elif segment > position.segment:
+                    break
+                self._remove(segment)
+                removed = True
+
+            # Save cursor
+            if removed is True or self._fsync == 'always' or (
+                    self._commits >= _CURSOR_INTERVAL):
+                self.save()
+
+    def save(self):
+        """Save the cursor.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Write to a temporary file then replace the cursor
+        filepath = os.path.join(self._directory, _CURSOR)
+        temp_filepath = '{}.tmp'.format(filepath)
+        with self._lock:
+            with open(temp_filepath, 'wb') as f_handle:
+                f_handle.write(codec.encode(self._cursor._asdict()))
+                if self._fsync == 'always':
+                    f_handle.flush()
+                    os.fsync(f_handle.fileno())
+            os.replace(temp_filepath, filepath)
+            self._commits = 0
+
+    def size(self):
+        """Get the number of bytes in the spool that are uncommitted.
+
+        Args:
+            None
+
+        Returns:
+            result: Size in bytes
+
+        """
+        # Initialize key variables
+        result = 0
+
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+            self._refresh()
+            for segment in self._segments():
+                if segment < self._cursor.segment:
+                    continue
+                result += os.path.getsize(self._filepath(segment))
+                if segment == self._cursor.segment:
+                    result -= self._cursor.offset
+        return max(0, result)
+
+    def count(self):
+        """Get the number of uncommitted records.
+
+        Only record headers are read.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of records
+
+        """
+        # Initialize key variables
+        result = 0
+
+        # Get segments to read
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+            self._refresh()
+            segments = self._segments()
+            cursor = self._cursor
+
+        # Count complete records, skipping their payloads
+        for segment in segments:
+            if segment < cursor.segment:
+                continue
+            try:
+                f_handle = open(self._filepath(segment), 'rb')
+            except FileNotFoundError:
+                continue
+            with f_handle:
+                size = os.fstat(f_handle.fileno()).st_size
+                if segment == cursor.segment:
+                    f_handle.seek(cursor.offset)
+                while True:
+                    header = f_handle.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    (length, _) = _HEADER.unpack(header)
+                    if f_handle.seek(length, os.SEEK_CUR) > size:
+                        break
+                    result += 1
+        return result
+
+    def close(self):
+        """Save the cursor and close the segment being written.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            self.save()
+            self._close()
+
+    def _writer(self, size):
+        """Get the file handle of the segment to append a record to.
+
+        Args:
+            size: Size of the record in bytes
+
+        Returns:
+            result: File handle
+
+        """
+        # Open the newest segment, or start a new one after the cursor
+        if self._handle is None:
+            segments = self._segments()
+            if bool(segments) is True and (
+                    segments[-1] >= self._cursor.segment):
+                self._segment = segments[-1]
+                self._recover(self._segment)
+            else:
+                self._segment = self._cursor.segment
+            self._handle = open(self._filepath(self._segment), 'ab')
+
+        # Start a new segment when full
+        if self._handle.tell() > 0 and (
+                self._handle.tell() + size > self._segment_bytes):
+            segment = self._segment + 1
+            self._close()
+            self._segment = segment
+            self._handle = open(self._filepath(self._segment), 'ab')
+
+        # Return
+        result = self._handle
+        return result
+
+    def _close(self):
+        """Close the segment being written.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        if self._handle is not None:
+            self._handle.flush()
+            if self._fsync in ['always', 'segment']:
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+        self._handle = None
+        self._segment = None
+
+    def _read(self, segment, offset):
+        """Read the payloads in a segment.
+
+        Args:
+            segment: Segment number
+            offset: Offset of the first record to read
+
+        Yields:
+            result: Tuple of (payload as bytes, offset of the end of the
+                record)
+
+        """
+        # Read records
+        try:
+            f_handle = open(self._filepath(segment), 'rb')
+        except FileNotFoundError:
+            return
+        with f_handle:
+            f_handle.seek(offset)
+            while True:
+                # Stop at incomplete records. They may still be being written
+                header = f_handle.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                (length, checksum) = _HEADER.unpack(header)
+                payload = f_handle.read(length)
+                if len(payload) < length:
+                    break
+                offset += _HEADER.size + length
+
+                # Skip corrupted records
+                if zlib.crc32(payload) != checksum:
+                    log_message = ('''\
+Corrupted record in spool segment {} before offset {}. Skipping.\
+'''.format(self._filepath(segment), offset))
+                    log.log2warning(1227, log_message)
+                    continue
+                yield (payload, offset)
+
+    def _recover(self, segment):
+        """Remove incomplete records written before a crash from a segment.
+
+        Args:
+            segment: Segment number
+
+        Returns:
+            None
+
+        """
+        # Find the end of the last complete record
+        filepath = self._filepath(segment)
+        end = 0
+        with open(filepath, 'rb') as f_handle:
+            while True:
+                header = f_handle.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                (length, _) = _HEADER.unpack(header)
+                if len(f_handle.read(length)) < length:
+                    break
+                end = f_handle.tell()
+
+        # Truncate
+        if os.path.getsize(filepath) > end:
+            log_message = ('''\
+Truncating incomplete record at offset {} of spool segment {}\
+'''.format(end, filepath))
+            log.log2warning(1225, log_message)
+            os.truncate(filepath, end)
+
+    def _segments(self):
+        """Get the numbers of the segments in the spool.
+
+        Args:
+            None
+
+        Returns:
+            result: Sorted list of segment numbers
+
+        """
+        # Return
+        result = sorted([
+            int(filename[:-len(_SUFFIX)])
+            for filename in os.listdir(self._directory)
+            if filename.endswith(_SUFFIX) is True and (
+                filename[:-len(_SUFFIX)].isdigit() is True)])
+        return result
+
+    def _filepath(self, segment):
+        """Get the filepath of a segment.
+
+        Args:
+            segment: Segment number
+
+        Returns:
+            result: Filepath
+
+        """
+        # Return
+        result = os.path.join(
+            self._directory, '{:020d}{}'.format(segment, _SUFFIX))
+        return result
+
+    def _remove(self, segment):
+        """Delete a segment.
+
+        Args:
+            segment: Segment number
+
+        Returns:
+            None
+
+        """
+        # Close the segment if it's being written
+        if segment == self._segment:
+            self._close()
+        if os.path.isfile(self._filepath(segment)) is True:
+            os.remove(self._filepath(segment))
+
+    def _refresh(self):
+        """Read the cursor saved by other processes.
+
+        The cursor only moves forward, so commits that haven't been saved
+        yet are kept.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Update cursor
+        self._cursor = max(self._cursor, self._read_cursor())
+
+    def _read_cursor(self):
+        """Read the cursor saved in the spool directory.
+
+        Args:
+            None
+
+        Returns:
+            result: Position object
+
+        """
+        # Initialize key variables
+        result = Position(segment=0, offset=0)
+        filepath = os.path.join(self._directory, _CURSOR)
+
+        # Read
+        if os.path.isfile(filepath) is True:
+            try:
+                result = Position(**codec.read(filepath))
+            except:
+                log_message = ('''\
+Invalid spool cursor {}. Reading spool from the start.'''.format(filepath))
+                log.log2warning(1228, log_message)
+        return result
@@ -2,7 +2,10 @@
 
 # Standard imports
 from time import time
+from array import array
+from functools import lru_cache
 import socket
+import sys
 import re
 
 # pattoo imports
@@ -11,12 +14,18 @@ from pattoo_shared import files
 from pattoo_shared import network
 from pattoo_shared.constants import (
     DATA_INT, DATA_FLOAT, DATA_COUNT64, DATA_COUNT, DATA_STRING, DATA_NONE,
-    DATAPOINT_KEYS, AGENT_METADATA_KEYS)
+    DATAPOINT_KEYS, AGENT_METADATA_KEYS, CHECKSUM_CACHE_SIZE)
+
+# Tuples of the metadata keys used to create DataPoint checksums. DataPoints
+# with the same metadata keys share a tuple.
+_CHECKSUM_KEYS = {}
 
 
 class Metadata():
     """Metadata related to a DataPoint."""
 
+    __slots__ = ('key', 'value', 'update_checksum', 'valid')
+
     def __init__(self, key, value):
         """Initialize the class.
 
@@ -53,6 +62,8 @@ class Metadata():
 class ConverterMetadata(Metadata):
     """Metadata related to a Converter DataPoint."""
 
+    __slots__ = ()
+
     def __init__(self, key, value, update_checksum=True):
         """Initialize the class.
 
@@ -94,6 +105,8 @@ class ConverterMetadata(Metadata):
 class DataPointMetadata(Metadata):
     """Metadata related to a Regular DataPoint."""
 
+    __slots__ = ()
+
     def __init__(self, key, value, update_checksum=True):
         """Initialize the class.
 
@@ -133,6 +146,10 @@ class DataPoint():
 
     """
 
+    __slots__ = (
+        'key', 'value', 'valid', 'data_type', 'metadata', 'timestamp',
+        '_checksum', '_checksum_keys')
+
     def __init__(self, key, value, data_type=DATA_INT, timestamp=None):
         """Initialize the class.
 
@@ -157,7 +174,10 @@ class DataPoint():
             key, value, metadata=False)
         self.data_type = data_type
         self.metadata = {}
-        self._metakeys = []
+
+        # Checksum and the keys of the metadata used to create it
+        self._checksum = None
+        self._checksum_keys = ()
 
         # Round timestamp to the nearest millisecond.
         if data.is_numeric(timestamp) is False:
@@ -207,10 +227,6 @@ class DataPoint():
         if data_type in [DATA_STRING]:
             self.value = str(value)
 
-        # Create checksum
-        self.checksum = data.hashstring(
-            '{}{}'.format(self.key, self.data_type))
-
     def __repr__(self):
         """Return a representation of the attributes of the class.
 
@@ -232,6 +248,32 @@ class DataPoint():
         )
         return result
 
+    @property
+    def checksum(self):
+        """Get the checksum of the DataPoint.
+
+        The checksum is created from self.key, self.data_type and the
+        metadata added with update_checksum set to True, the first time it
+        is needed.
+
+        Args:
+            None
+
+        Returns:
+            result: Checksum
+
+        """
+        # Create checksum
+        if self._checksum is None:
+            seed = (self.key, self.data_type)
+            for key in self._checksum_keys:
+                seed += (key, self.metadata[key])
+            self._checksum = _checksum(seed)
+
+        # Return
+        result = self._checksum
+        return result
+
     def add(self, items):
         """Add DataPointMetadata to the internal self.metadata list.
 
@@ -247,6 +289,7 @@ class DataPoint():
             items = [items]
 
         # Only append approved data types
+        keys = self._checksum_keys
         for item in items:
             if isinstance(item, Metadata) is True:
                 # Ignore invalid values
@@ -254,17 +297,259 @@ class DataPoint():
                     continue
 
                 # Process
-                if item.key not in self._metakeys:
+                if item.key not in self.metadata:
                     self.metadata[item.key] = item.value
-                    self._metakeys.append(item.key)
                     if bool(item.update_checksum) is True:
-                        self.checksum = data.hashstring('''\
-{}{}{}'''.format(self.checksum, item.key, item.value))
+                        keys += (item.key,)
+
+        # Update the keys used to create the checksum
+        if keys != self._checksum_keys:
+            self._checksum_keys = _CHECKSUM_KEYS.setdefault(keys, keys)
+            self._checksum = None
+
+
+class DataPointBatch():
+    """Columns of DataPoints retreived from a target.
+
+    Stores the keys, values and timestamps of DataPoints that share a
+    data_type and metadata in columns, rather than in a DataPoint object
+    each. Columns are validated as a whole. Values are kept in arrays when
+    they are all integers or all floats.
+
+    """
+
+    __slots__ = (
+        'data_type', 'keys', 'values', 'timestamps', 'metadata', 'valid',
+        '_metadata', '_keys', '_checksums')
+
+    def __init__(self, data_type=DATA_INT):
+        """Initialize the class.
+
+        Args:
+            data_type: This MUST be one of the types listed in constants.py
+
+        Returns:
+            None
+
+        Variables:
+            self.keys: List of DataPoint keys
+            self.values: Array or list of DataPoint values
+            self.timestamps: Array of DataPoint timestamps in milliseconds
+            self.metadata: Metadata dict of all the DataPoints
+            self.valid: True if the object contains DataPoints
+
+        """
+        # Initialize variables
+        self.data_type = data_type
+        self.keys = []
+        self.values = array('q')
+        self.timestamps = array('q')
+        self.metadata = {}
+        self.valid = False
+
+        # Metadata objects added, keys added and cached checksums
+        self._metadata = []
+        self._keys = set()
+        self._checksums = None
+
+    def __len__(self):
+        """Get the number of DataPoints.
+
+        Args:
+            None
+
+        Returns:
+            result: Number of DataPoints
+
+        """
+        # Return
+        result = len(self.keys)
+        return result
+
+    def __repr__(self):
+        """Return a representation of the attributes of the class.
+
+        Args:
+            None
+
+        Returns:
+            result: String representation.
+
+        """
+        # Return
+        result = ('<{} data_type={}, datapoints={}, valid={}>'.format(
+            self.__class__.__name__, repr(self.data_type), len(self),
+            repr(self.valid)))
+        return result
+
+    def extend(self, keys, values, timestamp=None):
+        """Add DataPoints.
+
+        DataPoints with invalid keys or values, or with keys that have
+        already been added, are ignored.
+
+        Args:
+            keys: List of DataPoint keys
+            values: List of DataPoint values, one for each key
+            timestamp: Integer EPOCH timestamp in milliseconds of all the
+                values. The current time is used if None.
+
+        Returns:
+            None
+
+        """
+        # Ignore invalid data
+        if False in [
+                self.data_type in [
+                    DATA_INT, DATA_FLOAT, DATA_COUNT64, DATA_COUNT,
+                    DATA_STRING],
+                isinstance(self.data_type, bool) is False,
+                len(keys) == len(values)]:
+            return
+
+        # Round timestamp to the nearest millisecond.
+        if data.is_numeric(timestamp) is False:
+            timestamp = int(round(time(), 3) * 1000)
+        else:
+            timestamp = int(timestamp)
+
+        # Validate whole columns. Fall back to validating each DataPoint.
+        columns = _datapoint_columns(keys, values, self.data_type)
+        if columns is None or self._keys.isdisjoint(columns[0]) is False:
+            columns = self._datapoint_rows(keys, values)
+        (keys, values) = columns
+        if bool(keys) is False:
+            return
+
+        # Append to the columns. Values that don't fit the array of the
+        # column are stored in a list.
+        self.keys.extend(keys)
+        self._keys.update(keys)
+        if bool(self.values) is False:
+            self.values = values
+        elif isinstance(self.values, array) is True and isinstance(
+                values, array) is True and (
+                    self.values.typecode == values.typecode):
+            self.values.extend(values)
+        else:
+            self.values = list(self.values)
+            self.values.extend(values)
+        self.timestamps.extend(array('q', [timestamp]) * len(keys))
+        self._checksums = None
+        self.valid = True
+
+    def add(self, items):
+        """Add DataPointMetadata to all the DataPoints.
+
+        Args:
+            items: A DataPointMetadata object list
+
+        Returns:
+            None
+
+        """
+        # Ensure there is a list of objects
+        if isinstance(items, list) is False:
+            items = [items]
+
+        # Only append approved data types
+        for item in items:
+            if isinstance(item, Metadata) is True:
+                # Ignore invalid values
+                if item.valid is False or item.key in DATAPOINT_KEYS:
+                    continue
+
+                # Process
+                if item.key not in self.metadata:
+                    self.metadata[item.key] = item.value
+                    self._metadata.append(item)
+                    self._checksums = None
+
+    def checksums(self):
+        """Get the checksums of the DataPoints.
+
+        Checksums are the same as those of the equivalent DataPoint objects.
+
+        Args:
+            None
+
+        Returns:
+            result: List of checksums in the order of self.keys
+
+        """
+        # Return cached checksums
+        if self._checksums is not None:
+            return self._checksums
+
+        # Create checksums
+        metadata = ()
+        for item in self._metadata:
+            if bool(item.update_checksum) is True:
+                metadata += (item.key, item.value)
+        result = [
+            _checksum((key, self.data_type) + metadata) for key in self.keys]
+        self._checksums = result
+        return result
+
+    def datapoints(self):
+        """Create a DataPoint object for each DataPoint.
+
+        Args:
+            None
+
+        Returns:
+            result: List of DataPoint objects
+
+        """
+        # Initialize key variables
+        result = []
+
+        # Create DataPoints
+        for (key, value, timestamp) in zip(
+                self.keys, self.values, self.timestamps):
+            datapoint = DataPoint(
+                key, value, data_type=self.data_type, timestamp=timestamp)
+            datapoint.add(self._metadata)
+            result.append(datapoint)
+        return result
+
+    def _datapoint_rows(self, keys, values):
+        """Validate DataPoints one at a time.
+
+        Args:
+            keys: List of DataPoint keys
+            values: List of DataPoint values
+
+        Returns:
+            result: Tuple of (valid keys, their values)
+
+        """
+        # Initialize key variables
+        _keys = []
+        _values = []
+        added = set(self._keys)
+
+        # Validate
+        for (key, value) in zip(keys, values):
+            datapoint = DataPoint(key, value, data_type=self.data_type)
+            if datapoint.valid is False or datapoint.key in added:
+                continue
+            _keys.append(datapoint.key)
+            _values.append(datapoint.value)
+            added.add(datapoint.key)
+
+        # Return
+        result = (_keys, _values)
+        return result
 
 
 class PostingDataPoints():
     """Object defining DataPoint objects to post to the pattoo server."""
 
+    __slots__ = (
+        'pattoo_agent_id', 'pattoo_agent_polling_interval',
+        'pattoo_datapoints', 'pattoo_timestamp', 'valid')
+
     def __init__(self, agent_id, polling_interval, datapoints):
         """Initialize the class.
 
@@ -312,6 +597,8 @@ class TargetDataPoints():
 
     """
 
+    __slots__ = ('data', 'target', 'valid', '_checksums')
+
     def __init__(self, target):
         """Initialize the class.
 
@@ -330,7 +617,9 @@ class TargetDataPoints():
         self.data = []
         self.target = target
         self.valid = False
-        self._checksums = []
+
+        # DataPoints keyed by checksum
+        self._checksums = {}
 
     def __repr__(self):
         """Return a representation of the attributes of the class.
@@ -366,15 +655,63 @@ class TargetDataPoints():
         if isinstance(items, list) is False:
             items = [items]
 
+        # Add
+        self.extend(items)
+
+    def extend(self, items):
+        """Append DataPoints to the internal self.data list.
+
+        Args:
+            items: Iterable of DataPoint and DataPointBatch objects
+
+        Returns:
+            None
+
+        """
         # Only add DataPoint objects that are not duplicated
         for item in items:
             if isinstance(item, DataPoint) is True:
-                if item.checksum not in self._checksums:
+                checksum = item.checksum
+                if checksum not in self._checksums:
                     self.data.append(item)
-                    self._checksums.append(item.checksum)
+                    self._checksums[checksum] = item
 
-                # Set object as being.valid
-                self.valid = False not in [bool(self.data), bool(self.target)]
+            # DataPointBatch objects drop their own duplicates
+            elif isinstance(item, DataPointBatch) is True:
+                if item.valid is True:
+                    self.data.append(item)
+
+        # Set object as being.valid
+        self.valid = False not in [bool(self.data), bool(self.target)]
+
+    def merge(self, other):
+        """Append the DataPoints of another object for the same target.
+
+        Args:
+            other: TargetDataPoints object
+
+        Returns:
+            None
+
+        """
+        # Only merge objects of the same target
+        if isinstance(other, TargetDataPoints) is True:
+            if other.target == self.target:
+                self.extend(other.data)
+
+    def get(self, checksum):
+        """Get a DataPoint by its checksum.
+
+        Args:
+            checksum: DataPoint checksum
+
+        Returns:
+            result: DataPoint object. None if not found.
+
+        """
+        # Return
+        result = self._checksums.get(checksum)
+        return result
 
 
 class AgentPolledData():
@@ -385,6 +722,10 @@ class AgentPolledData():
 
     """
 
+    __slots__ = (
+        'agent_program', 'agent_hostname', 'agent_timestamp', 'data',
+        'valid', 'agent_polling_interval', 'agent_id')
+
     def __init__(self, agent_program, polling_interval):
         """Initialize the class.
 
@@ -402,7 +743,7 @@ class AgentPolledData():
         """
         # Initialize key variables
         self.agent_program = agent_program
-        self.agent_hostname = socket.getfqdn()
+        self.agent_hostname = sys.intern(socket.getfqdn())
         self.agent_timestamp = int(time() * 1000)
         self.data = []
         self.valid = False
@@ -470,6 +811,8 @@ polling_interval={5}, valid={6}>\
 class AgentAPIVariable():
     """Variable representation for data required by the AgentAPI."""
 
+    __slots__ = ('ip_bind_port', 'ip_listen_address')
+
     def __init__(self, ip_bind_port=20201, ip_listen_address='0.0.0.0'):
         """Initialize the class.
 
@@ -508,6 +851,8 @@ class AgentAPIVariable():
 class PollingPoint():
     """Object used to track data to be polled."""
 
+    __slots__ = ('address', 'multiplier', 'valid', 'checksum')
+
     def __init__(self, address=None, multiplier=1):
         """Initialize the class.
 
@@ -557,6 +902,8 @@ class TargetPollingPoints():
 
     """
 
+    __slots__ = ('data', 'target', 'valid', '_checksums')
+
     def __init__(self, target):
         """Initialize the class.
 
@@ -576,7 +923,9 @@ class TargetPollingPoints():
         self.data = []
         self.target = target
         self.valid = False
-        self._checksums = []
+
+        # PollingPoints keyed by checksum
+        self._checksums = {}
 
     def __repr__(self):
         """Return a representation of the attributes of the class.
@@ -612,6 +961,22 @@ class TargetPollingPoints():
         if isinstance(items, list) is False:
             items = [items]
 
+        # Add
+        self.extend(items)
+
+    def extend(self, items):
+        """Append PollingPoints to the internal self.data list.
+
+        Args:
+            items: Iterable of PollingPoint objects
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        polled = False
+
         # Only add PollingPoint objects that are not duplicated
         for item in items:
             if isinstance(item, PollingPoint) is True:
@@ -620,11 +985,57 @@ class TargetPollingPoints():
                     continue
 
                 # Add data to the list
+                polled = True
                 if item.checksum not in self._checksums:
                     self.data.append(item)
+                    self._checksums[item.checksum] = item
 
-                # Set object as being.valid
-                self.valid = False not in [bool(self.data), bool(self.target)]
+        # Set object as being.valid
+        if polled is True:
+            self.valid = self._valid()
+
+    def merge(self, other):
+        """Append the PollingPoints of another object for the same target.
+
+        Args:
+            other: TargetPollingPoints object
+
+        Returns:
+            None
+
+        """
+        # Only merge objects of the same target
+        if isinstance(other, TargetPollingPoints) is True:
+            if other.target == self.target:
+                self.extend(other.data)
+
+    def get(self, checksum):
+        """Get a PollingPoint by its checksum.
+
+        Args:
+            checksum: PollingPoint checksum
+
+        Returns:
+            result: PollingPoint object. None if not found.
+
+        """
+        # Return
+        result = self._checksums.get(checksum)
+        return result
+
+    def _valid(self):
+        """Determine whether the object is valid.
+
+        Args:
+            None
+
+        Returns:
+            result: True if valid
+
+        """
+        # Return
+        result = False not in [bool(self.data), bool(self.target)]
+        return result
 
 
 class IPTargetPollingPoints(TargetPollingPoints):
@@ -634,6 +1045,8 @@ class IPTargetPollingPoints(TargetPollingPoints):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, target):
         """Initialize the class.
 
@@ -652,34 +1065,96 @@ class IPTargetPollingPoints(TargetPollingPoints):
         # Inherit object
         TargetPollingPoints.__init__(self, target)
 
-    def add(self, items):
-        """Append PollingPoint to the internal self.data list.
+    def _valid(self):
+        """Determine whether the object is valid.
 
         Args:
-            items: A PollingPoint object list
+            None
 
         Returns:
-            None
+            result: True if valid
 
         """
-        # Ensure there is a list of objects
-        if isinstance(items, list) is False:
-            items = [items]
+        # Return
+        result = False not in [
+            bool(self.data), bool(network.get_ipaddress(self.target))]
+        return result
 
-        # Only add PollingPoint objects that are not duplicated
-        for item in items:
-            if isinstance(item, PollingPoint) is True:
-                # Ignore invalid values
-                if item.valid is False:
-                    continue
 
-                # Add data to the list
-                if item.checksum not in self._checksums:
-                    self.data.append(item)
+@lru_cache(maxsize=CHECKSUM_CACHE_SIZE)
+def _checksum(seed):
+    """Create the checksum of a DataPoint.
 
-                # Set object as being.valid
-                self.valid = False not in [
-                    bool(self.data), bool(network.get_ipaddress(self.target))]
+    Checksums are cached so that DataPoints polled again in later polling
+    cycles don't need to be hashed again.
+
+    Args:
+        seed: Tuple of (key, data_type, metadata key, metadata value, ...)
+            of the metadata that updates the checksum, in the order it was
+            added
+
+    Returns:
+        result: Checksum
+
+    """
+    # Hash the key and data_type, then each metadata key-value pair
+    result = data.hashstring('{}{}'.format(seed[0], seed[1]))
+    for index in range(2, len(seed), 2):
+        result = data.hashstring('{}{}{}'.format(
+            result, seed[index], seed[index + 1]))
+    return result
+
+
+def _datapoint_columns(keys, values, data_type):
+    """Validate and convert columns of DataPoint keys and values.
+
+    Only columns of valid, unique keys of the same type and values of the
+    same type are converted. Other columns must be validated one DataPoint
+    at a time.
+
+    Args:
+        keys: List of DataPoint keys
+        values: List of DataPoint values
+        data_type: data_type of the values
+
+    Returns:
+        result: Tuple of (keys, values). Values are an array if possible.
+            None if the columns weren't converted.
+
+    """
+    # Initialize key variables
+    key_types = set(map(type, keys))
+    value_types = set(map(type, values))
+
+    # Keys must be unique non-empty strings without 'pattoo'
+    if len(key_types) > 1 or bool(key_types - {str, int, float}) is True:
+        return None
+    keys = [sys.intern(str(key).lower().strip()) for key in keys]
+    if True in [
+            '' in keys,
+            len(set(keys)) != len(keys),
+            any('pattoo' in key for key in keys)]:
+        return None
+
+    # Convert values
+    if data_type == DATA_STRING and bool(
+            value_types - {str, int, float}) is False:
+        values = [str(value) for value in values]
+    elif value_types == {int}:
+        try:
+            values = array('q', values)
+        except OverflowError:
+            values = list(values)
+    elif value_types == {float}:
+        values = array('d', values)
+    elif bool(values) is False:
+        values = []
+    else:
+        return None
+
+    # Return
+    result = (keys, values)
+    return result
 
 
 def _strip_non_printable(value):
@@ -742,9 +1217,10 @@ def _key_value_valid(key, value, metadata=False, override=False):
         value is not None,
         ]
 
-    # Assign key, value
+    # Assign key, value. Keys and metadata values are interned as the same
+    # strings are used by many DataPoints.
     if valid is True:
-        key = str(key).lower().strip()
+        key = sys.intern(str(key).lower().strip())
 
         # Reevaluate valid
         valid = False not in [
@@ -760,7 +1236,7 @@ def _key_value_valid(key, value, metadata=False, override=False):
     # Assign values
     if valid is True:
         if bool(metadata) is True:
-            value = str(value).strip()
+            value = sys.intern(str(value).strip())
     else:
         key = None
         value = None
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare blocking and asyncio posting against a local stub API server."""
+
+# Standard imports
+import os
+import sys
+import time
+import argparse
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+from tests.libraries.server import StubAPIServer
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--posts', help='Number of payloads to post', type=int, default=200)
+    parser.add_argument(
+        '--delay', help='Seconds the stub server takes to respond',
+        type=float, default=0.01)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import aphttp
+    from pattoo_shared import phttp
+    from pattoo_shared import converter
+    from tests.libraries import general as ta
+
+    # Create data to post
+    agentdata = ta.test_agent()
+    identifier = agentdata.agent_id
+    data = converter.posting_data_points(
+        converter.agentdata_to_post(agentdata))
+
+    # Start a stub API server that takes time to respond
+    def callback(method, path, headers, body):
+        """Respond after a delay."""
+        time.sleep(args.delay)
+        return (200, b'OK', {})
+
+    server = StubAPIServer(callback=callback)
+    server.start()
+    url = '{}/pattoo/api/v1/agent/receive/{}'.format(server.url(), identifier)
+
+    # Time blocking posts
+    start = time.time()
+    for _ in range(args.posts):
+        phttp.post(url, data, identifier, save=False)
+    blocking = time.time() - start
+
+    # Time asyncio posts
+    items = []
+    for _ in range(args.posts):
+        item = aphttp.AsyncPost(identifier, data)
+        item._url = url
+        items.append(item)
+    start = time.time()
+    aphttp.post_all(items)
+    concurrent = time.time() - start
+    server.stop()
+
+    # Print
+    print('''\
+Posts                 : {}
+Server delay (s)      : {}
+phttp.post (s)        : {:.3f} ({:.1f} posts/s)
+aphttp.post_all (s)   : {:.3f} ({:.1f} posts/s)\
+'''.format(args.posts, args.delay,
+           blocking, args.posts / blocking,
+           concurrent, args.posts / concurrent))
+
+
+if __name__ == '__main__':
+    main()
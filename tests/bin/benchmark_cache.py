@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare the throughput of the agent cache backends."""
+
+# Standard imports
+import os
+import sys
+import time
+import argparse
+from unittest.mock import patch
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--payloads', help='Number of payloads to cache', type=int,
+        default=5000)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import cache
+    from pattoo_shared import converter
+    from pattoo_shared import data
+    from tests.libraries import general as ta
+    payload = converter.posting_data_points(
+        converter.agentdata_to_post(ta.test_agent()))
+
+    # Time each backend
+    print('Payloads: {}'.format(args.payloads))
+    print('{:<10}{:>12}{:>12}{:>12}'.format(
+        'Backend', 'Save (s)', 'Read (s)', 'Remove (s)'))
+    for backend in ['files', 'spool', 'sqlite']:
+        identifier = data.hashstring('{}{}'.format(backend, time.time()))
+        with patch.object(
+                cache.Config, 'cache_backend', return_value=backend):
+            store = cache.store(identifier)
+
+            # Save
+            start = time.time()
+            for _ in range(args.payloads):
+                store.save(payload)
+            saved = time.time() - start
+
+            # Read
+            start = time.time()
+            keys = [entry.key for entry in store.entries()]
+            read = time.time() - start
+
+            # Remove
+            start = time.time()
+            for key in keys:
+                store.remove([key])
+            store.flush()
+            removed = time.time() - start
+
+        print('{:<10}{:>12.3f}{:>12.3f}{:>12.3f}'.format(
+            backend, saved, read, removed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare the pattoo JSON codec with the standard json library."""
+
+# Standard imports
+import os
+import sys
+import json
+import time
+import argparse
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+
+
+def _time(function, data, repeat):
+    """Get the average time taken to call a function.
+
+    Args:
+        function: Function to call
+        data: Argument for the function
+        repeat: Number of calls
+
+    Returns:
+        result: Average time in milliseconds
+
+    """
+    # Return
+    start = time.time()
+    for _ in range(repeat):
+        function(data)
+    result = (time.time() - start) * 1000 / repeat
+    return result
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--datapoints', help='Number of datapoints in the PostingDataPoints',
+        type=int, default=10000)
+    parser.add_argument(
+        '--repeat', help='Number of times to encode and decode',
+        type=int, default=20)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import codec
+    from pattoo_shared import converter
+    from pattoo_shared.variables import (
+        DataPoint, TargetDataPoints, AgentPolledData)
+    from pattoo_shared.constants import DATA_FLOAT
+
+    # Create data to post
+    agentdata = AgentPolledData('benchmark_agent', 300)
+    for target in range(10):
+        ddv = TargetDataPoints('target_{}'.format(target))
+        for item in range(args.datapoints // 10):
+            ddv.add(DataPoint(
+                'interface_counter_{}'.format(item), item * 1.5,
+                data_type=DATA_FLOAT))
+        agentdata.add(ddv)
+    data = converter.posting_data_points(
+        converter.agentdata_to_post(agentdata))
+    body = codec.encode(data)
+
+    # Time each library
+    print('Datapoints: {}, JSON bytes: {}, codec backend: {}'.format(
+        args.datapoints, len(body), codec.BACKEND))
+    print('{:<22}{:>14}{:>14}'.format('Library', 'Encode (ms)', 'Decode (ms)'))
+    print('{:<22}{:>14.2f}{:>14.2f}'.format(
+        'json',
+        _time(lambda _: json.dumps(_).encode(), data, args.repeat),
+        _time(json.loads, body, args.repeat)))
+    print('{:<22}{:>14.2f}{:>14.2f}'.format(
+        'pattoo_shared.codec',
+        _time(codec.encode, data, args.repeat),
+        _time(codec.decode, body, args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
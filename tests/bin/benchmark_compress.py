@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare the size and speed of compressed agent post bodies."""
+
+# Standard imports
+import os
+import sys
+import time
+import argparse
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--datapoints', help='Number of datapoints to post',
+        type=int, default=1000)
+    parser.add_argument(
+        '--repeat', help='Number of times to create each body',
+        type=int, default=20)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import compress
+    from pattoo_shared import converter
+    from pattoo_shared.variables import (
+        DataPoint, TargetDataPoints, AgentPolledData)
+    from pattoo_shared.constants import DATA_FLOAT
+
+    # Create data to post
+    agentdata = AgentPolledData('benchmark_agent', 300)
+    for target in range(10):
+        ddv = TargetDataPoints('target_{}'.format(target))
+        for item in range(args.datapoints // 10):
+            ddv.add(DataPoint(
+                'interface_counter_{}'.format(item % 20), item * 1.5,
+                data_type=DATA_FLOAT))
+        agentdata.add(ddv)
+    data = converter.posting_data_points(
+        converter.agentdata_to_post(agentdata))
+
+    # Time each encoding
+    print('{:<10}{:>12}{:>10}{:>14}'.format(
+        'Encoding', 'Bytes', 'Ratio', 'Time (ms)'))
+    (plain, _) = compress.json_body(data)
+    for encoding in [None, 'gzip', 'deflate']:
+        start = time.time()
+        for _ in range(args.repeat):
+            (body, _) = compress.json_body(data, encoding=encoding)
+        duration = (time.time() - start) / args.repeat
+        print('{:<10}{:>12}{:>10.2f}{:>14.2f}'.format(
+            str(encoding), len(body), len(plain) / len(body),
+            duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare the size of delta encoded posts with regular posts."""
+
+# Standard imports
+import os
+import sys
+import zlib
+import argparse
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--datapoints', help='Number of datapoints in each post',
+        type=int, default=10000)
+    parser.add_argument(
+        '--cycles', help='Number of polling cycles to post',
+        type=int, default=3)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import codec
+    from pattoo_shared import converter
+    from pattoo_shared import delta
+    from pattoo_shared.variables import (
+        DataPoint, DataPointMetadata, TargetDataPoints, AgentPolledData)
+    from pattoo_shared.constants import DATA_FLOAT
+
+    # Post data polled in each cycle
+    encoder = delta.Encoder()
+    print('Datapoints: {}'.format(args.datapoints))
+    print('{:<8}{:>14}{:>14}{:>14}{:>14}'.format(
+        'Cycle', 'JSON', 'Delta', 'JSON gzip', 'Delta gzip'))
+    for cycle in range(args.cycles):
+        # Create data to post
+        agentdata = AgentPolledData('benchmark_agent', 300)
+        for target in range(10):
+            ddv = TargetDataPoints('target_{}'.format(target))
+            for item in range(args.datapoints // 10):
+                datapoint = DataPoint(
+                    'interface_counter_{}'.format(item),
+                    (item + cycle) * 1.5, data_type=DATA_FLOAT)
+                datapoint.add(DataPointMetadata('department', 'finance'))
+                ddv.add(datapoint)
+            agentdata.add(ddv)
+        data = converter.posting_data_points(
+            converter.agentdata_to_post(agentdata))
+
+        # Encode
+        body = codec.encode(data)
+        delta_body = codec.encode(encoder.encode(data))
+        encoder.commit()
+        print('{:<8}{:>14}{:>14}{:>14}{:>14}'.format(
+            cycle, len(body), len(delta_body),
+            len(zlib.compress(body)), len(zlib.compress(delta_body))))
+
+
+if __name__ == '__main__':
+    main()
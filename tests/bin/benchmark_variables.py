@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Measure the memory used by DataPoint objects.
+
+The variables and converter modules of an older git revision are measured as
+a baseline. The memory used by the cache of DataPoint checksums is reported
+separately from the memory used by the DataPoint objects.
+
+"""
+
+# Standard imports
+import os
+import sys
+import types
+import argparse
+import subprocess
+import tracemalloc
+
+# Try to create a working PYTHONPATH
+DEV_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(DEV_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}bin'.format(os.sep)
+if DEV_DIR.endswith(_EXPECTED) is True:
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from tests.libraries.configuration import UnittestConfig
+
+# Revision before variables.py used __slots__ and interned strings
+BASELINE = '7ab5beb^'
+
+
+def _bytes(function, *args, cache=None):
+    """Get the memory still allocated after calling a function.
+
+    Args:
+        function: Function to call
+        args: Arguments for the function
+        cache: Function wrapped by functools.lru_cache. It is cleared after
+            calling the function to measure the memory it used. None if
+            there is no cache.
+
+    Returns:
+        result: Tuple of (bytes allocated outside the cache, bytes
+            allocated by the cache, function result)
+
+    """
+    # Initialize key variables
+    cached = 0
+
+    # Measure
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = function(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    if cache is not None:
+        cache.cache_clear()
+        cached = after - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Return
+    result = (after - before - cached, cached, value)
+    return result
+
+
+def _modules(revision):
+    """Import the variables and converter modules of a git revision.
+
+    Args:
+        revision: git revision
+
+    Returns:
+        result: Tuple of (variables module, converter module). None if the
+            revision can't be read.
+
+    """
+    # Initialize key variables
+    names = ['pattoo_shared.variables', 'pattoo_shared.converter']
+    current = [sys.modules[name] for name in names]
+    modules = []
+
+    # The converter module must import the variables module of the revision
+    try:
+        for name in names:
+            source = subprocess.check_output(
+                ['git', 'show', '{}:{}.py'.format(
+                    revision, os.path.join(*name.split('.')))],
+                cwd=ROOT_DIR, stderr=subprocess.DEVNULL)
+            module = types.ModuleType(name)
+            module.__package__ = 'pattoo_shared'
+            sys.modules[name] = module
+            exec(compile(source, '{}:{}'.format(revision, name), 'exec'),
+                 module.__dict__)
+            modules.append(module)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    finally:
+        for (name, module) in zip(names, current):
+            sys.modules[name] = module
+
+    # Return
+    result = tuple(modules)
+    return result
+
+
+def _measure(variables, converter, datapoints, targets):
+    """Measure the memory used to poll and convert datapoints.
+
+    Args:
+        variables: variables module
+        converter: converter module
+        datapoints: Number of datapoints polled by the agent
+        targets: Number of targets polled by the agent
+
+    Returns:
+        result: Dict of bytes per datapoint keyed by step
+
+    """
+    # Initialize key variables
+    cache = getattr(variables, '_checksum', None)
+    if cache is not None:
+        cache.cache_clear()
+
+    def poll():
+        """Create the datapoints polled by an agent.
+
+        Metadata strings are created for each datapoint, as they would be
+        when parsing the data of a target.
+
+        """
+        # Create data
+        agentdata = variables.AgentPolledData('benchmark_agent', 300)
+        for target in range(targets):
+            ddv = variables.TargetDataPoints('target_{}'.format(target))
+            for item in range(datapoints // targets):
+                datapoint = variables.DataPoint(
+                    'interface_counter_{}'.format(item % 100), item)
+                datapoint.add([
+                    variables.DataPointMetadata(
+                        'department', ' '.join(['finance'])),
+                    variables.DataPointMetadata(
+                        'interface', 'ifindex_{}'.format(item)),
+                    variables.DataPointMetadata(
+                        'target', 'target_{}'.format(target))
+                ])
+                ddv.add(datapoint)
+            agentdata.add(ddv)
+        return agentdata
+
+    # Measure
+    (polled, polled_cache, agentdata) = _bytes(poll, cache=cache)
+    (converted, converted_cache, _) = _bytes(
+        converter.agentdata_to_datapoints, agentdata, cache=cache)
+
+    # Return
+    count = sum(len(_.data) for _ in agentdata.data)
+    result = {
+        'Polled DataPoints': polled / count,
+        'converter.agentdata_to_datapoints': converted / count,
+        'Checksum cache': (polled_cache + converted_cache) / count
+    }
+    result['Total'] = sum(result.values())
+    return result
+
+
+def main():
+    """Run the benchmark.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Set up parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--datapoints', help='Number of datapoints polled by the agent',
+        type=int, default=50000)
+    parser.add_argument(
+        '--targets', help='Number of targets polled by the agent',
+        type=int, default=10)
+    parser.add_argument(
+        '--baseline', help='git revision to compare with',
+        default=BASELINE)
+    args = parser.parse_args()
+
+    # Create a configuration before importing libraries that need it
+    UnittestConfig().create()
+    from pattoo_shared import converter
+    from pattoo_shared import variables
+
+    # Measure
+    optimized = _measure(variables, converter, args.datapoints, args.targets)
+    modules = _modules(args.baseline)
+    if modules is None:
+        baseline = {}
+    else:
+        baseline = _measure(
+            modules[0], modules[1], args.datapoints, args.targets)
+
+    # Print
+    print('Datapoints: {}, Python: {}, Checksum cache size: {}'.format(
+        args.datapoints, sys.version.split()[0],
+        variables.CHECKSUM_CACHE_SIZE))
+    print('Bytes per datapoint. Baseline is revision {}.'.format(
+        args.baseline))
+    print('{:<36}{:>12}{:>12}'.format('Step', 'Baseline', 'Optimized'))
+    for (step, value) in optimized.items():
+        print('{:<36}{:>12}{:>12.1f}'.format(
+            step, '{:.1f}'.format(baseline[step]) if (
+                step in baseline) else 'n/a', value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Stub pattoo API server used for testing and benchmarking."""
+
+# Standard imports
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Multi-threaded HTTP server."""
+
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handle requests made to the StubAPIServer."""
+
+    # Allow persistent connections
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """Process GET requests."""
+        self._process()
+
+    def do_POST(self):
+        """Process POST requests."""
+        self._process()
+
+    def log_message(self, *args):
+        """Don't log requests to STDERR."""
+        pass
+
+    def _process(self):
+        """Record the request and respond using the server's callback."""
+        # Read request
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        headers = dict(self.headers.items())
+        with self.server.lock:
+            self.server.requests.append(
+                (self.command, self.path, headers, body))
+
+        # Respond
+        (status, content, extra) = self.server.callback(
+            self.command, self.path, headers, body)
+        self.send_response(status)
+        for key, value in sorted(extra.items()):
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def _accept(method, path, headers, body):
+    """Accept everything.
+
+    Args:
+        method: HTTP method
+        path: URL path
+        headers: Dict of request headers
+        body: Request body
+
+    Returns:
+        result: Tuple of (status, response body, dict of response headers)
+
+    """
+    # Return
+    result = (200, b'OK', {})
+    return result
+
+
+class StubAPIServer():
+    """Stub pattoo API server running in a background thread."""
+
+    def __init__(self, callback=None, address='127.0.0.1', port=0):
+        """Initialize the class.
+
+        Args:
+            callback: Function that receives (method, path, headers, body)
+                and returns (status, response body, dict of response
+                headers). The default accepts all requests with HTTP 200.
+            address: IP address to listen on
+            port: TCP port to listen on. 0 selects an unused port.
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._server = _Server((address, port), _Handler)
+        self._server.callback = callback or _accept
+        self._server.requests = []
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    def url(self):
+        """Get the base URL of the server.
+
+        Args:
+            None
+
+        Returns:
+            result: URL
+
+        """
+        # Return
+        (address, port) = self._server.server_address[:2]
+        result = 'http://{}:{}'.format(address, port)
+        return result
+
+    def received(self):
+        """Get the requests received by the server.
+
+        Args:
+            None
+
+        Returns:
+            result: List of (method, path, headers, body) tuples
+
+        """
+        # Return
+        with self._server.lock:
+            result = list(self._server.requests)
+        return result
+
+    def start(self):
+        """Start the server.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Start
+        self._thread.start()
+
+    def stop(self):
+        """Stop the server.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Stop
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Test the aphttp module."""
+
+# Standard imports
+import json
+import hashlib
+import uuid
+import os
+import random
+import tempfile
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import aphttp
+from pattoo_shared import phttp
+from pattoo_shared import cache
+from pattoo_shared import converter
+from pattoo_shared import encrypt
+from tests.libraries.configuration import UnittestConfig
+from tests.libraries.server import StubAPIServer
+from tests.libraries import general as ta
+
+
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    # Create agent data
+    agentdata = ta.test_agent()
+
+    # Get agent variables
+    identifier = agentdata.agent_id
+    _data = converter.agentdata_to_post(agentdata)
+    data = converter.posting_data_points(_data)
+
+    # Initialize encrytion keys
+    encrypt_agt = encrypt.Encryption(
+        hashlib.md5('{}'.format(random.random()).encode()).hexdigest(),
+        tempfile.mkdtemp()
+    )
+    encrypt_api = encrypt.Encryption(
+        hashlib.md5('{}'.format(random.random()).encode()).hexdigest(),
+        tempfile.mkdtemp()
+    )
+
+    def setUp(self):
+        """Start a stub API server."""
+        self.server = StubAPIServer()
+        self.server.start()
+        self.url = '{}/pattoo/api/v1/agent/receive/{}'.format(
+            self.server.url(), self.identifier)
+
+    def tearDown(self):
+        """Stop the stub API server."""
+        self.server.stop()
+
+    def test_post(self):
+        """Testing method or function named post."""
+        # Test
+        success = aphttp.run(
+            aphttp.post(self.url, self.data, self.identifier))
+        self.assertTrue(success)
+        received = self.server.received()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(
+            json.loads(received[0][3].decode()),
+            json.loads(json.dumps(self.data)))
+
+        # Nothing to post
+        success = aphttp.run(aphttp.post(self.url, {}, self.identifier))
+        self.assertFalse(success)
+
+    def test_executor(self):
+        """Testing function executor."""
+        # The same object is used by the process
+        result = aphttp.executor()
+        self.assertIs(result, aphttp.executor())
+
+        # Posts are made in other threads
+        thread = aphttp.run(aphttp._call(threading.get_ident))
+        self.assertNotEqual(thread, threading.get_ident())
+
+    def test_post_all(self):
+        """Testing method or function named post_all."""
+        # Initialize key variables
+        items = []
+        for _ in range(5):
+            item = aphttp.AsyncPost(self.identifier, self.data)
+            item._url = self.url
+            items.append(item)
+
+        # Test
+        result = aphttp.post_all(items)
+        self.assertEqual(result, [True] * 5)
+        self.assertEqual(len(self.server.received()), 5)
+
+    def test_purge(self):
+        """Testing method or function named purge."""
+        # Save data to cache. Duplicates aren't cached.
+        for value in range(3):
+            phttp._save_data(
+                dict(self.data, pattoo_agent_timestamp=value),
+                self.identifier)
+        self.assertTrue(bool(cache.FileStore(
+            self.identifier).filepaths()))
+
+        # Test
+        aphttp.run(aphttp.purge(self.url, self.identifier))
+        self.assertFalse(bool(cache.FileStore(
+            self.identifier).filepaths()))
+        self.assertTrue(len(self.server.received()) >= 3)
+
+    def test_purge_workers(self):
+        """Testing function purge with many purge workers."""
+        # Save data to cache
+        identifier = 'aphttp_{}'.format(uuid.uuid4().hex)
+        store = cache.FileStore(identifier)
+        for value in range(10):
+            store.save(dict(self.data, pattoo_agent_timestamp=value))
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_purge_workers', return_value=3):
+            aphttp.run(aphttp.purge(self.url, identifier))
+        self.assertEqual(store.filepaths(), [])
+        self.assertEqual(len(self.server.received()), 10)
+
+        # Nothing is read if the server isn't accepting data
+        store.save(self.data)
+        with patch.object(
+                phttp.CircuitBreaker, 'blocked', return_value=True):
+            aphttp.run(aphttp.purge(self.url, identifier))
+        self.assertEqual(len(self.server.received()), 10)
+        self.assertEqual(len(store.filepaths()), 1)
+
+    def test_post_retry(self):
+        """Testing AsyncPost.post with temporary server errors."""
+        # Initialize key variables
+        self.server.stop()
+        responses = [(503, b'Busy', {'Retry-After': '0'}), (200, b'OK', {})]
+        self.server = StubAPIServer(
+            callback=lambda *args: responses.pop(0))
+        self.server.start()
+        item = aphttp.AsyncPost(self.identifier, self.data)
+        item._url = '{}/test'.format(self.server.url())
+
+        # Test
+        self.assertTrue(aphttp.run(item.post()))
+        self.assertEqual(len(self.server.received()), 2)
+
+    def test_post_delta(self):
+        """Testing AsyncPost.post with delta encoding."""
+        # Initialize key variables
+        item = aphttp.AsyncPost(self.identifier, self.data)
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_delta_encoding', return_value=True):
+            with patch.object(
+                    phttp, 'post_delta', return_value=True) as mock_delta:
+                self.assertTrue(aphttp.run(item.post()))
+        mock_delta.assert_called_once_with(
+            item.config.agent_api_delta_url(self.identifier),
+            self.data, self.identifier)
+
+    def test_drain(self):
+        """Testing AsyncPost.drain."""
+        # Save data to cache
+        identifier = 'aphttp_{}'.format(uuid.uuid4().hex)
+        phttp._save_data(self.data, identifier)
+        item = aphttp.AsyncPost(identifier, self.data)
+        item._url = self.url
+
+        # Cached data is purged by a thread
+        thread = item.drain()
+        thread.join()
+        self.assertEqual(cache.FileStore(identifier).filepaths(), [])
+        self.assertEqual(len(self.server.received()), 1)
+
+    def test_purge_batch(self):
+        """Testing AsyncPost.purge with batches."""
+        # Initialize key variables
+        item = aphttp.AsyncPost(self.identifier, self.data)
+
+        # Cached data is posted in batches when batch_size is above 1
+        with patch.object(cache.Watcher, 'backlog', return_value=True):
+            with patch.object(phttp, 'purge_batch') as mock_batch:
+                with patch.object(phttp, 'purge') as mock_purge:
+                    with patch.object(
+                            aphttp.Config, 'agent_api_batch_size',
+                            return_value=10):
+                        aphttp.run(item.purge())
+        mock_batch.assert_called_once_with(
+            item.config.agent_api_batch_url(self.identifier),
+            self.identifier)
+        mock_purge.assert_not_called()
+
+    def test_purge_spool(self):
+        """Testing function purge with the spool cache backend."""
+        with patch.object(
+                phttp.Config, 'cache_backend', return_value='spool'):
+            # Save data to the spool
+            for value in range(3):
+                phttp._save_data(
+                    dict(self.data, pattoo_agent_timestamp=value),
+                    self.identifier)
+            store = cache.store(self.identifier)
+            self.assertEqual(len(list(store.entries())), 3)
+
+            # Test
+            received = len(self.server.received())
+            aphttp.run(aphttp.purge(self.url, self.identifier))
+            self.assertEqual(list(store.entries()), [])
+            self.assertEqual(len(self.server.received()) - received, 3)
+
+    def _encryption_server(self, state):
+        """Start a stub server with the pattoo API's encryption endpoints.
+
+        Args:
+            state: Dict to store the nonce and symmetric key in
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.server.stop()
+
+        def callback(method, path, headers, body):
+            """Emulate the pattoo API server's encryption endpoints."""
+            if path.endswith('/key') and method == 'POST':
+                json_dict = json.loads(json.loads(body.decode()))
+                self.encrypt_api.pimport(json_dict['pattoo_agent_key'])
+                self.encrypt_api.trust(self.encrypt_api.fingerprint(
+                    json_dict['pattoo_agent_email']))
+                return (202, b'Noted', {})
+
+            if path.endswith('/key'):
+                state['nonce'] = hashlib.sha256(
+                    str(uuid.uuid4()).encode()).hexdigest()
+                response = {
+                    'api_email': self.encrypt_api.email,
+                    'api_key': self.encrypt_api.pexport(),
+                    'encrypted_nonce': self.encrypt_api.encrypt(
+                        state['nonce'], self.encrypt_agt.fingerprint())
+                }
+                return (200, json.dumps(response).encode(), {})
+
+            if path.endswith('/validation'):
+                json_dict = json.loads(json.loads(body.decode()))
+                symmetric_key = self.encrypt_api.decrypt(
+                    json_dict['encrypted_sym_key'])
+                nonce = self.encrypt_api.sdecrypt(
+                    json_dict['encrypted_nonce'], symmetric_key)
+                if nonce != state['nonce']:
+                    return (409, b'Result', {})
+                state['symmetric_key'] = symmetric_key
+                return (200, b'Result', {})
+
+            json_dict = json.loads(json.loads(body.decode()))
+            decrypted = self.encrypt_api.sdecrypt(
+                json_dict['encrypted_data'], state['symmetric_key'])
+            if json.loads(decrypted)['data'] == json.loads(
+                    json.dumps(self.data)):
+                return (202, b'Noted', {})
+            return (409, b'Noted', {})
+
+        self.server = StubAPIServer(callback=callback)
+        self.server.start()
+
+    def test_encrypted_post(self):
+        """Testing key_exchange and encrypted_post."""
+        # Initialize key variables
+        self._encryption_server({})
+        base = '{}/pattoo/api/v1/agent'.format(self.server.url())
+
+        async def _post():
+            """Exchange keys and post."""
+            key = encrypt.generate_key(20)
+            session = phttp.transport().session()
+            success = await aphttp.key_exchange(
+                phttp._KeyExchange(
+                    encryption=self.encrypt_agt,
+                    session=session,
+                    key_exchange_url='{}/key'.format(base),
+                    symmetric_key_url='{}/validation'.format(base),
+                    symmetric_key=key))
+            if success is False:
+                return success
+            success = await aphttp.encrypted_post(
+                phttp._EncrypedPost(
+                    encryption=self.encrypt_agt,
+                    session=session,
+                    symmetric_key=key,
+                    encryption_url='{}/encrypted'.format(base),
+                    data=self.data,
+                    identifier=self.identifier))
+            return success
+
+        # Test
+        success = aphttp.run(_post())
+        self.assertTrue(success)
+        self.assertEqual(len(self.server.received()), 4)
+
+
+    def test_encrypted_session(self):
+        """Testing AsyncEncryptedPost with a cached encrypted session."""
+        # Initialize key variables
+        phttp.SESSIONS.clear()
+        self._encryption_server({})
+        base = '{}/pattoo/api/v1/agent'.format(self.server.url())
+        items = [aphttp.AsyncEncryptedPost(
+            self.identifier, self.data, self.encrypt_agt) for _ in range(3)]
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_key_url',
+                return_value='{}/key'.format(base)), patch.object(
+                    phttp.Config, 'agent_api_validation_url',
+                    return_value='{}/validation'.format(base)), patch.object(
+                        phttp.Config, 'agent_api_encrypted_url',
+                        return_value='{}/encrypted'.format(base)):
+            self.assertEqual(aphttp.post_all(items), [True] * 3)
+            self.assertTrue(aphttp.run(items[0].post()))
+
+        # Keys are only exchanged once
+        paths = [request[1] for request in self.server.received()]
+        self.assertEqual(paths.count('/pattoo/api/v1/agent/key'), 2)
+        self.assertEqual(paths.count('/pattoo/api/v1/agent/encrypted'), 4)
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
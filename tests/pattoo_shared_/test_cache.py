@@ -0,0 +1,837 @@
+#!/usr/bin/env python3
+"""Test the cache module."""
+
+# Standard imports
+import unittest
+import os
+import gzip
+import sys
+import sqlite3
+import tempfile
+from time import time, strftime, gmtime
+from unittest.mock import patch, Mock
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import cache
+from pattoo_shared import data
+from pattoo_shared.configuration import Config
+from tests.libraries.configuration import UnittestConfig
+
+
+def _identifier():
+    """Create a unique identifier for each test."""
+    return data.hashstring('{}'.format(time()))
+
+
+class TestFileStore(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_save(self):
+        """Testing method save."""
+        # Test
+        store = cache.FileStore(_identifier())
+        self.assertTrue(store.save({'Test': 0}))
+        self.assertTrue(store.save_many([{'Test': 1}, {'Test': 2}]))
+        self.assertEqual(len(store.filepaths()), 3)
+
+    def test_compression(self):
+        """Testing cache_compression."""
+        # Test
+        store = cache.FileStore(_identifier())
+        store.save({'Test': 0})
+        store.compression = 6
+        store.save({'Test': 1})
+        filepaths = store.filepaths()
+        self.assertTrue(filepaths[0].endswith('.json'))
+        self.assertTrue(filepaths[1].endswith('.json.gz'))
+        with open(filepaths[1], 'rb') as f_handle:
+            self.assertEqual(gzip.decompress(f_handle.read()), b'{"Test":1}')
+
+        # Both formats are read
+        result = list(store.entries())
+        self.assertEqual([_.data for _ in result], [{'Test': 0}, {'Test': 1}])
+
+        # Replaced files keep their format
+        store.compression = 0
+        store.overwrite(result[1].key, {'Test': 2})
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 0}, {'Test': 2}])
+        self.assertEqual(store.filepaths(), filepaths)
+
+    def test_entries(self):
+        """Testing method entries."""
+        # Test
+        store = cache.FileStore(_identifier())
+        for value in range(3):
+            store.save({'Test': value})
+        result = list(store.entries())
+        self.assertEqual([_.data for _ in result], [
+            {'Test': 0}, {'Test': 1}, {'Test': 2}])
+        self.assertEqual(
+            [_.key for _ in result],
+            [os.path.relpath(_, store.directory) for _ in store.filepaths()])
+
+        # Corrupted files are deleted
+        with open(store.filepaths()[0], 'w') as f_handle:
+            f_handle.write('{')
+        result = list(store.entries())
+        self.assertEqual(len(result), 2)
+        self.assertEqual(len(store.filepaths()), 2)
+
+        # Data can be read as JSON without being decoded
+        result = list(store.entries(decode=False))
+        self.assertEqual(
+            [_.data for _ in result], [b'{"Test":1}', b'{"Test":2}'])
+
+        # Truncated files are deleted when not decoded
+        with open(store.filepaths()[0], 'w') as f_handle:
+            f_handle.write('{"Test":')
+        result = list(store.entries(decode=False))
+        self.assertEqual([_.data for _ in result], [b'{"Test":2}'])
+        self.assertEqual(len(store.filepaths()), 1)
+
+    def test_remove(self):
+        """Testing method remove."""
+        # Test
+        store = cache.FileStore(_identifier())
+        for value in range(3):
+            store.save({'Test': value})
+        result = list(store.entries())
+        store.remove([result[0].key, result[2].key])
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 1}])
+
+    def test_shards(self):
+        """Testing sharding and methods migrate and remove."""
+        # Files saved by older versions are moved into shards, oldest first
+        identifier = _identifier()
+        directory = Config().agent_cache_directory(identifier)
+        for (timestamp, value) in [(1575789070210, 1), (1575700000000, 2)]:
+            with open(os.path.join(directory, '{}_{}.json'.format(
+                    timestamp, identifier)), 'w') as f_handle:
+                f_handle.write('{{"Test":{}}}'.format(value))
+        store = cache.FileStore(identifier)
+        result = list(store.entries())
+        self.assertEqual([_.data for _ in result], [{'Test': 2}, {'Test': 1}])
+        self.assertEqual(os.path.dirname(result[0].key), '2019120706')
+        self.assertEqual(os.path.dirname(result[1].key), '2019120807')
+        self.assertEqual(store.migrate(), 0)
+
+        # Files are saved in the shard of the hour
+        store.save({'Test': 0})
+        filepath = store.filepaths()[-1]
+        self.assertEqual(
+            os.path.basename(os.path.dirname(filepath)),
+            strftime('%Y%m%d%H', gmtime()))
+
+        # Day shards
+        store.shard = 'day'
+        store.save({'Test': 3})
+        self.assertIn(
+            strftime('%Y%m%d00', gmtime()),
+            [os.path.dirname(_.key) for _ in store.entries()])
+
+        # Empty shards are deleted, except the current one
+        store.remove([_.key for _ in store.entries()])
+        self.assertEqual(store.filepaths(), [])
+        self.assertEqual(store._shards(), [strftime('%Y%m%d00', gmtime())])
+
+    def test_manifest(self):
+        """Testing the manifest and method pending."""
+        # Test
+        identifier = _identifier()
+        store = cache.FileStore(identifier)
+        store.save_many([{'Test': value} for value in range(3)])
+        self.assertEqual(store.pending(), (3, 30))
+
+        # The manifest is read after restarting, without reading the files
+        store = cache.FileStore(identifier)
+        with patch.object(store, '_filepaths') as _filepaths:
+            self.assertEqual(store.pending(), (3, 30))
+            self.assertEqual(len(list(store.entries())), 3)
+            _filepaths.assert_not_called()
+
+        # Files other processes may still be writing aren't added to the
+        # manifest, so they aren't deleted as corrupted
+        with patch.object(cache.manifest.Manifest, 'add'):
+            store.save({'Test': 3})
+        filepath = sorted(store._filepaths())[-1]
+        with open(filepath, 'rb') as f_handle:
+            payload = f_handle.read()
+        with open(filepath, 'wb') as f_handle:
+            f_handle.write(payload[:5])
+        store = cache.FileStore(identifier)
+        self.assertEqual(store.pending(), (3, 30))
+        self.assertEqual(len(list(store.entries())), 3)
+        self.assertTrue(os.path.isfile(filepath))
+
+        # Files saved before a crash are added to the manifest
+        with open(filepath, 'wb') as f_handle:
+            f_handle.write(payload)
+        timestamp = time() - cache._GRACE_PERIOD - 1
+        os.utime(filepath, (timestamp, timestamp))
+        store = cache.FileStore(identifier)
+        self.assertEqual(store.pending(), (4, 40))
+
+        # Missing files are dropped from the manifest
+        os.remove(store.filepaths()[0])
+        self.assertEqual(
+            [_.data for _ in store.entries()],
+            [{'Test': 1}, {'Test': 2}, {'Test': 3}])
+        self.assertEqual(store.pending(), (3, 30))
+
+        # Stores sharing a manifest see each other's changes
+        other = cache.FileStore(identifier)
+        other.remove([_.key for _ in other.entries()][:2])
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 3}])
+
+    def test_contains(self):
+        """Testing method contains."""
+        # Test
+        store = cache.FileStore(_identifier())
+        store.save({'Test': 0})
+        key = cache.digest(b'{"Test":0}')
+        self.assertTrue(store.contains(key))
+        self.assertFalse(store.contains(cache.digest(b'{"Test":1}')))
+
+        # Digests are read from the manifest after restarting
+        store = cache.FileStore(store.identifier)
+        self.assertTrue(store.contains(key))
+        store.remove([_.key for _ in store.entries()])
+        self.assertFalse(store.contains(key))
+
+    def test_claims(self):
+        """Testing methods entries, release, lock and unlock with claims."""
+        # Initialize key variables. Each store stands in for a process.
+        identifier = _identifier()
+        store = cache.FileStore(identifier)
+        other = cache.FileStore(identifier)
+        store.save_many([{'Test': value} for value in range(3)])
+
+        # Claimed files are skipped by all other purgers
+        self.assertTrue(store.lock())
+        result = list(store.entries(claim=True))
+        self.assertEqual(len(result), 3)
+        self.assertEqual(list(store.entries(claim=True)), [])
+        self.assertEqual(list(other.entries(claim=True)), [])
+        self.assertEqual(len(list(other.entries())), 3)
+
+        # Released files can be claimed again
+        store.release([result[0].key])
+        store.remove([result[1].key])
+        self.assertEqual(
+            [_.data for _ in other.entries(claim=True)], [{'Test': 0}])
+
+        # Replaced files stay claimed until the purger unlocks the store
+        self.assertTrue(store.overwrite(result[2].key, {'Test': 3}))
+        self.assertEqual(list(other.entries(claim=True)), [])
+        store.unlock()
+        self.assertEqual(
+            [_.data for _ in other.entries(claim=True)], [{'Test': 3}])
+
+        # Missing files are dropped from the manifest
+        other.unlock()
+        os.remove(os.path.join(store.directory, result[0].key))
+        self.assertEqual(
+            [_.data for _ in store.entries(claim=True)], [{'Test': 3}])
+        self.assertEqual(store.pending()[0], 1)
+        store.unlock()
+
+    def test_overwrite(self):
+        """Testing methods overwrite and usage."""
+        # Test
+        store = cache.FileStore(_identifier())
+        store.save_many([{'Test': value} for value in range(3)])
+        self.assertEqual(store.usage(), 30)
+        result = list(store.entries())
+        self.assertEqual(store.overwrite(result[0].key, {'Test': 10}), 11)
+        self.assertEqual([_.data for _ in store.entries()], [
+            {'Test': 10}, {'Test': 1}, {'Test': 2}])
+        self.assertEqual(store.usage(), 31)
+
+    def test_evict(self):
+        """Testing method evict."""
+        # Nothing is evicted without quotas
+        store = cache.FileStore(_identifier())
+        store.save_many([{'Test': value} for value in range(10)])
+        self.assertEqual(store.evict(), 0)
+
+        # Evict the oldest data
+        store.max_bytes = 75
+        self.assertEqual(store.evict(), 3)
+        self.assertEqual(store.evicted, 3)
+        self.assertEqual(
+            [_.data['Test'] for _ in store.entries()], list(range(3, 10)))
+
+        # Thin groups of the oldest data
+        store.max_bytes = 45
+        store.eviction = 'thin'
+        store.eviction_group = 2
+        self.assertEqual(store.evict(), 3)
+        self.assertEqual(
+            [_.data['Test'] for _ in store.entries()], [3, 5, 7, 9])
+
+        # Summaries larger than the data they replace are counted
+        store = cache.FileStore(_identifier())
+        store.save_many([{'Test': value} for value in range(10)])
+        store.max_bytes = 75
+        store.eviction = 'summarize'
+        store.eviction_group = 2
+        with patch.object(
+                cache.converter, 'summarize_cache',
+                return_value={'Test': 'xxxx'}):
+            self.assertEqual(store.evict(), 5)
+        self.assertEqual(store._usage, 75)
+        self.assertEqual(store.usage(), 75)
+
+        # Expired data is deleted
+        now = int(time() * 1000)
+        store = cache.FileStore(_identifier())
+        store.save_many([
+            {'pattoo_agent_timestamp': now - 20000},
+            {'pattoo_agent_timestamp': now}])
+        store.max_age = 10
+        self.assertEqual(store.evict(), 1)
+        self.assertEqual(len(store.filepaths()), 1)
+
+
+class TestSpoolStore(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_entries(self):
+        """Testing methods entries and remove."""
+        # Test
+        store = cache.SpoolStore(_identifier())
+        self.assertTrue(store.ordered)
+        self.assertTrue(store.save_many([{'Test': 0}, {'Test': 1}]))
+        self.assertTrue(store.save({'Test': 2}))
+        result = list(store.entries())
+        self.assertEqual([_.data for _ in result], [
+            {'Test': 0}, {'Test': 1}, {'Test': 2}])
+
+        # Records are committed up to the last key
+        store.remove([result[1].key])
+        store.flush()
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 2}])
+
+    def test_lock(self):
+        """Testing methods lock and unlock."""
+        # Test. Each store stands in for a process.
+        identifier = _identifier()
+        store = cache.SpoolStore(identifier)
+        other = cache.SpoolStore(identifier)
+        self.assertTrue(store.lock())
+        self.assertFalse(store.lock())
+        self.assertFalse(other.lock())
+        store.unlock()
+        self.assertTrue(other.lock())
+        other.unlock()
+
+    def test_evict(self):
+        """Testing methods usage and evict."""
+        # Test
+        store = cache.SpoolStore(_identifier())
+        store.save_many([{'Test': value} for value in range(5)])
+        self.assertEqual(store.usage(), 5 * 18)
+
+        # Only the oldest data can be evicted
+        store.max_bytes = 40
+        store.eviction = 'thin'
+        self.assertEqual(store.evict(), 3)
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 3}, {'Test': 4}])
+        self.assertEqual(store.pending(), (2, 2 * 18))
+
+    def test_evict_purge(self):
+        """Testing evict while the store is being purged."""
+        # Initialize key variables
+        store = cache.SpoolStore(_identifier())
+        store.save_many([{'Test': value} for value in range(5)])
+        store.max_bytes = 40
+
+        # Data is evicted after the purge has read it, then the purge
+        # commits the data it posted before the eviction commits
+        entries = store.entries()
+        purged = [next(entries) for _ in range(4)]
+        with patch.object(store, 'remove', wraps=store.remove) as mock_:
+            self.assertEqual(store.evict(), 3)
+            evicted = mock_.call_args[0][0]
+        entries.close()
+        store.remove([purged[-1].key])
+        store.remove(evicted)
+
+        # Purged data isn't read again
+        self.assertEqual([_.data for _ in store.entries()], [{'Test': 4}])
+
+
+class TestSQLiteStore(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test___init__(self):
+        """Testing method __init__."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        self.assertTrue(os.path.isfile(store.filepath))
+        connection = sqlite3.connect(store.filepath)
+        indexes = [_[1] for _ in connection.execute(
+            'PRAGMA index_list(cache)').fetchall()]
+        self.assertIn('cache_agent_id_timestamp', indexes)
+        connection.close()
+
+    def test_entries(self):
+        """Testing methods save_many and entries."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        store.page = 2
+        self.assertTrue(store.save_many(
+            [{'Test': value} for value in range(4)]))
+        self.assertTrue(store.save({'Test': 4}))
+        result = list(store.entries())
+        self.assertEqual(
+            [_.data for _ in result], [{'Test': _} for _ in range(5)])
+        self.assertEqual(result[0].size, len(b'{"Test":0}'))
+
+        # Data saved for other identifiers isn't returned
+        other = cache.SQLiteStore(_identifier())
+        self.assertEqual(list(other.entries()), [])
+
+    def test_remove(self):
+        """Testing methods remove and flush."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        store.save_many([{'Test': value} for value in range(5)])
+        result = list(store.entries())
+
+        # Rows are only deleted when flushed
+        store.remove([result[0].key, result[1].key, result[3].key])
+        self.assertEqual(len(list(store.entries())), 5)
+        store.flush()
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 2}, {'Test': 4}])
+
+        # Rows are deleted once a page has been removed
+        store.page = 2
+        store.remove([result[2].key])
+        self.assertEqual(len(list(store.entries())), 2)
+        store.remove([result[4].key])
+        self.assertEqual(list(store.entries()), [])
+
+    def test_contains(self):
+        """Testing method contains."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        store.save({'Test': 0})
+        key = cache.digest(b'{"Test":0}')
+        self.assertTrue(store.contains(key))
+        self.assertFalse(store.contains(cache.digest(b'{"Test":1}')))
+        store.remove([_.key for _ in store.entries()])
+        self.assertFalse(store.contains(key))
+
+    def test_lock(self):
+        """Testing methods lock and unlock."""
+        # Test. Each store stands in for a process.
+        identifier = _identifier()
+        store = cache.SQLiteStore(identifier)
+        other = cache.SQLiteStore(identifier)
+        self.assertTrue(store.lock())
+        self.assertFalse(other.lock())
+        store.unlock()
+        self.assertTrue(other.lock())
+        other.unlock()
+
+    def test_contains_migration(self):
+        """Testing digests in databases created by older versions."""
+        # Initialize key variables
+        identifier = _identifier()
+        filepath = cache.SQLiteStore(identifier).filepath
+        os.remove(filepath)
+        connection = sqlite3.connect(filepath)
+        connection.execute('''\
+CREATE TABLE cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    data BLOB NOT NULL)''')
+        connection.execute(
+            'INSERT INTO cache (agent_id, timestamp, data) VALUES (?, ?, ?)',
+            (identifier, 0, b'{"Test":0}'))
+        connection.commit()
+        connection.close()
+
+        # Test
+        store = cache.SQLiteStore(identifier)
+        self.assertEqual([_.data for _ in store.entries()], [{'Test': 0}])
+        self.assertFalse(store.contains(cache.digest(b'{"Test":0}')))
+        store.save({'Test': 1})
+        self.assertTrue(store.contains(cache.digest(b'{"Test":1}')))
+
+    def test_compression(self):
+        """Testing cache_compression."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        store.save({'Test': 0})
+        store.compression = 6
+        store.save({'Test': 1})
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 0}, {'Test': 1}])
+        self.assertEqual(
+            [_.data for _ in store.entries(decode=False)],
+            [b'{"Test":0}', b'{"Test":1}'])
+
+        # JSON is saved as is
+        store.save(b'{"Test":2}')
+        self.assertEqual(
+            [_.data for _ in store.entries()][-1], {'Test': 2})
+
+    def test_evict(self):
+        """Testing methods overwrite, usage and evict."""
+        # Test
+        store = cache.SQLiteStore(_identifier())
+        store.save_many([{'Test': value} for value in range(6)])
+        self.assertEqual(store.usage(), 60)
+        result = list(store.entries())
+        self.assertTrue(store.overwrite(result[0].key, {'Test': 10}))
+        self.assertEqual(store.usage(), 61)
+        self.assertEqual(store.pending(), (6, 61))
+
+        # Unsummarizable data is thinned
+        store.max_bytes = 41
+        store.eviction = 'summarize'
+        store.eviction_group = 3
+        self.assertEqual(store.evict(), 2)
+        self.assertEqual(
+            [_.data['Test'] for _ in store.entries()], [10, 3, 4, 5])
+
+
+class TestMemoryStore(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_entries(self):
+        """Testing methods save, entries, remove and pending."""
+        # Test
+        store = cache.MemoryStore(_identifier())
+        self.assertTrue(store.save({'Test': 0}))
+        self.assertTrue(store.save_many([b'{"Test":1}', {'Test': 2}]))
+        result = list(store.entries())
+        self.assertEqual([_.data for _ in result], [
+            {'Test': 0}, {'Test': 1}, {'Test': 2}])
+        self.assertEqual(store.pending(), (3, 30))
+        self.assertEqual(store.usage(), 30)
+
+        # Data can be read as JSON without being decoded
+        store.remove([result[0].key])
+        self.assertEqual(
+            [_.data for _ in store.entries(decode=False)],
+            [b'{"Test":1}', b'{"Test":2}'])
+
+    def test_contains(self):
+        """Testing method contains."""
+        # Test
+        store = cache.MemoryStore(_identifier())
+        store.save({'Test': 0})
+        key = cache.digest(b'{"Test":0}')
+        self.assertTrue(store.contains(key))
+        self.assertFalse(store.contains(cache.digest(b'{"Test":1}')))
+        store.remove([_.key for _ in store.entries()])
+        self.assertFalse(store.contains(key))
+
+    def test_evict(self):
+        """Testing methods evict and spill."""
+        # Test
+        identifier = _identifier()
+        store = cache.MemoryStore(identifier)
+        store.maximum = 2
+        store.save_many([{'Test': value} for value in range(3)])
+
+        # Data that doesn't fit in the queue is saved to disk, oldest first
+        store.evict()
+        self.assertEqual(
+            [_.data for _ in store.entries()], [{'Test': 1}, {'Test': 2}])
+        files_ = cache.FileStore(identifier)
+        self.assertEqual([_.data for _ in files_.entries()], [{'Test': 0}])
+
+        # Data older than the maximum age is saved to disk
+        store.age = 0
+        store.evict()
+        self.assertEqual(store.pending(), (0, 0))
+        self.assertEqual(files_.pending(), (3, 30))
+
+        # All data is saved to disk, but only by the process that queued it
+        store.save({'Test': 3})
+        with patch.object(cache.os, 'getpid', return_value=-1):
+            store.spill()
+        self.assertEqual(store.pending(), (1, 10))
+        store.spill()
+        self.assertEqual(store.pending(), (0, 0))
+        self.assertEqual(files_.pending(), (4, 40))
+
+
+class TestWatcher(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_backlog(self):
+        """Testing methods backlog, check and notify."""
+        # Test
+        identifier = _identifier()
+        item = cache.Watcher(identifier)
+        self.assertIsNotNone(item._inotify)
+        self.assertFalse(item.backlog())
+
+        # The cache isn't read again until it changes. The first check
+        # creates the cache manifest.
+        self.assertFalse(item.backlog())
+        with patch.object(cache, 'stores') as mock_stores:
+            self.assertFalse(item.backlog())
+            mock_stores.assert_not_called()
+
+        # Changes made by other processes are seen
+        cache.FileStore(identifier).save({'Test': 0})
+        self.assertTrue(item.backlog())
+        self.assertEqual(item.check(), (1, 10))
+
+        # Changes made by this process are reported
+        store = cache.FileStore(identifier)
+        store.remove([_.key for _ in store.entries()])
+        self.assertFalse(item.backlog())
+        item.notify()
+        self.assertTrue(item.backlog())
+
+    def test_backlog_polling(self):
+        """Testing method backlog without inotify."""
+        # Test
+        identifier = _identifier()
+        with patch.object(cache, '_inotify', return_value=None):
+            item = cache.Watcher(identifier, interval=3600)
+        self.assertFalse(item.backlog())
+        cache.FileStore(identifier).save({'Test': 0})
+        self.assertFalse(item.backlog())
+
+        # The cache is checked again once the interval expires
+        item.interval = 0
+        self.assertTrue(item.backlog())
+
+    def test_backlog_shared(self):
+        """Testing method backlog with many Watcher objects."""
+        # Watchers share one inotify file descriptor
+        watchers = [cache.Watcher(_identifier()) for _ in range(2)]
+        count = len(os.listdir('/proc/self/fd'))
+        for _ in range(50):
+            cache.Watcher(_identifier())
+        self.assertEqual(len(os.listdir('/proc/self/fd')), count)
+        self.assertIs(watchers[0]._inotify, watchers[1]._inotify)
+        for item in watchers:
+            self.assertFalse(item.backlog())
+            self.assertFalse(item.backlog())
+
+        # Changes are only reported to the Watcher of the directory
+        cache.FileStore(watchers[0].identifier).save({'Test': 0})
+        with patch.object(cache, 'stores') as mock_stores:
+            self.assertFalse(watchers[1].backlog())
+            mock_stores.assert_not_called()
+        self.assertTrue(watchers[0].backlog())
+
+    def test_drain(self):
+        """Testing method drain."""
+        # Initialize key variables
+        identifier = _identifier()
+        item = cache.Watcher(identifier)
+        store = cache.FileStore(identifier)
+
+        def purge():
+            """Remove all cached data."""
+            store.remove([_.key for _ in store.entries()])
+
+        # Nothing is started without a backlog
+        self.assertIsNone(item.drain(purge))
+
+        # Test
+        store.save({'Test': 0})
+        thread = item.drain(purge)
+        self.assertIsNotNone(thread)
+        thread.join()
+        self.assertEqual(store.pending(), (0, 0))
+        self.assertFalse(item.backlog())
+
+        # Failures are logged and the cache is checked again
+        store.save({'Test': 0})
+        item.drain(Mock(side_effect=RuntimeError('Test'))).join()
+        self.assertTrue(item.backlog())
+
+
+class TestInotify(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_events(self):
+        """Testing methods watch and events."""
+        # Initialize key variables
+        item = cache._Inotify.create()
+        directories = [tempfile.mkdtemp() for _ in range(2)]
+
+        # Directories are only watched once
+        watches = [item.watch([_]) for _ in directories]
+        self.assertEqual(item.watch(directories[:1]), watches[0])
+        self.assertIsNone(item.watch(['/nonexistent/directory']))
+
+        # Test
+        filepath = os.path.join(directories[0], 'test.json')
+        with open(filepath, 'w') as f_handle:
+            f_handle.write('Test')
+        self.assertTrue(item.events(watches[0]) > 0)
+        self.assertEqual(item.events(watches[1]), 0)
+        item.close()
+
+    def test_close(self):
+        """Testing method close."""
+        # Initialize key variables
+        identifier = _identifier()
+        item = cache._Inotify.create()
+        f_descriptor = item._fd
+
+        # Watchers check the cache every interval once it's closed
+        with patch.object(cache, '_inotify', return_value=item):
+            _watcher = cache.Watcher(identifier, interval=3600)
+        self.assertFalse(_watcher.backlog())
+        item.close()
+        self.assertRaises(OSError, os.fstat, f_descriptor)
+        self.assertIsNone(item.watch([tempfile.mkdtemp()]))
+        cache.FileStore(identifier).save({'Test': 0})
+        self.assertFalse(_watcher.backlog())
+        _watcher.interval = 0
+        self.assertTrue(_watcher.backlog())
+
+        # Closing twice is harmless
+        item.close()
+
+
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_store(self):
+        """Testing function store."""
+        # Test
+        identifier = _identifier()
+        result = cache.store(identifier)
+        self.assertTrue(isinstance(result, cache.FileStore))
+        self.assertEqual(result, cache.store(identifier))
+
+        # Test other backends
+        for (backend, expected) in [
+                ('spool', cache.SpoolStore), ('sqlite', cache.SQLiteStore)]:
+            with patch.object(
+                    cache.Config, 'cache_backend', return_value=backend):
+                result = cache.store(identifier)
+                self.assertTrue(isinstance(result, expected))
+
+    def test_stores(self):
+        """Testing function stores."""
+        # Test
+        identifier = _identifier()
+        result = cache.stores(identifier)
+        self.assertEqual(len(result), 1)
+
+        # Cache files are purged before other backends
+        with patch.object(
+                cache.Config, 'cache_backend', return_value='sqlite'):
+            result = cache.stores(identifier)
+            self.assertEqual(len(result), 2)
+            self.assertTrue(isinstance(result[0], cache.FileStore))
+            self.assertTrue(isinstance(result[1], cache.SQLiteStore))
+
+            # The cache files are purged by the same FileStore each time,
+            # so that file descriptors aren't leaked
+            self.assertIs(cache.stores(identifier)[0], result[0])
+            result[0].save({'Test': 1})
+            count = len(os.listdir('/proc/self/fd'))
+            for _ in range(200):
+                cache.stores(identifier)[0].pending()
+            self.assertTrue(len(os.listdir('/proc/self/fd')) <= count)
+
+    def test_queue(self):
+        """Testing function queue."""
+        # The retry queue is disabled by default
+        identifier = _identifier()
+        self.assertIsNone(cache.queue(identifier))
+
+        # Test
+        with patch.object(
+                cache.Config, 'agent_api_retry_queue', return_value=10):
+            result = cache.queue(identifier)
+            self.assertTrue(isinstance(result, cache.MemoryStore))
+            self.assertEqual(result, cache.queue(identifier))
+
+            # The retry queue is purged last
+            self.assertEqual(cache.stores(identifier)[-1], result)
+
+    def test_spill(self):
+        """Testing function spill."""
+        # Test
+        identifier = _identifier()
+        with patch.object(
+                cache.Config, 'agent_api_retry_queue', return_value=10):
+            _queue = cache.queue(identifier)
+            _queue.save({'Test': 1})
+            cache.spill()
+            self.assertEqual(_queue.pending(), (0, 0))
+            self.assertEqual(
+                [_.data for _ in cache.store(identifier).entries()],
+                [{'Test': 1}])
+
+    def test_watcher(self):
+        """Testing function watcher."""
+        # Test
+        identifier = _identifier()
+        result = cache.watcher(identifier)
+        self.assertTrue(isinstance(result, cache.Watcher))
+        self.assertEqual(result, cache.watcher(identifier))
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Test the codec module."""
+
+# Standard imports
+import unittest
+import os
+import sys
+import json
+import tempfile
+from unittest.mock import patch
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import codec
+from pattoo_shared import converter
+from tests.libraries.configuration import UnittestConfig
+from tests.libraries import general as ta
+
+
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    # Create agent data. It has integer keys.
+    data = converter.posting_data_points(
+        converter.agentdata_to_post(ta.test_agent()))
+    expected = json.loads(json.dumps(data))
+
+    def test_encode(self):
+        """Testing function encode."""
+        # Test
+        result = codec.encode(self.data)
+        self.assertTrue(isinstance(result, bytes))
+        self.assertEqual(json.loads(result.decode()), self.expected)
+
+        # Test unicode and integers larger than 64 bits
+        data = {'pattoo': 'é', 1: 2 ** 70}
+        result = codec.encode(data)
+        self.assertEqual(
+            json.loads(result.decode()), {'pattoo': 'é', '1': 2 ** 70})
+
+    def test_encode_fallback(self):
+        """Testing function encode without orjson."""
+        # Test
+        with patch.object(codec, 'orjson', None):
+            result = codec.encode(self.data)
+            self.assertEqual(json.loads(result.decode()), self.expected)
+            self.assertEqual(codec.decode(result), self.expected)
+
+    def test_dumps(self):
+        """Testing function dumps."""
+        # Test
+        result = codec.dumps(self.data)
+        self.assertTrue(isinstance(result, str))
+        self.assertEqual(json.loads(result), self.expected)
+
+    def test_decode(self):
+        """Testing function decode."""
+        # Test strings and bytes
+        body = json.dumps(self.data)
+        self.assertEqual(codec.decode(body), self.expected)
+        self.assertEqual(codec.decode(body.encode()), self.expected)
+
+        # Invalid JSON
+        with self.assertRaises(ValueError):
+            codec.decode('{')
+
+    def test_decode_nested(self):
+        """Testing function decode_nested."""
+        # Test
+        body = json.dumps(self.data)
+        self.assertEqual(codec.decode_nested(body), self.expected)
+        self.assertEqual(
+            codec.decode_nested(json.dumps(body)), self.expected)
+
+    def test_write(self):
+        """Testing function write."""
+        # Test
+        (_, filepath) = tempfile.mkstemp(suffix='.json')
+        codec.write(filepath, self.data)
+        with open(filepath, 'r') as f_handle:
+            self.assertEqual(json.load(f_handle), self.expected)
+        os.remove(filepath)
+
+    def test_read(self):
+        """Testing function read."""
+        # Test
+        (_, filepath) = tempfile.mkstemp(suffix='.json')
+        with open(filepath, 'w') as f_handle:
+            json.dump(self.data, f_handle)
+        self.assertEqual(codec.read(filepath), self.expected)
+
+        # Invalid JSON
+        with open(filepath, 'w') as f_handle:
+            f_handle.write('{')
+        with self.assertRaises(ValueError):
+            codec.read(filepath)
+        os.remove(filepath)
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
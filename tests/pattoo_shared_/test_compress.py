@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Test the compress module."""
+
+# Standard imports
+import unittest
+import os
+import sys
+import gzip
+import zlib
+import json
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import compress
+from pattoo_shared import codec
+from pattoo_shared import converter
+from tests.libraries.configuration import UnittestConfig
+from tests.libraries import general as ta
+
+
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    # Create agent data
+    data = converter.posting_data_points(
+        converter.agentdata_to_post(ta.test_agent()))
+    body = codec.encode(data)
+
+    def test_compress(self):
+        """Testing function compress."""
+        # Test gzip
+        result = compress.compress(self.body, 'gzip')
+        self.assertTrue(len(result) < len(self.body))
+        self.assertEqual(gzip.decompress(result), self.body)
+
+        # Test deflate
+        result = compress.compress(self.body, 'deflate')
+        self.assertTrue(len(result) < len(self.body))
+        self.assertEqual(zlib.decompress(result), self.body)
+
+        # Unsupported encodings are ignored
+        result = compress.compress(self.body, 'br')
+        self.assertEqual(result, self.body)
+
+    def test_decompress(self):
+        """Testing function decompress."""
+        # Uncompressed bodies are unchanged
+        for encoding in [None, '', 'identity']:
+            result = compress.decompress(self.body, encoding)
+            self.assertEqual(result, self.body)
+
+        # Test supported encodings
+        for encoding in ['gzip', 'deflate']:
+            body = compress.compress(self.body, encoding)
+            result = compress.decompress(body, encoding)
+            self.assertEqual(result, self.body)
+            result = compress.decompress(body, ' {} '.format(encoding.upper()))
+            self.assertEqual(result, self.body)
+
+            # Bodies larger than the maximum are rejected
+            result = compress.decompress(
+                body, encoding, maximum=len(self.body))
+            self.assertEqual(result, self.body)
+            result = compress.decompress(
+                body, encoding, maximum=len(self.body) - 1)
+            self.assertIsNone(result)
+
+            # Truncated and corrupt bodies are rejected
+            result = compress.decompress(body[:-10], encoding)
+            self.assertIsNone(result)
+            result = compress.decompress(self.body, encoding)
+            self.assertIsNone(result)
+
+        # Test raw deflate streams and x-gzip
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        body = compressor.compress(self.body) + compressor.flush()
+        result = compress.decompress(body, 'deflate')
+        self.assertEqual(result, self.body)
+        result = compress.decompress(gzip.compress(self.body), 'x-gzip')
+        self.assertEqual(result, self.body)
+
+        # Unsupported encodings are rejected
+        result = compress.decompress(self.body, 'br')
+        self.assertIsNone(result)
+
+    def test_json_body(self):
+        """Testing function json_body."""
+        # No compression
+        (body, headers) = compress.json_body(self.data)
+        self.assertEqual(body, self.body)
+        self.assertEqual(headers, {'Content-Type': 'application/json'})
+
+        # Compression
+        (body, headers) = compress.json_body(self.data, encoding='gzip')
+        self.assertEqual(gzip.decompress(body), self.body)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+
+        # Small bodies aren't compressed
+        (body, headers) = compress.json_body(
+            self.data, encoding='gzip', threshold=len(self.body) + 1)
+        self.assertEqual(body, self.body)
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_json_data(self):
+        """Testing function json_data."""
+        # Test
+        expected = json.loads(self.body.decode())
+        for encoding in [None, 'gzip', 'deflate']:
+            (body, headers) = compress.json_body(self.data, encoding=encoding)
+            result = compress.json_data(
+                body, headers.get('Content-Encoding'))
+            self.assertEqual(result, expected)
+
+        # Invalid data
+        self.assertIsNone(compress.json_data(b'{', None))
+        self.assertIsNone(compress.json_data(self.body, 'gzip'))
+
+    def test_compress_json(self):
+        """Testing functions compress_json and decompress_json."""
+        # Test
+        expected = json.loads(self.body.decode())
+        self.assertEqual(compress.compress_json(self.data), self.body)
+        for level in [0, 1, 9]:
+            payload = compress.compress_json(self.data, level=level)
+            self.assertEqual(compress.decompress_json(payload), expected)
+        payload = compress.compress_json(self.data, level=6)
+        self.assertEqual(gzip.decompress(payload), self.body)
+
+        # Invalid data
+        with self.assertRaises(ValueError):
+            compress.decompress_json(payload[:-4])
+        with self.assertRaises(ValueError):
+            compress.decompress_json(b'{')
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
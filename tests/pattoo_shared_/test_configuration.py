@@ -68,6 +68,156 @@ class TestConfig(unittest.TestCase):
         result = self.config.agent_api_ip_bind_port()
         self.assertEqual(result, expected)
 
+    def test_agent_api_pool_size(self):
+        """Testing function agent_api_pool_size."""
+        # Initialize key values
+        expected = 10
+
+        # Test
+        result = self.config.agent_api_pool_size()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_keep_alive(self):
+        """Testing function agent_api_keep_alive."""
+        # Test
+        result = self.config.agent_api_keep_alive()
+        self.assertTrue(result)
+
+    def test_agent_api_session_ttl(self):
+        """Testing function agent_api_session_ttl."""
+        # Initialize key values
+        expected = 3600
+
+        # Test
+        result = self.config.agent_api_session_ttl()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_batch_size(self):
+        """Testing function agent_api_batch_size."""
+        # Initialize key values
+        expected = 1
+
+        # Test
+        result = self.config.agent_api_batch_size()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_batch_bytes(self):
+        """Testing function agent_api_batch_bytes."""
+        # Initialize key values
+        expected = 1048576
+
+        # Test
+        result = self.config.agent_api_batch_bytes()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_purge_workers(self):
+        """Testing function agent_api_purge_workers."""
+        # Initialize key values
+        expected = 1
+
+        # Test
+        result = self.config.agent_api_purge_workers()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_purge_rate(self):
+        """Testing function agent_api_purge_rate."""
+        # Initialize key values
+        expected = 0
+
+        # Test
+        result = self.config.agent_api_purge_rate()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_retries(self):
+        """Testing function agent_api_retries."""
+        # Initialize key values
+        expected = 2
+
+        # Test
+        result = self.config.agent_api_retries()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_retry_queue(self):
+        """Testing function agent_api_retry_queue."""
+        # Initialize key values
+        expected = 0
+
+        # Test
+        result = self.config.agent_api_retry_queue()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_retry_queue_age(self):
+        """Testing function agent_api_retry_queue_age."""
+        # Initialize key values
+        expected = 60
+
+        # Test
+        result = self.config.agent_api_retry_queue_age()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_backoff(self):
+        """Testing function agent_api_backoff."""
+        # Initialize key values
+        expected = 0.5
+
+        # Test
+        result = self.config.agent_api_backoff()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_backoff_max(self):
+        """Testing function agent_api_backoff_max."""
+        # Initialize key values
+        expected = 30
+
+        # Test
+        result = self.config.agent_api_backoff_max()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_breaker_threshold(self):
+        """Testing function agent_api_breaker_threshold."""
+        # Initialize key values
+        expected = 5
+
+        # Test
+        result = self.config.agent_api_breaker_threshold()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_breaker_timeout(self):
+        """Testing function agent_api_breaker_timeout."""
+        # Initialize key values
+        expected = 60
+
+        # Test
+        result = self.config.agent_api_breaker_timeout()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_compression(self):
+        """Testing function agent_api_compression."""
+        # Test
+        result = self.config.agent_api_compression()
+        self.assertIsNone(result)
+
+    def test_agent_api_compression_threshold(self):
+        """Testing function agent_api_compression_threshold."""
+        # Initialize key values
+        expected = 1024
+
+        # Test
+        result = self.config.agent_api_compression_threshold()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_delta_encoding(self):
+        """Testing function agent_api_delta_encoding."""
+        # Test
+        result = self.config.agent_api_delta_encoding()
+        self.assertFalse(result)
+
+    def test_agent_api_encrypted_json_object(self):
+        """Testing function agent_api_encrypted_json_object."""
+        # Test
+        result = self.config.agent_api_encrypted_json_object()
+        self.assertFalse(result)
+
     def test_agent_api_uri(self):
         """Testing function api_uri."""
         # Initialize key values
@@ -101,6 +251,61 @@ class TestConfig(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
+    def test_agent_api_batch(self):
+        """Testing function agent_api_batch."""
+        # Initialize key values
+        expected = '/pattoo/api/v1/agent/batch'
+
+        # Test
+        result = self.config.agent_api_batch()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_encrypted_batch(self):
+        """Testing function agent_api_encrypted_batch."""
+        # Initialize key values
+        expected = '/pattoo/api/v1/agent/encrypted/batch'
+
+        # Test
+        result = self.config.agent_api_encrypted_batch()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_delta(self):
+        """Testing function agent_api_delta."""
+        # Initialize key values
+        expected = '/pattoo/api/v1/agent/delta'
+
+        # Test
+        result = self.config.agent_api_delta()
+        self.assertEqual(result, expected)
+
+    def test_agent_api_batch_url(self):
+        """Testing function agent_api_batch_url."""
+        # Initialize key values
+        expected = 'http://127.0.0.6:50505/pattoo/api/v1/agent/batch/123'
+
+        # Test
+        result = self.config.agent_api_batch_url(123)
+        self.assertEqual(result, expected)
+
+    def test_agent_api_delta_url(self):
+        """Testing function agent_api_delta_url."""
+        # Initialize key values
+        expected = 'http://127.0.0.6:50505/pattoo/api/v1/agent/delta/123'
+
+        # Test
+        result = self.config.agent_api_delta_url(123)
+        self.assertEqual(result, expected)
+
+    def test_agent_api_encrypted_batch_url(self):
+        """Testing function agent_api_encrypted_batch_url."""
+        # Initialize key values
+        expected = (
+            'http://127.0.0.6:50505/pattoo/api/v1/agent/encrypted/batch')
+
+        # Test
+        result = self.config.agent_api_encrypted_batch_url()
+        self.assertEqual(result, expected)
+
     def test_agent_api_server_url(self):
         """Testing function agent_api_server_url."""
         # Initialize key values
@@ -208,6 +413,60 @@ class TestConfig(unittest.TestCase):
         result = self.config.agent_cache_directory(agent_id)
         self.assertEqual(result, expected)
 
+    def test_cache_backend(self):
+        """Testing function cache_backend."""
+        # Test
+        result = self.config.cache_backend()
+        self.assertEqual(result, 'files')
+
+    def test_cache_segment_bytes(self):
+        """Testing function cache_segment_bytes."""
+        # Test
+        result = self.config.cache_segment_bytes()
+        self.assertEqual(result, 4194304)
+
+    def test_cache_fsync(self):
+        """Testing function cache_fsync."""
+        # Test
+        result = self.config.cache_fsync()
+        self.assertEqual(result, 'segment')
+
+    def test_cache_shard(self):
+        """Testing function cache_shard."""
+        # Test
+        result = self.config.cache_shard()
+        self.assertEqual(result, 'hour')
+
+    def test_cache_compression(self):
+        """Testing function cache_compression."""
+        # Test
+        result = self.config.cache_compression()
+        self.assertEqual(result, 0)
+
+    def test_cache_max_bytes(self):
+        """Testing function cache_max_bytes."""
+        # Test
+        result = self.config.cache_max_bytes()
+        self.assertEqual(result, 0)
+
+    def test_cache_max_age(self):
+        """Testing function cache_max_age."""
+        # Test
+        result = self.config.cache_max_age()
+        self.assertEqual(result, 0)
+
+    def test_cache_eviction(self):
+        """Testing function cache_eviction."""
+        # Test
+        result = self.config.cache_eviction()
+        self.assertEqual(result, 'oldest')
+
+    def test_cache_eviction_group(self):
+        """Testing function cache_eviction_group."""
+        # Test
+        result = self.config.cache_eviction_group()
+        self.assertEqual(result, 10)
+
     def test_keyring_directory(self):
         """Testing function keyring_directory."""
         # Initialize key values
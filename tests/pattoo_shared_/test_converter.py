@@ -23,9 +23,11 @@ else:
 
 # Pattoo imports
 from pattoo_shared import converter
+from pattoo_shared import codec
 from pattoo_shared.configuration import Config
 from pattoo_shared.variables import (
-    DataPointMetadata, DataPoint, TargetDataPoints, AgentPolledData)
+    DataPointMetadata, DataPoint, DataPointBatch, TargetDataPoints,
+    AgentPolledData)
 from pattoo_shared.constants import (
     DATA_FLOAT, DATA_INT, DATA_COUNT64, DATA_COUNT, DATA_STRING, DATA_NONE,
     DATAPOINT_KEYS, PattooDBrecord)
@@ -123,6 +125,83 @@ class TestBasicFunctions(unittest.TestCase):
             pattoo_agent_polling_interval='10000')
         self.assertEqual(result, expected)
 
+    def test_summarize_cache(self):
+        """Testing method or function named summarize_cache."""
+        # Initialize key variables
+        items = []
+        for value in [1, 2, 6]:
+            apd = AgentPolledData('panda_bear', 20)
+            ddv = TargetDataPoints('teddy_bear')
+            ddv.add(DataPoint('gauge', value, data_type=DATA_FLOAT))
+            ddv.add(DataPoint('name', str(value), data_type=DATA_STRING))
+            apd.add(ddv)
+            items.append(codec.decode(codec.encode(
+                converter.posting_data_points(
+                    converter.agentdata_to_post(apd)))))
+
+        # Test
+        result = converter.summarize_cache(items)
+        self.assertEqual(
+            result['pattoo_agent_timestamp'],
+            items[-1]['pattoo_agent_timestamp'])
+        records = converter.cache_to_keypairs(codec.decode(
+            codec.encode(result)))
+        self.assertEqual(len(records), 2)
+        values = {_.pattoo_key: _.pattoo_value for _ in records}
+        self.assertEqual(values['gauge'], 3)
+        self.assertEqual(values['name'], '6')
+
+        # Test invalid data
+        self.assertIsNone(converter.summarize_cache([{'Test': 0}]))
+
+    def test_payloads_to_batch(self):
+        """Testing method or function named payloads_to_batch."""
+        # Test
+        result = converter.payloads_to_batch('abc', [('1', {'a': 1})])
+        expected = {
+            'pattoo_agent_id': 'abc',
+            'pattoo_payloads': [
+                {'pattoo_payload_id': '1', 'pattoo_payload': {'a': 1}}]
+        }
+        self.assertEqual(result, expected)
+
+    def test_encode_batch(self):
+        """Testing method or function named encode_batch."""
+        # Test
+        payloads = [('1', {'a': 1}), ('2', {'b': [2]})]
+        expected = converter.payloads_to_batch('abc', payloads)
+        result = converter.encode_batch('abc', payloads)
+        self.assertEqual(codec.decode(result), expected)
+
+        # Cached JSON is inserted as is
+        result = converter.encode_batch(
+            'abc', [(_id, codec.encode(_data)) for (_id, _data) in payloads])
+        self.assertEqual(codec.decode(result), expected)
+        self.assertEqual(converter.batch_to_payloads(
+            codec.decode(result)), payloads)
+
+    def test_batch_to_payloads(self):
+        """Testing method or function named batch_to_payloads."""
+        # Test valid data
+        payloads = [('1', {'a': 1}), ('2', {'b': 2})]
+        batch = converter.payloads_to_batch('abc', payloads)
+        result = converter.batch_to_payloads(batch)
+        self.assertEqual(result, payloads)
+
+        # Test invalid data
+        self.assertEqual(converter.batch_to_payloads([]), [])
+        self.assertEqual(converter.batch_to_payloads({'a': 1}), [])
+        batch['pattoo_payloads'] = {}
+        self.assertEqual(converter.batch_to_payloads(batch), [])
+        batch['pattoo_payloads'] = [{'pattoo_payload_id': '1'}]
+        self.assertEqual(converter.batch_to_payloads(batch), [])
+
+    def test_batch_acknowledgement(self):
+        """Testing method or function named batch_acknowledgement."""
+        # Test
+        result = converter.batch_acknowledgement(('1', '2'))
+        self.assertEqual(result, {'pattoo_payload_ids': ['1', '2']})
+
     def test__make_pattoo_db_record(self):
         """Testing method or function named _make_pattoo_db_record."""
         pass
@@ -229,6 +308,32 @@ class TestBasicFunctions(unittest.TestCase):
             if key not in [5, 9]:
                 self.assertEqual(expected['key_value_pairs'][key], value)
 
+    def test_datapoints_to_dicts_batch(self):
+        """Testing datapoints_to_dicts with DataPointBatch objects."""
+        # Initialize key variables
+        batch = DataPointBatch(data_type=DATA_FLOAT)
+        batch.extend(['a', 'b', 'c'], [1.5, '2', 3.25], timestamp=1000)
+        batch.add([DataPointMetadata(0, 1), DataPointMetadata(2, 3)])
+        datapoint = DataPoint('d', 4, data_type=DATA_INT, timestamp=1000)
+
+        # The result is the same as for the equivalent DataPoint objects
+        result = converter.datapoints_to_dicts([datapoint, batch])
+        expected = converter.datapoints_to_dicts(
+            [datapoint] + batch.datapoints())
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result['datapoint_pairs']), 4)
+
+        # Batches polled by agents get the same agent metadata
+        apd = AgentPolledData('panda_bear', 20)
+        ddv = TargetDataPoints('teddy_bear')
+        ddv.add(batch)
+        apd.add(ddv)
+        result = converter.agentdata_to_datapoints(apd)
+        self.assertEqual(result, [batch])
+        self.assertEqual(batch.metadata['pattoo_agent_id'], apd.agent_id)
+        self.assertEqual(
+            batch.checksums(), [_.checksum for _ in batch.datapoints()])
+
     def test_agentdata_to_post(self):
         """Testing method or function named agentdata_to_post."""
         # Setup AgentPolledData
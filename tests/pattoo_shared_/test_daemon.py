@@ -7,7 +7,10 @@ import os
 import subprocess
 import sys
 import shlex
+import signal
+import uuid
 from time import sleep
+from unittest.mock import patch
 
 
 # Try to create a working PYTHONPATH
@@ -26,6 +29,8 @@ else:
 
 # Pattoo imports
 from pattoo_shared import files
+from pattoo_shared import cache
+from pattoo_shared import daemon
 from pattoo_shared.daemon import Daemon, GracefulDaemon
 from pattoo_shared.agent import Agent
 from pattoo_shared.configuration import Config
@@ -401,6 +406,44 @@ class TestGracefulDaemon(TestDaemon):
         self.graceful_fn(_restart(self._agent))
 
 
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test__wait(self):
+        """Testing function _wait."""
+        # Test
+        self.assertFalse(daemon._wait(os.getpid(), timeout=0.2))
+        process = subprocess.Popen(['true'])
+        process.wait()
+        self.assertTrue(daemon._wait(process.pid, timeout=0.2))
+
+    def test__terminate(self):
+        """Testing function _terminate."""
+        # Initialize key variables
+        identifier = 'daemon_{}'.format(uuid.uuid4().hex)
+
+        # The retry queue is saved before the process stops
+        with patch.object(
+                cache.Config, 'agent_api_retry_queue', return_value=10):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    cache.queue(identifier).save({'Test': 1})
+                    daemon._terminate(signal.SIGTERM, None)
+                finally:
+                    os._exit(1)
+        (_, status) = os.waitpid(pid, 0)
+        self.assertTrue(os.WIFSIGNALED(status))
+        self.assertEqual(os.WTERMSIG(status), signal.SIGTERM)
+        self.assertEqual(
+            [_.data for _ in cache.store(identifier).entries()],
+            [{'Test': 1}])
+
+
 if __name__ == '__main__':
     # Make sure the environment is OK to run unittests
     UnittestConfig().create()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Test the delta module."""
+
+# Standard imports
+import unittest
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import delta
+from pattoo_shared import codec
+from pattoo_shared import converter
+from tests.libraries.configuration import UnittestConfig
+from tests.libraries import general as ta
+
+
+def _data():
+    """Create data polled by an agent.
+
+    Args:
+        None
+
+    Returns:
+        result: Dict of data to post
+
+    """
+    # Return
+    result = converter.posting_data_points(
+        converter.agentdata_to_post(ta.test_agent()))
+    return result
+
+
+def _records(_data):
+    """Get the PattooDBrecords of posted data.
+
+    Args:
+        _data: Dict of data to post
+
+    Returns:
+        result: List of PattooDBrecords sorted by checksum
+
+    """
+    # Return
+    result = sorted(
+        converter.cache_to_keypairs(codec.decode(codec.encode(_data))),
+        key=lambda _: _.pattoo_checksum)
+    return result
+
+
+class TestEncoder(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_encode(self):
+        """Testing functions encode and commit."""
+        # Initialize key variables
+        encoder = delta.Encoder()
+        data = _data()
+        datapoint_pairs = data['pattoo_datapoints']['datapoint_pairs']
+
+        # Every key-value pair is new, except values and timestamps
+        result = encoder.encode(data)
+        dictionary = result['pattoo_dictionary']
+        self.assertEqual(
+            dictionary['pattoo_dictionary_id'], encoder.dictionary_id)
+        self.assertEqual(dictionary['pattoo_dictionary_version'], 0)
+        count = len(dictionary['key_value_pairs'])
+        self.assertTrue(count > 0)
+        for [key, _] in dictionary['key_value_pairs']:
+            self.assertNotIn(key, ['pattoo_value', 'pattoo_timestamp'])
+        self.assertEqual(
+            len(result['pattoo_datapoints']), len(datapoint_pairs))
+        for item in result['pattoo_datapoints']:
+            self.assertEqual(len(item), 3)
+            self.assertEqual(len(item[0]), len(datapoint_pairs[0]) - 2)
+            self.assertTrue(max(item[0]) < count)
+        self.assertEqual(
+            result['pattoo_agent_id'], data['pattoo_agent_id'])
+
+        # The pairs aren't added to the dictionary until they are committed
+        result = encoder.encode(data)
+        self.assertEqual(
+            result['pattoo_dictionary']['pattoo_dictionary_version'], 0)
+        self.assertEqual(
+            len(result['pattoo_dictionary']['key_value_pairs']), count)
+        encoder.commit()
+        self.assertEqual(encoder.version, count)
+
+        # Only the values and timestamps of known pairs are posted
+        result = encoder.encode(_data())
+        self.assertEqual(
+            result['pattoo_dictionary']['pattoo_dictionary_version'], count)
+        self.assertEqual(result['pattoo_dictionary']['key_value_pairs'], [])
+        self.assertTrue(
+            len(codec.encode(result)) * 2 < len(codec.encode(data)))
+
+    def test_reset(self):
+        """Testing function reset."""
+        # Test
+        encoder = delta.Encoder()
+        dictionary_id = encoder.dictionary_id
+        encoder.encode(_data())
+        encoder.commit()
+        self.assertTrue(encoder.version > 0)
+        encoder.reset()
+        self.assertEqual(encoder.version, 0)
+        self.assertNotEqual(encoder.dictionary_id, dictionary_id)
+
+        # A new dictionary is started when the dictionary is full
+        encoder = delta.Encoder(size=1)
+        dictionary_id = encoder.dictionary_id
+        result = encoder.encode(_data())
+        self.assertNotEqual(encoder.dictionary_id, dictionary_id)
+        self.assertEqual(
+            result['pattoo_dictionary']['pattoo_dictionary_version'], 0)
+
+
+class TestDecoder(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_decode(self):
+        """Testing function decode."""
+        # Initialize key variables
+        encoder = delta.Encoder()
+        decoder = delta.Decoder()
+
+        # Decoded data is the same as the data before it was encoded
+        for _ in range(3):
+            data = _data()
+            posted = codec.decode(codec.encode(encoder.encode(data)))
+            result = decoder.decode(posted)
+            encoder.commit()
+            self.assertEqual(_records(result), _records(data))
+            self.assertEqual(
+                result['pattoo_agent_timestamp'],
+                data['pattoo_agent_timestamp'])
+
+        # Pairs of posts that weren't committed by the agent are replaced
+        data = _data()
+        data['pattoo_datapoints']['key_value_pairs'][0] = (
+            'new_key', 'new_value')
+        posted = codec.decode(codec.encode(encoder.encode(data)))
+        decoder.decode(posted)
+        data = _data()
+        posted = codec.decode(codec.encode(encoder.encode(data)))
+        result = decoder.decode(posted)
+        self.assertEqual(_records(result), _records(data))
+
+        # Data based on unknown dictionaries can't be decoded
+        encoder.commit()
+        data = _data()
+        posted = codec.decode(codec.encode(encoder.encode(data)))
+        self.assertIsNone(delta.Decoder().decode(posted))
+        posted['pattoo_dictionary']['pattoo_dictionary_id'] = 'unknown'
+        self.assertIsNone(decoder.decode(posted))
+
+        # The dictionary is replaced when the agent posts it again
+        encoder.reset()
+        posted = codec.decode(codec.encode(encoder.encode(data)))
+        result = decoder.decode(posted)
+        self.assertEqual(_records(result), _records(data))
+
+    def test_decode_invalid(self):
+        """Testing function decode with invalid data."""
+        # Initialize key variables
+        posted = delta.Encoder().encode(_data())
+        decoder = delta.Decoder()
+
+        # Test
+        for item in [None, [], {}, _data()]:
+            self.assertIsNone(decoder.decode(item))
+        for key, value in [
+                ('pattoo_dictionary', []),
+                ('pattoo_datapoints', {}),
+                ('pattoo_datapoints', [[[0], 1]]),
+                ('pattoo_datapoints', [[[1000], 1, 2]]),
+                ('pattoo_datapoints', [[[-1], 1, 2]]),
+                ('pattoo_datapoints', [[[0], [1], 2]])]:
+            item = codec.decode(codec.encode(posted))
+            item[key] = value
+            self.assertIsNone(decoder.decode(item))
+        for value in [True, -1, '0', None]:
+            item = codec.decode(codec.encode(posted))
+            item['pattoo_dictionary']['pattoo_dictionary_version'] = value
+            self.assertIsNone(decoder.decode(item))
+
+
+class TestBasicFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_encoder(self):
+        """Testing function encoder."""
+        # Test
+        result = delta.encoder('delta_test')
+        self.assertTrue(isinstance(result, delta.Encoder))
+        self.assertIs(delta.encoder('delta_test'), result)
+        self.assertIsNot(delta.encoder('delta_test_other'), result)
+
+    def test_encodable(self):
+        """Testing function encodable."""
+        # Test
+        self.assertTrue(delta.encodable(_data()))
+        for item in [None, b'{}', {}, {'Test': 1}]:
+            self.assertFalse(delta.encodable(item))
+        data = _data()
+        data['pattoo_datapoints'] = []
+        self.assertFalse(delta.encodable(data))
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
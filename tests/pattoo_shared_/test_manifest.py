@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test the manifest module."""
+
+# Standard imports
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import manifest
+from tests.libraries.configuration import UnittestConfig
+
+
+class TestManifest(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a directory for each test."""
+        self.directory = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.directory, 'manifest.log')
+
+    def tearDown(self):
+        """Delete the directory of each test."""
+        shutil.rmtree(self.directory)
+
+    def test___init__(self):
+        """Testing method __init__."""
+        # Test
+        _manifest = manifest.Manifest(self.directory)
+        self.assertFalse(_manifest.exists)
+        _manifest.add('a', 1)
+        self.assertTrue(_manifest.exists)
+        self.assertTrue(manifest.Manifest(self.directory).exists)
+
+    def test_add(self):
+        """Testing methods add, items, size and count."""
+        # Test
+        _manifest = manifest.Manifest(self.directory)
+        _manifest.add('b', 2)
+        _manifest.add('a', 1)
+        _manifest.add('b', 3)
+        self.assertEqual(_manifest.items(), [('b', 3), ('a', 1)])
+        self.assertEqual(_manifest.size(), 4)
+        self.assertEqual(_manifest.count(), 2)
+
+        # The journal is read after restarting
+        _manifest = manifest.Manifest(self.directory)
+        self.assertEqual(_manifest.items(), [('b', 3), ('a', 1)])
+        self.assertEqual(_manifest.size(), 4)
+
+    def test_contains(self):
+        """Testing method contains."""
+        # Test
+        _manifest = manifest.Manifest(self.directory)
+        _manifest.add('a', 1, digest='x')
+        _manifest.add('b', 2)
+        self.assertTrue(_manifest.contains('x'))
+        self.assertFalse(_manifest.contains('y'))
+
+        # Digests are replaced, removed and compacted with their keys
+        _manifest.add('a', 1, digest='y')
+        self.assertFalse(_manifest.contains('x'))
+        self.assertTrue(manifest.Manifest(self.directory).contains('y'))
+        _manifest._write()
+        self.assertTrue(manifest.Manifest(self.directory).contains('y'))
+        _manifest.rebuild([('a', 1, 'y'), ('b', 2)])
+        self.assertTrue(manifest.Manifest(self.directory).contains('y'))
+        _manifest.remove(['a'])
+        self.assertFalse(_manifest.contains('y'))
+        self.assertFalse(manifest.Manifest(self.directory).contains('y'))
+
+    def test_remove(self):
+        """Testing method remove."""
+        # Test
+        _manifest = manifest.Manifest(self.directory)
+        for (key, size) in [('a', 1), ('b', 2), ('c', 3)]:
+            _manifest.add(key, size)
+        _manifest.remove(['a', 'c', 'd'])
+        self.assertEqual(_manifest.items(), [('b', 2)])
+        self.assertEqual(_manifest.size(), 2)
+        _manifest = manifest.Manifest(self.directory)
+        self.assertEqual(_manifest.items(), [('b', 2)])
+
+    def test_rebuild(self):
+        """Testing method rebuild."""
+        # Test
+        _manifest = manifest.Manifest(self.directory)
+        _manifest.add('a', 1)
+        _manifest.rebuild([('b', 2), ('c', 3)])
+        self.assertEqual(_manifest.items(), [('b', 2), ('c', 3)])
+        with open(self.filepath) as f_handle:
+            self.assertEqual(f_handle.read(), '+\tb\t2\n+\tc\t3\n')
+
+    def test_compact(self):
+        """Testing method compact."""
+        # Journals aren't compacted until most records are for removed keys
+        _manifest = manifest.Manifest(self.directory)
+        for key in range(1500):
+            _manifest.add(str(key), 1)
+        _manifest.remove([str(key) for key in range(999)])
+        _manifest.compact()
+        with open(self.filepath) as f_handle:
+            self.assertEqual(len(f_handle.readlines()), 2499)
+
+        # Test
+        _manifest.remove(['999'])
+        _manifest.compact()
+        with open(self.filepath) as f_handle:
+            self.assertEqual(len(f_handle.readlines()), 500)
+        self.assertEqual(_manifest.count(), 500)
+        self.assertEqual(_manifest.items()[0], ('1000', 1))
+
+    def test_shared(self):
+        """Testing manifests shared by several objects."""
+        # Changes are seen by other objects
+        first = manifest.Manifest(self.directory)
+        second = manifest.Manifest(self.directory)
+        first.add('a', 1)
+        second.add('b', 2)
+        first.add('c', 3)
+        self.assertEqual(second.items(), [('a', 1), ('b', 2), ('c', 3)])
+        second.remove(['a'])
+        self.assertEqual(first.items(), [('b', 2), ('c', 3)])
+
+        # Compacted journals are read again
+        first.rebuild([('c', 3)])
+        self.assertEqual(second.items(), [('c', 3)])
+        second.add('d', 4)
+        self.assertEqual(first.items(), [('c', 3), ('d', 4)])
+
+    def test_close(self):
+        """Testing method close."""
+        # The journal is read again after it is closed
+        _manifest = manifest.Manifest(self.directory)
+        _manifest.add('a', 1)
+        _manifest.close()
+        self.assertIsNone(_manifest._fd)
+        _manifest.add('b', 2)
+        self.assertEqual(_manifest.items(), [('a', 1), ('b', 2)])
+        self.assertIsNotNone(_manifest._fd)
+        _manifest.close()
+        _manifest.close()
+        self.assertEqual(manifest.Manifest(self.directory).items(), [
+            ('a', 1), ('b', 2)])
+
+    def test__refresh(self):
+        """Testing method _refresh."""
+        # Invalid records are skipped and incomplete records are left unread
+        with open(self.filepath, 'w') as f_handle:
+            f_handle.write('+\ta\t1\nInvalid\n+\tb\tx\n+\tc\t3\n+\td')
+        _manifest = manifest.Manifest(self.directory)
+        self.assertEqual(_manifest.items(), [('a', 1), ('c', 3)])
+        with open(self.filepath, 'a') as f_handle:
+            f_handle.write('\t4\n')
+        self.assertEqual(_manifest.items(), [('a', 1), ('c', 3), ('d', 4)])
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
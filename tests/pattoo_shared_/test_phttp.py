@@ -3,17 +3,21 @@
 
 # Standard imports
 import json
+import email.utils
 import hashlib
 import uuid
 import os
 import random
 import tempfile
+import multiprocessing
+import threading
 import sys
-from time import time
+from time import time, sleep, monotonic
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 # PIP imports
+import requests
 import requests_mock
 
 # Try to create a working PYTHONPATH
@@ -32,14 +36,141 @@ else:
 
 # Pattoo imports
 from pattoo_shared import phttp
+from pattoo_shared import cache
 from pattoo_shared import data
 from pattoo_shared import converter
 from pattoo_shared import files
 from pattoo_shared import encrypt
+from pattoo_shared import compress
+from pattoo_shared import codec
+from pattoo_shared import delta
+from pattoo_shared.constants import IDEMPOTENCY_KEY_HEADER
 from tests.libraries.configuration import UnittestConfig
+from tests.libraries.server import StubAPIServer
 from tests.libraries import general as ta
 
 
+class TestRateLimiter(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_wait(self):
+        """Testing method or function named wait."""
+        # Unlimited rates don't wait
+        item = phttp.RateLimiter()
+        start = monotonic()
+        for _ in range(100):
+            item.wait()
+        self.assertTrue(monotonic() - start < 0.5)
+
+        # Limited rates wait between requests
+        item = phttp.RateLimiter(rate=50)
+        start = monotonic()
+        for _ in range(6):
+            item.wait()
+        self.assertTrue(monotonic() - start >= 0.1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_allow(self):
+        """Testing method or function named allow."""
+        # Closed circuits allow requests
+        item = phttp.CircuitBreaker(threshold=2, timeout=0.05)
+        self.assertTrue(item.allow())
+        self.assertEqual(item.failure(), 0)
+        self.assertTrue(item.allow())
+
+        # The circuit opens when the threshold is reached
+        self.assertTrue(item.failure() > 0)
+        self.assertFalse(item.allow())
+        self.assertTrue(item.blocked())
+
+        # Only one probe is allowed after the timeout
+        sleep(0.06)
+        self.assertFalse(item.blocked())
+        self.assertTrue(item.allow())
+        self.assertFalse(item.allow())
+        self.assertTrue(item.blocked())
+
+        # Failed probes open the circuit again
+        self.assertTrue(item.failure() > 0)
+        self.assertFalse(item.allow())
+
+        # Successful probes close it
+        sleep(0.06)
+        self.assertTrue(item.allow())
+        self.assertTrue(item.success())
+        self.assertTrue(item.allow())
+        self.assertTrue(item.allow())
+        self.assertFalse(item.success())
+
+    def test_failure(self):
+        """Testing method or function named failure."""
+        # Retry-After delays open the circuit before the threshold
+        item = phttp.CircuitBreaker(threshold=5, timeout=60)
+        self.assertEqual(item.failure(retry_after=0.05), 0.05)
+        self.assertFalse(item.allow())
+        sleep(0.06)
+        self.assertTrue(item.allow())
+
+        # Disabled circuit breakers never open
+        item = phttp.CircuitBreaker(threshold=0)
+        for _ in range(10):
+            self.assertEqual(item.failure(), 0)
+        self.assertTrue(item.allow())
+
+
+class TestTransport(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test___init__(self):
+        """Testing method or function named __init__."""
+        # Test
+        result = phttp.Transport(pool_size=3, keep_alive=False)
+        self.assertEqual(result.pool_size, 3)
+        self.assertFalse(result.keep_alive)
+
+    def test_session(self):
+        """Testing method or function named session."""
+        # Initialize key variables
+        item = phttp.Transport(pool_size=3)
+
+        # Sessions must share the same connection pool
+        session1 = item.session()
+        session2 = item.session()
+        self.assertNotEqual(session1, session2)
+        self.assertEqual(
+            session1.get_adapter('http://localhost'),
+            session2.get_adapter('http://localhost'))
+        self.assertEqual(session1.headers['Connection'], 'keep-alive')
+
+        # Test closing connections after each request
+        item = phttp.Transport(keep_alive=False)
+        session = item.session()
+        self.assertEqual(session.headers['Connection'], 'close')
+
+    def test_transport(self):
+        """Testing method or function named transport."""
+        # The same object must be shared within the process
+        result = phttp.transport()
+        self.assertTrue(isinstance(result, phttp.Transport))
+        self.assertEqual(result, phttp.transport())
+        self.assertEqual(result.pool_size, 10)
+
+
 class Test_Post(unittest.TestCase):
     """Test _Post."""
 
@@ -100,7 +231,7 @@ class TestPost(unittest.TestCase):
         post_test = phttp.Post(self.identifier, self.data)
 
         # Magically simulate post request
-        with patch('pattoo_shared.phttp.requests.post') as mock_post:
+        with patch('pattoo_shared.phttp.requests.Session.post') as mock_post:
 
             # Magically assign post response values
             mock_post.return_value.ok = True
@@ -114,19 +245,42 @@ class TestPost(unittest.TestCase):
             # and that it contained the right data
             mock_post.assert_called_with(
                 '''http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'''
-                .format(self.identifier), json=self.data
+                .format(self.identifier),
+                data=codec.encode(self.data),
+                headers={
+                    'Content-Type': 'application/json',
+                    IDEMPOTENCY_KEY_HEADER: cache.digest(
+                        codec.encode(self.data))}
                 )
 
             # Assert that the success is True
             self.assertTrue(success)
 
+    def test_post_delta(self):
+        """Testing method or function named post with delta encoding."""
+        # Initialize
+        post_test = phttp.Post(self.identifier, self.data)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/delta/{}'.format(
+            self.identifier)
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_delta_encoding', return_value=True):
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text='OK')
+                self.assertTrue(post_test.post())
+                posted = mock_.request_history[0].json()
+                self.assertIn('pattoo_dictionary', posted)
+                self.assertEqual(
+                    posted['pattoo_agent_id'], self.data['pattoo_agent_id'])
+
     def test_purge(self):
         """Testing method or function named purge."""
         # Initialize
         purge_test = phttp.Post(self.identifier, self.data)
 
         # Magically simulate post request
-        with patch('pattoo_shared.phttp.requests.post') as mock_post:
+        with patch('pattoo_shared.phttp.requests.Session.post') as mock_post:
 
             # Magically assign post response values
             mock_post.return_value.ok = True
@@ -143,10 +297,33 @@ class TestPost(unittest.TestCase):
             # and that it contained the right data
             mock_post.assert_called_with(
                 '''http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'''
-                .format(self.identifier), json=self.mod_data
+                .format(self.identifier),
+                data=codec.encode(self.mod_data),
+                headers={
+                    'Content-Type': 'application/json',
+                    IDEMPOTENCY_KEY_HEADER: cache.digest(
+                        codec.encode(self.mod_data))}
             )
 
 
+    def test_drain(self):
+        """Testing methods drain and purge with an empty cache."""
+        # Initialize key variables
+        identifier = data.hashstring(str(random.random()))
+        item = phttp.Post(identifier, self.data)
+
+        # The cache isn't purged unless it has data
+        with patch('pattoo_shared.phttp.purge') as mock_purge:
+            item.purge()
+            self.assertIsNone(item.drain())
+            mock_purge.assert_not_called()
+
+            # Test
+            phttp._save_data(self.data, identifier)
+            item.drain().join()
+            mock_purge.assert_called_once_with(item._url, identifier)
+
+
 class TestEncryptedPost(unittest.TestCase):
     """Checks all functions and methods."""
 
@@ -181,11 +358,147 @@ class TestEncryptedPost(unittest.TestCase):
     # Create EncryptedPost object
     encrypted_post = phttp.EncryptedPost(identifier, data, encrypt_agt)
 
+    def setUp(self):
+        """Start each test without cached sessions or circuit breakers."""
+        phttp.SESSIONS.clear()
+        phttp.BREAKERS.clear()
+
     def test___init__(self):
         """Testing method or function named __init__."""
         # Test variables
         pass
 
+    def test__session(self):
+        """Testing method or function named _session."""
+        # Simulate successful key exchanges
+        with patch('pattoo_shared.phttp.key_exchange') as mock_exchange:
+            mock_exchange.return_value = True
+
+            # The first call exchanges keys
+            session = self.encrypted_post._session()
+            self.assertEqual(mock_exchange.call_count, 1)
+            self.assertTrue(isinstance(session, phttp.EncryptedSession))
+
+            # The cached session is reused
+            result = self.encrypted_post._session()
+            self.assertEqual(result, session)
+            self.assertEqual(mock_exchange.call_count, 1)
+
+            # Rejected sessions are replaced
+            result = self.encrypted_post._session(rejected=session)
+            self.assertNotEqual(result, session)
+            self.assertEqual(mock_exchange.call_count, 2)
+
+            # Sessions that have already been replaced are not renewed
+            self.assertEqual(
+                self.encrypted_post._session(rejected=session), result)
+            self.assertEqual(mock_exchange.call_count, 2)
+
+            # Expired sessions are replaced
+            for index, item in phttp.SESSIONS.items():
+                phttp.SESSIONS[index] = item._replace(expiry=0)
+            session = self.encrypted_post._session()
+            self.assertEqual(mock_exchange.call_count, 3)
+            self.assertTrue(session.expiry > 0)
+
+            # Failed exchanges return None
+            mock_exchange.return_value = False
+            result = self.encrypted_post._session(rejected=session)
+            self.assertIsNone(result)
+
+    def test__session_concurrent(self):
+        """Testing method _session with key exchanges in many threads."""
+        # Initialize key variables
+        started = threading.Event()
+        finish = threading.Event()
+        other = phttp.EncryptedPost(
+            'other_{}'.format(self.identifier), self.data, self.encrypt_agt)
+
+        def exchange(metadata):
+            """Wait until released when exchanging keys for the agent."""
+            if threading.current_thread().name == 'slow':
+                started.set()
+                finish.wait(10)
+            return True
+
+        # Test
+        with patch('pattoo_shared.phttp.key_exchange') as mock_exchange:
+            mock_exchange.side_effect = exchange
+            thread = threading.Thread(
+                target=self.encrypted_post._session, name='slow')
+            thread.start()
+            self.assertTrue(started.wait(10))
+
+            # Other agents don't wait for the exchange to finish
+            result = []
+            thread_ = threading.Thread(
+                target=lambda: result.append(other._session()))
+            thread_.start()
+            thread_.join(5)
+            finish.set()
+            thread_.join()
+            self.assertEqual(len(result), 1)
+            self.assertIsNotNone(result[0])
+            self.assertEqual(mock_exchange.call_count, 2)
+
+            # The agent then uses the new session
+            thread.join()
+            self.encrypted_post._session()
+            self.assertEqual(mock_exchange.call_count, 2)
+
+    def test__post(self):
+        """Testing method or function named _post."""
+        # Initialize key variables
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/encrypted'
+
+        # Simulate successful key exchanges
+        with patch('pattoo_shared.phttp.key_exchange') as mock_exchange:
+            mock_exchange.return_value = True
+            with patch('pattoo_shared.phttp._encrypted_post') as mock_post:
+                # Sessions rejected by the API server are renewed
+                mock_post.side_effect = [
+                    MagicMock(status_code=401), MagicMock(status_code=202),
+                    MagicMock(status_code=403), MagicMock(status_code=202)]
+                for _ in range(2):
+                    success = self.encrypted_post._post(
+                        url, self.data, self.identifier)
+                    self.assertTrue(success)
+                self.assertEqual(mock_exchange.call_count, 3)
+                self.assertEqual(mock_post.call_count, 4)
+
+                # Other client errors and server errors don't trigger
+                # renewals
+                for status in [400, 409, 500]:
+                    mock_post.side_effect = [MagicMock(status_code=status)]
+                    success = self.encrypted_post._post(
+                        url, self.data, self.identifier)
+                    self.assertFalse(success)
+                self.assertEqual(mock_exchange.call_count, 3)
+                self.assertEqual(mock_post.call_count, 7)
+
+    def test__post_batch(self):
+        """Testing method or function named _post_batch."""
+        # Initialize key variables
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/encrypted/batch'
+        payloads = [('a', {'Test': 1}), ('b', {'Test': 2})]
+        response = MagicMock(status_code=202)
+        response.json.return_value = {'pattoo_payload_ids': ['a']}
+
+        # Simulate successful key exchanges
+        with patch('pattoo_shared.phttp.key_exchange') as mock_exchange:
+            mock_exchange.return_value = True
+            with patch('pattoo_shared.phttp._encrypted_post') as mock_post:
+                mock_post.return_value = response
+                result = self.encrypted_post._post_batch(
+                    url, payloads, self.identifier)
+                self.assertEqual(result, ['a'])
+
+                # The batch is encrypted as a single payload
+                metadata = mock_post.call_args[0][0]
+                self.assertEqual(
+                    codec.decode(metadata.data),
+                    converter.payloads_to_batch(self.identifier, payloads))
+
     def test_post(self):
         """Test EncryptedPost's post"""
 
@@ -263,8 +576,7 @@ class TestEncryptedPost(unittest.TestCase):
         def encrypted_callback(request, context):
             """Encrypted post callback for request mock"""
             # Retrieve encrypted data from received request object
-            json_data = request.json()
-            json_dict = json.loads(json_data)
+            json_dict = json.loads(request.json())
             encrypted_data = json_dict['encrypted_data']
             # Decrypt data
             decrypted_data = self.encrypt_api.sdecrypt(
@@ -393,8 +705,7 @@ class TestEncryptedPost(unittest.TestCase):
         def encrypted_callback(request, context):
             """Encrypted post callback for request mock"""
             # Retrieve encrypted data from received request object
-            json_data = request.json()
-            json_dict = json.loads(json_data)
+            json_dict = json.loads(request.json())
             encrypted_data = json_dict['encrypted_data']
             # Decrypt data
             decrypted_data = self.encrypt_api.sdecrypt(
@@ -457,17 +768,136 @@ class TestPassiveAgent(unittest.TestCase):
     # General object setup
     #########################################################################
 
+    # Initialize key variables
+    identifier = data.hashstring(str(random.random()))
+    url = 'http://127.0.0.7:50505/data'
+
     def test___init__(self):
         """Testing method or function named __init__."""
-        pass
+        # Test
+        agent = phttp.PassiveAgent('program', self.identifier, self.url)
+        self.assertEqual(agent.url(), self.url)
 
     def test_relay(self):
         """Testing method or function named relay."""
-        pass
+        # Initialize key variables
+        agent = phttp.PassiveAgent('program', self.identifier, self.url)
+        post_url = (
+            'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+                self.identifier))
+
+        # Test
+        with requests_mock.Mocker() as mock_:
+            mock_.get(self.url, [
+                {'json': {'Test': 1}, 'headers': {'ETag': '"1"'}},
+                {'status_code': 304}])
+            mock_.post(post_url, text='OK')
+
+            # Data is posted
+            agent.relay()
+            self.assertEqual(mock_.call_count, 2)
+            self.assertEqual(mock_.last_request.json(), {'Test': 1})
+
+            # Unchanged data isn't posted
+            agent.relay()
+            self.assertEqual(mock_.call_count, 3)
+            self.assertEqual(mock_.last_request.method, 'GET')
 
     def test_get(self):
         """Testing method or function named get."""
-        pass
+        # Initialize key variables
+        agent = phttp.PassiveAgent('program', self.identifier, self.url)
+        modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+        # Test
+        with requests_mock.Mocker() as mock_:
+            # Validators are saved
+            mock_.get(
+                self.url, json={'Test': 1},
+                headers={'ETag': '"1"', 'Last-Modified': modified})
+            self.assertEqual(agent.get(), {'Test': 1})
+            self.assertNotIn('If-None-Match', mock_.last_request.headers)
+
+            # Validators are sent and unchanged data is skipped
+            mock_.get(self.url, status_code=304)
+            self.assertEqual(agent.get(), {})
+            headers = mock_.last_request.headers
+            self.assertEqual(headers['If-None-Match'], '"1"')
+            self.assertEqual(headers['If-Modified-Since'], modified)
+
+            # Errors and invalid data return nothing
+            mock_.get(self.url, status_code=500)
+            self.assertEqual(agent.get(), {})
+            mock_.get(self.url, text='Invalid')
+            self.assertEqual(agent.get(), {})
+            mock_.get(self.url, exc=requests.exceptions.ConnectTimeout)
+            self.assertEqual(agent.get(timeout=1), {})
+            self.assertEqual(mock_.last_request.timeout, 1)
+
+
+class TestPassiveAgentPool(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test___init__(self):
+        """Testing method or function named __init__."""
+        # Test
+        item = phttp.PassiveAgentPool()
+        self.assertEqual(item.workers, 10)
+        self.assertEqual(item.timeout, 10)
+        self.assertEqual(item.agents(), [])
+
+    def test_add(self):
+        """Testing method or function named add."""
+        # Initialize key variables
+        agent1 = phttp.PassiveAgent('program', 'id', 'http://127.0.0.7/1')
+        agent2 = phttp.PassiveAgent('program', 'id', 'http://127.0.0.7/2')
+        agent3 = phttp.PassiveAgent('program', 'id', 'http://127.0.0.7/1')
+
+        # Agents with duplicate URLs are ignored
+        item = phttp.PassiveAgentPool(agents=[agent1, agent2])
+        item.add(agent3)
+        self.assertEqual(item.agents(), [agent1, agent2])
+
+    def test_relay(self):
+        """Testing method or function named relay."""
+        # Passive agents that take time to respond
+        def callback(method, path, headers, body):
+            """Return the path of the request."""
+            sleep(0.05)
+            return (200, codec.encode({'Test': path}), {})
+
+        server = StubAPIServer(callback=callback)
+        server.start()
+        agents = []
+        for value in range(20):
+            agents.append(phttp.PassiveAgent(
+                'program', 'id', '{}/{}'.format(server.url(), value)))
+        item = phttp.PassiveAgentPool(agents=agents, workers=10, timeout=1)
+
+        # Test
+        with patch.object(
+                phttp.Post, 'post', autospec=True,
+                return_value=False) as mock_post:
+            # Agents are polled concurrently
+            start = monotonic()
+            item.relay()
+            self.assertTrue(monotonic() - start < 0.05 * 20)
+            posted = [
+                _[0][0]._data['Test'] for _ in mock_post.call_args_list]
+            self.assertEqual(
+                sorted(posted), sorted(['/{}'.format(_) for _ in range(20)]))
+
+            # Failures don't stop other agents from being relayed
+            with patch.object(
+                    agents[0], 'get', side_effect=RuntimeError('Test')):
+                item.relay()
+            self.assertEqual(mock_post.call_count, 20 + 19)
+        self.assertEqual(len(server.received()), 20 + 19)
+        server.stop()
 
 
 class TestEncryptedPostAgent(unittest.TestCase):
@@ -489,6 +919,11 @@ class TestEncryptedPostAgent(unittest.TestCase):
     symmetric_key = None
     nonce = None
 
+    def setUp(self):
+        """Start each test without cached sessions or circuit breakers."""
+        phttp.SESSIONS.clear()
+        phttp.BREAKERS.clear()
+
     def test_agent(self):
         """Test agent post and purge"""
 
@@ -575,8 +1010,7 @@ class TestEncryptedPostAgent(unittest.TestCase):
         def encrypted_callback(request, context):
             """Encrypted post callback for request mock"""
             # Retrieve encrypted data from received request object
-            json_data = request.json()
-            json_dict = json.loads(json_data)
+            json_dict = json.loads(request.json())
             encrypted_data = json_dict['encrypted_data']
 
             # Decrypt data
@@ -637,9 +1071,9 @@ class TestEncryptedPostAgent(unittest.TestCase):
             # Encrypted purge
             encrypted_agent.purge()
 
-            # Check that both the post and purge exchanged keys and
-            # send data
-            self.assertEqual(mock_.call_count, 8)
+            # Check that the post exchanged keys and sent data, and that
+            # the purge reused the encrypted session to send data
+            self.assertEqual(mock_.call_count, 5)
 
 
 class TestBasicFunctions(unittest.TestCase):
@@ -649,14 +1083,593 @@ class TestBasicFunctions(unittest.TestCase):
     # General object setup
     #########################################################################
 
+    def setUp(self):
+        """Reset circuit breakers."""
+        phttp.BREAKERS.clear()
+
     def test_post(self):
         """Testing method or function named post."""
-        pass
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_breaker_threshold', return_value=2):
+            with requests_mock.Mocker() as mock_:
+                # Successful post
+                mock_.post(url, text='OK')
+                self.assertTrue(phttp.post(url, {'Test': 1}, identifier))
+                self.assertEqual(files_.filepaths(), [])
+
+                # Failed posts are cached. Server errors aren't retried.
+                mock_.post(url, status_code=500)
+                for value in range(2):
+                    self.assertFalse(
+                        phttp.post(url, {'Test': value}, identifier))
+                self.assertEqual(mock_.call_count, 3)
+                self.assertEqual(len(files_.filepaths()), 2)
+
+                # Data goes straight to the cache once the circuit opens
+                self.assertFalse(phttp.post(url, {'Test': 3}, identifier))
+                self.assertEqual(mock_.call_count, 3)
+                self.assertEqual(len(files_.filepaths()), 3)
+
+                # Nothing is cached when purging
+                self.assertFalse(
+                    phttp.post(url, {'Test': 4}, identifier, save=False))
+                self.assertEqual(len(files_.filepaths()), 3)
+
+                # Purging doesn't post while the circuit is open
+                phttp.purge(url, identifier)
+                self.assertEqual(mock_.call_count, 3)
+                self.assertEqual(len(files_.filepaths()), 3)
+
+        # Clean up
+        for filepath in files_.filepaths():
+            os.remove(filepath)
+
+    def test_post_delta(self):
+        """Testing method or function named post_delta."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/delta/{}'.format(
+            identifier)
+        decoder = delta.Decoder()
+        decoded = []
+
+        def callback(request, context):
+            """Decode posts like the pattoo API would."""
+            result = decoder.decode(request.json())
+            context.status_code = 409 if result is None else 200
+            decoded.append(result)
+            return 'OK'
+
+        # Test
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text=callback)
+
+            # Only the first post contains the key-value pairs of the data
+            for _ in range(2):
+                _data = converter.posting_data_points(
+                    converter.agentdata_to_post(ta.test_agent()))
+                self.assertTrue(phttp.post_delta(url, _data, identifier))
+                self.assertEqual(
+                    converter.cache_to_keypairs(decoded[-1]),
+                    converter.cache_to_keypairs(
+                        codec.decode(codec.encode(_data))))
+            history = mock_.request_history
+            self.assertTrue(
+                bool(history[0].json()['pattoo_dictionary'][
+                    'key_value_pairs']))
+            self.assertEqual(
+                history[1].json()['pattoo_dictionary']['key_value_pairs'], [])
+            self.assertTrue(len(history[1].body) < len(history[0].body))
+
+            # The dictionary is posted again if the API server doesn't have it
+            decoder = delta.Decoder()
+            self.assertTrue(phttp.post_delta(url, _data, identifier))
+            self.assertEqual(mock_.call_count, 4)
+            self.assertIsNone(decoded[-2])
+            self.assertIsNotNone(decoded[-1])
+            self.assertEqual(files_.filepaths(), [])
+
+            # Failed posts are cached without delta encoding
+            mock_.post(url, status_code=400)
+            self.assertFalse(phttp.post_delta(url, _data, identifier))
+            self.assertEqual(len(files_.filepaths()), 1)
+            self.assertEqual(
+                codec.read(files_.filepaths()[0]),
+                codec.decode(codec.encode(_data)))
+
+        # Clean up
+        for filepath in files_.filepaths():
+            os.remove(filepath)
+
+    def test_post_delta_fallback(self):
+        """Testing function post_delta with many API server workers."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/delta/{}'.format(
+            identifier)
+        decoders = [delta.Decoder() for _ in range(3)]
+        _data = converter.posting_data_points(
+            converter.agentdata_to_post(ta.test_agent()))
+
+        def callback(request, context):
+            """Decode posts with a different Decoder each time, like API
+            servers with many worker processes would."""
+            decoder = decoders[len(mock_.request_history) % len(decoders)]
+            result = decoder.decode(request.json())
+            context.status_code = 409 if result is None else 200
+            return 'OK'
+
+        # Test
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text=callback)
+
+            # The whole dictionary is posted at most once more
+            for count in range(1, 6):
+                self.assertTrue(phttp.post_delta(url, _data, identifier))
+                self.assertTrue(mock_.call_count <= count * 2)
+
+            # Posts aren't retried forever if the server keeps rejecting
+            # the dictionary
+            calls = mock_.call_count
+            mock_.post(url, status_code=409)
+            self.assertFalse(phttp.post_delta(url, _data, identifier))
+            self.assertEqual(mock_.call_count - calls, 2)
+            self.assertEqual(len(files_.filepaths()), 1)
+
+        # Clean up
+        for filepath in files_.filepaths():
+            os.remove(filepath)
+
+    def test__request(self):
+        """Testing method or function named _request."""
+        # Initialize key variables
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/test'
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_backoff', return_value=0.01):
+            with requests_mock.Mocker() as mock_:
+                # Temporary errors are retried
+                mock_.post(url, [
+                    {'status_code': 503, 'headers': {'Retry-After': '0'}},
+                    {'status_code': 429},
+                    {'text': 'OK'}])
+                response = phttp._request(
+                    url, lambda: phttp.transport().post(url), 'Test')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(mock_.call_count, 3)
+
+                # Connection failures are retried up to the retry limit
+                mock_.post(url, exc=requests.exceptions.ConnectionError)
+                response = phttp._request(
+                    url, lambda: phttp.transport().post(url), 'Test')
+                self.assertIsNone(response)
+                self.assertEqual(mock_.call_count, 6)
+
+                # Client errors aren't retried
+                mock_.post(url, status_code=404)
+                response = phttp._request(
+                    url, lambda: phttp.transport().post(url), 'Test')
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(mock_.call_count, 7)
+
+                # Don't wait longer than the maximum backoff
+                mock_.post(
+                    url, status_code=503, headers={'Retry-After': '3600'})
+                response = phttp._request(
+                    url, lambda: phttp.transport().post(url), 'Test')
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(mock_.call_count, 8)
+
+                # The server asked us to wait, so the circuit is open
+                self.assertTrue(phttp.breaker(url).blocked())
+                response = phttp._request(
+                    url, lambda: phttp.transport().post(url), 'Test')
+                self.assertIsNone(response)
+                self.assertEqual(mock_.call_count, 8)
+
+    def test__body(self):
+        """Testing method or function named _body."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+        data_ = {'Test': 'pattoo_agent_test' * 100}
+
+        # Posts aren't compressed by default
+        (body, headers) = phttp._body(data_)
+        self.assertEqual(json.loads(body.decode()), data_)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotIn(IDEMPOTENCY_KEY_HEADER, headers)
+
+        # Posts of agent data carry the digest of the data
+        payload = phttp._payload(data_)
+        (_, headers) = phttp._body(payload, payload=payload)
+        self.assertEqual(
+            headers[IDEMPOTENCY_KEY_HEADER], cache.digest(payload))
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text='OK')
+            self.assertTrue(phttp.post(url, data_, identifier))
+            self.assertEqual(
+                mock_.last_request.headers[IDEMPOTENCY_KEY_HEADER],
+                cache.digest(payload))
+
+        # Test compressed posts
+        with patch.object(
+                phttp.Config, 'agent_api_compression', return_value='gzip'):
+            (body, headers) = phttp._body(data_)
+            self.assertEqual(headers['Content-Encoding'], 'gzip')
+            self.assertTrue(len(body) < len(json.dumps(data_)))
+
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text='OK')
+                self.assertTrue(phttp.post(url, data_, identifier))
+                request = mock_.last_request
+                self.assertEqual(request.headers['Content-Encoding'], 'gzip')
+                self.assertEqual(
+                    compress.json_data(
+                        request.body, request.headers['Content-Encoding']),
+                    data_)
+
+    def test__payload(self):
+        """Testing method or function named _payload."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+        data_ = {'Test': 'pattoo_agent_test'}
+
+        # Test
+        self.assertEqual(phttp._payload(data_), codec.encode(data_))
+        self.assertEqual(phttp._payload(b'{"Test":1}'), b'{"Test":1}')
+
+        # Failed posts are encoded once. The posted JSON is cached.
+        with patch.object(
+                phttp.codec, 'encode', wraps=codec.encode) as mock_encode:
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, status_code=400)
+                self.assertFalse(phttp.post(url, data_, identifier))
+                body = mock_.last_request.body
+            self.assertEqual(mock_encode.call_count, 1)
+        result = list(cache.store(identifier).entries(decode=False))
+        self.assertEqual([_.data for _ in result], [body])
+
+        # Cached JSON is posted as is
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text='OK')
+            phttp.purge(url, identifier)
+            self.assertEqual(mock_.last_request.body, body)
+        self.assertEqual(list(cache.store(identifier).entries()), [])
+
+    def test__envelope(self):
+        """Testing method or function named _envelope."""
+        # Test
+        result = phttp._envelope(b'{"Test":[1,2]}', 'abc')
+        self.assertEqual(
+            json.loads(result), {'data': {'Test': [1, 2]}, 'source': 'abc'})
+
+    def test__encrypted_body(self):
+        """Testing method or function named _encrypted_body."""
+        # Encrypted data is posted as a JSON string by default
+        result = phttp._encrypted_body('abc')
+        self.assertEqual(json.loads(result), {'encrypted_data': 'abc'})
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_encrypted_json_object',
+                return_value=True):
+            result = phttp._encrypted_body('abc')
+        self.assertEqual(result, {'encrypted_data': 'abc'})
+
+    def test__retry_after(self):
+        """Testing method or function named _retry_after."""
+        # Test
+        response = MagicMock(headers={})
+        self.assertIsNone(phttp._retry_after(response))
+        response = MagicMock(headers={'Retry-After': '120'})
+        self.assertEqual(phttp._retry_after(response), 120)
+        response = MagicMock(headers={'Retry-After': 'Invalid'})
+        self.assertIsNone(phttp._retry_after(response))
+        response = MagicMock(headers={
+            'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(phttp._retry_after(response), 0)
+        response = MagicMock(headers={
+            'Retry-After': email.utils.formatdate(time() + 100)})
+        self.assertTrue(90 < phttp._retry_after(response) <= 100)
+
+    def test_breaker(self):
+        """Testing method or function named breaker."""
+        # Endpoints share circuit breakers
+        result = phttp.breaker('http://127.0.0.6:50505/one')
+        self.assertTrue(isinstance(result, phttp.CircuitBreaker))
+        self.assertEqual(result, phttp.breaker('http://127.0.0.6:50505/two'))
+        self.assertNotEqual(result, phttp.breaker('http://127.0.0.6:1/one'))
+        self.assertEqual(result.threshold, 5)
+
+    def test_backoff(self):
+        """Testing method or function named backoff."""
+        # Test
+        for attempt in range(5):
+            expected = min(4, 0.5 * (2 ** attempt))
+            result = phttp.backoff(attempt, 0.5, 4)
+            self.assertTrue(expected / 2 <= result <= expected)
 
     def test_purge(self):
         """Testing method or function named purge."""
         pass
 
+    def test_purge_workers(self):
+        """Testing purge with concurrent workers."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        # Save data to cache
+        for value in range(10):
+            phttp._save_data({'Test': value}, identifier)
+            sleep(0.002)
+        self.assertEqual(len(files_.filepaths()), 10)
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_purge_workers', return_value=4):
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text='OK')
+                phttp.purge(url, identifier)
+                self.assertEqual(mock_.call_count, 10)
+        self.assertEqual(files_.filepaths(), [])
+
+    def test_purge_claims(self):
+        """Testing purge with cache files claimed by another process."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        # Save data to cache, then claim half of it with another store
+        for value in range(4):
+            phttp._save_data({'Test': value}, identifier)
+            sleep(0.002)
+        other = cache.FileStore(identifier)
+        claimed = list(other.entries(claim=True))
+        other.release([_.key for _ in claimed[1::2]])
+
+        # Only unclaimed files are posted
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text='OK')
+            phttp.purge(url, identifier)
+            self.assertEqual(
+                [_.json() for _ in mock_.request_history],
+                [{'Test': 1}, {'Test': 3}])
+        self.assertEqual(
+            [_.data for _ in cache.FileStore(identifier).entries()],
+            [{'Test': 0}, {'Test': 2}])
+
+        # Files are posted once released
+        other.unlock()
+        with requests_mock.Mocker() as mock_:
+            mock_.post(url, text='OK')
+            phttp.purge(url, identifier)
+            self.assertEqual(mock_.call_count, 2)
+        self.assertEqual(cache.FileStore(identifier).filepaths(), [])
+
+    def test_purge_processes(self):
+        """Testing purge by several processes at the same time."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        server = StubAPIServer()
+        server.start()
+        url = '{}/pattoo/api/v1/agent/receive/{}'.format(
+            server.url(), identifier)
+
+        # Save data to cache
+        for value in range(20):
+            phttp._save_data({'Test': value}, identifier)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=phttp.purge, args=(url, identifier))
+            for _ in range(3)]
+
+        # Test. Each cached post is only posted once.
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        server.stop()
+        self.assertEqual(
+            sorted(json.loads(_[3].decode())['Test']
+                   for _ in server.received()),
+            list(range(20)))
+        self.assertEqual(cache.FileStore(identifier).filepaths(), [])
+
+    def test_purge_locked(self):
+        """Testing purge of a spool locked by another process."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        with patch.object(
+                phttp.Config, 'cache_backend', return_value='spool'):
+            # Save data to the spool, then lock it with another store
+            for value in range(2):
+                phttp._save_data({'Test': value}, identifier)
+            other = cache.SpoolStore(identifier)
+            self.assertTrue(other.lock())
+
+            # Test
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text='OK')
+                phttp.purge(url, identifier)
+                self.assertEqual(mock_.call_count, 0)
+                other.unlock()
+                phttp.purge(url, identifier)
+                self.assertEqual(mock_.call_count, 2)
+            self.assertEqual(cache.store(identifier).pending(), (0, 0))
+
+    def test_post_batch(self):
+        """Testing method or function named post_batch."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/batch/{}'.format(
+            identifier)
+        payloads = [('a', {'Test': 1}), ('b', {'Test': 2})]
+
+        # Test
+        with requests_mock.Mocker() as mock_:
+            # Only some payloads are acknowledged
+            mock_.post(url, json={'pattoo_payload_ids': ['b', 'z']})
+            result = phttp.post_batch(url, payloads, identifier)
+            self.assertEqual(result, ['b'])
+            self.assertEqual(
+                mock_.last_request.json(),
+                converter.payloads_to_batch(identifier, payloads))
+
+            # Nothing is acknowledged after errors
+            mock_.post(url, status_code=500)
+            result = phttp.post_batch(url, payloads, identifier)
+            self.assertEqual(result, [])
+            mock_.post(url, text='Invalid')
+            result = phttp.post_batch(url, payloads, identifier)
+            self.assertEqual(result, [])
+
+    def test_purge_batch(self):
+        """Testing method or function named purge_batch."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/batch/{}'.format(
+            identifier)
+
+        # Acknowledge only the first payload of each batch
+        def callback(request, context):
+            """Batch acknowledgement callback."""
+            payloads = converter.batch_to_payloads(request.json())
+            return converter.batch_acknowledgement([payloads[0][0]])
+
+        # Save data to cache
+        for value in range(3):
+            phttp._save_data({'Test': value}, identifier)
+            sleep(0.002)
+        filepaths = files_.filepaths()
+        self.assertEqual(len(filepaths), 3)
+
+        # Test
+        with patch.object(
+                phttp.Config, 'agent_api_batch_size', return_value=2):
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, json=callback)
+                phttp.purge_batch(url, identifier)
+                self.assertEqual(mock_.call_count, 2)
+
+        # Only the unacknowledged file remains
+        self.assertEqual(files_.filepaths(), [filepaths[1]])
+
+    def test_purge_spool(self):
+        """Testing function purge with the spool cache backend."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+        received = []
+
+        # Fail after the second post
+        def callback(request, context):
+            """Post callback."""
+            received.append(request.json())
+            context.status_code = 200 if len(received) <= 2 else 400
+            return 'OK'
+
+        with patch.object(
+                phttp.Config, 'cache_backend', return_value='spool'):
+            # Save data to the spool, not cache files
+            for value in range(4):
+                self.assertTrue(phttp._save_data({'Test': value}, identifier))
+            self.assertEqual(files_.filepaths(), [])
+
+            # Posting stops at the first failure
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text=callback)
+                phttp.purge(url, identifier)
+            self.assertEqual(
+                received, [{'Test': 0}, {'Test': 1}, {'Test': 2}])
+            result = [
+                entry.data for entry in cache.store(identifier).entries()]
+            self.assertEqual(result, [{'Test': 2}, {'Test': 3}])
+
+    def test_purge_sqlite(self):
+        """Testing function purge with the sqlite cache backend."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        with patch.object(
+                phttp.Config, 'cache_backend', return_value='sqlite'):
+            # Save data to the database
+            for value in range(5):
+                self.assertTrue(phttp._save_data({'Test': value}, identifier))
+            self.assertEqual(len(list(cache.store(identifier).entries())), 5)
+
+            # Test
+            with patch.object(
+                    phttp.Config, 'agent_api_purge_workers', return_value=3):
+                with requests_mock.Mocker() as mock_:
+                    mock_.post(url, text='OK')
+                    phttp.purge(url, identifier)
+                    self.assertEqual(mock_.call_count, 5)
+            self.assertEqual(list(cache.store(identifier).entries()), [])
+
+    def test_purge_batch_spool(self):
+        """Testing function purge_batch with the spool cache backend."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/batch/{}'.format(
+            identifier)
+
+        batches = []
+
+        # Acknowledge all but the first payload of the second batch
+        def callback(request, context):
+            """Batch acknowledgement callback."""
+            payloads = converter.batch_to_payloads(request.json())
+            batches.append(payloads)
+            if len(batches) == 1:
+                return converter.batch_acknowledgement(
+                    [payload_id for payload_id, _ in payloads])
+            return converter.batch_acknowledgement([payloads[1][0]])
+
+        with patch.object(
+                phttp.Config, 'cache_backend', return_value='spool'):
+            # Save data to the spool
+            for value in range(5):
+                phttp._save_data({'Test': value}, identifier)
+
+            # Test
+            with patch.object(
+                    phttp.Config, 'agent_api_batch_size', return_value=2):
+                with requests_mock.Mocker() as mock_:
+                    mock_.post(url, json=callback)
+                    phttp.purge_batch(url, identifier)
+                    self.assertEqual(mock_.call_count, 2)
+
+            # The spool restarts at the first unacknowledged payload
+            result = [
+                entry.data for entry in cache.store(identifier).entries()]
+            self.assertEqual(result, [{'Test': 2}, {'Test': 3}, {'Test': 4}])
+
     def test__save_data(self):
         """Testing method or function named _save_data."""
         # Initialize key variables
@@ -672,6 +1685,49 @@ class TestBasicFunctions(unittest.TestCase):
         success = phttp._save_data(_data, identifier)
         self.assertTrue(success)
 
+        # Duplicates aren't saved again
+        store = cache.store(identifier)
+        self.assertEqual(store.pending()[0], 2)
+        self.assertTrue(phttp._save_data({'Test': 'data'}, identifier))
+        self.assertTrue(phttp._save_data(b'{"Test":"data"}', identifier))
+        self.assertEqual(store.pending()[0], 2)
+        store.remove([_.key for _ in store.entries()])
+        self.assertTrue(phttp._save_data({'Test': 'data'}, identifier))
+        self.assertEqual(store.pending()[0], 1)
+        store.remove([_.key for _ in store.entries()])
+
+    def test__save_data_retry_queue(self):
+        """Testing _save_data with a retry queue."""
+        # Initialize key variables
+        identifier = data.hashstring(str(time()))
+        files_ = cache.FileStore(identifier)
+        url = 'http://127.0.0.6:50505/pattoo/api/v1/agent/receive/{}'.format(
+            identifier)
+
+        # Failed posts are held in memory
+        with patch.object(
+                phttp.Config, 'agent_api_retry_queue', return_value=2):
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, status_code=500)
+                for value in range(3):
+                    phttp.post(url, {'Test': value}, identifier)
+            queue = cache.queue(identifier)
+            self.assertEqual(
+                [_.data for _ in queue.entries()],
+                [{'Test': 1}, {'Test': 2}])
+
+            # Only data that doesn't fit in memory is saved to disk
+            self.assertEqual([_.data for _ in files_.entries()], [
+                {'Test': 0}])
+
+            # Test purge
+            with requests_mock.Mocker() as mock_:
+                mock_.post(url, text='OK')
+                phttp.purge(url, identifier)
+                self.assertEqual(mock_.call_count, 3)
+            self.assertEqual(queue.pending(), (0, 0))
+            self.assertEqual(files_.pending(), (0, 0))
+
     def test__log(self):
         """Testing method or function named _log."""
         pass
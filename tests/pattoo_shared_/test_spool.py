@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Test the spool module."""
+
+# Standard imports
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Try to create a working PYTHONPATH
+EXEC_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(
+    os.path.abspath(os.path.join(EXEC_DIR, os.pardir)), os.pardir))
+_EXPECTED = '{0}pattoo-shared{0}tests{0}pattoo_shared_'.format(os.sep)
+if EXEC_DIR.endswith(_EXPECTED) is True:
+    # We need to prepend the path in case PattooShared has been installed
+    # elsewhere on the system using PIP. This could corrupt expected results
+    sys.path.insert(0, ROOT_DIR)
+else:
+    print('''This script is not installed in the "{0}" directory. Please fix.\
+'''.format(_EXPECTED))
+    sys.exit(2)
+
+# Pattoo imports
+from pattoo_shared import spool
+from tests.libraries.configuration import UnittestConfig
+
+
+class TestSpool(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a spool directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Delete the spool directory."""
+        shutil.rmtree(self.directory)
+
+    def _data(self, _spool):
+        """Get the uncommitted data in a spool."""
+        return [data for data, _, _ in _spool.records()]
+
+    def _segments(self):
+        """Get the segment files in the spool directory."""
+        return sorted([
+            filename for filename in os.listdir(self.directory)
+            if filename.endswith('.spool')])
+
+    def test_append(self):
+        """Testing method append."""
+        # Test
+        _spool = spool.Spool(self.directory)
+        for value in range(3):
+            _spool.append({'Test': value})
+        self.assertEqual(
+            self._data(_spool), [{'Test': 0}, {'Test': 1}, {'Test': 2}])
+        self.assertEqual(len(self._segments()), 1)
+
+        # Segments are rotated when full
+        _spool = spool.Spool(self.directory, segment_bytes=30)
+        for value in range(3, 6):
+            _spool.append({'Test': value})
+        self.assertEqual(len(self._segments()), 4)
+        self.assertEqual(
+            self._data(_spool), [{'Test': value} for value in range(6)])
+
+        # Compressed and uncompressed records can be mixed
+        _spool = spool.Spool(self.directory, compression=6)
+        _spool.append({'Test': 6})
+        self.assertEqual(
+            self._data(_spool), [{'Test': value} for value in range(7)])
+
+        # JSON is appended as is, and can be read without being decoded
+        _spool.append(b'{"Test":7}')
+        result = [data for data, _, _ in _spool.records(decode=False)]
+        self.assertEqual(result[-2:], [b'{"Test":6}', b'{"Test":7}'])
+
+    def test_records(self):
+        """Testing method records."""
+        # Test
+        _spool = spool.Spool(self.directory)
+        _spool.append({'Test': 0})
+        _spool.append({'Test': 1})
+        result = list(_spool.records())
+        self.assertEqual(len(result), 2)
+        (data, position, size) = result[0]
+        self.assertEqual(data, {'Test': 0})
+        self.assertEqual(position.segment, 0)
+        self.assertEqual(size, len(b'{"Test":0}'))
+        self.assertEqual(result[1][1].offset, 2 * (8 + size))
+
+        # Corrupted records are skipped
+        filepath = os.path.join(self.directory, self._segments()[0])
+        with open(filepath, 'r+b') as f_handle:
+            f_handle.seek(10)
+            f_handle.write(b'X')
+        self.assertEqual(self._data(_spool), [{'Test': 1}])
+
+    def test_commit(self):
+        """Testing method commit."""
+        # Test
+        _spool = spool.Spool(self.directory, segment_bytes=40)
+        for value in range(4):
+            _spool.append({'Test': value})
+        self.assertEqual(len(self._segments()), 2)
+
+        # Commit the first record
+        records = list(_spool.records())
+        _spool.commit(records[0][1])
+        self.assertEqual(
+            self._data(_spool), [{'Test': 1}, {'Test': 2}, {'Test': 3}])
+        self.assertEqual(len(self._segments()), 2)
+
+        # Completely processed segments are deleted
+        _spool.commit(records[1][1])
+        self.assertEqual(self._data(_spool), [{'Test': 2}, {'Test': 3}])
+        self.assertEqual(len(self._segments()), 1)
+
+        # The cursor doesn't move backwards
+        _spool.commit(records[2][1])
+        _spool.commit(records[0][1])
+        self.assertEqual(self._data(_spool), [{'Test': 3}])
+
+        # New data is appended after the cursor
+        _spool.commit(records[3][1])
+        self.assertEqual(self._data(_spool), [])
+        _spool.append({'Test': 4})
+        self.assertEqual(self._data(_spool), [{'Test': 4}])
+
+    def test_save(self):
+        """Testing method save."""
+        # Test
+        _spool = spool.Spool(self.directory)
+        for value in range(3):
+            _spool.append({'Test': value})
+        _spool.commit(list(_spool.records())[0][1])
+        _spool.save()
+        _spool.close()
+
+        # The cursor is read by new objects
+        _spool = spool.Spool(self.directory)
+        self.assertEqual(self._data(_spool), [{'Test': 1}, {'Test': 2}])
+
+        # Invalid cursors are ignored
+        with open(os.path.join(self.directory, 'cursor.json'), 'w') as f_:
+            f_.write('{')
+        _spool = spool.Spool(self.directory)
+        self.assertEqual(len(self._data(_spool)), 3)
+
+    def test_shared(self):
+        """Testing spools shared by several processes."""
+        # Initialize key variables
+        _spool = spool.Spool(self.directory)
+        other = spool.Spool(self.directory)
+        for value in range(5):
+            _spool.append({'Test': value})
+
+        # Records committed and saved by another process aren't returned
+        _spool.commit(list(_spool.records())[2][1])
+        _spool.save()
+        self.assertEqual(self._data(other), [{'Test': 3}, {'Test': 4}])
+        self.assertEqual(other.count(), 2)
+        self.assertEqual(other.size(), _spool.size())
+
+        # Commits that haven't been saved are kept
+        other.commit(list(other.records())[0][1])
+        self.assertEqual(self._data(other), [{'Test': 4}])
+
+    def test_size(self):
+        """Testing method size."""
+        # Test
+        _spool = spool.Spool(self.directory)
+        self.assertEqual(_spool.size(), 0)
+        _spool.append({'Test': 0})
+        _spool.append({'Test': 1})
+        self.assertEqual(_spool.size(), 2 * (8 + len(b'{"Test":0}')))
+        _spool.commit(list(_spool.records())[0][1])
+        self.assertEqual(_spool.size(), 8 + len(b'{"Test":0}'))
+
+    def test_count(self):
+        """Testing method count."""
+        # Test
+        _spool = spool.Spool(self.directory, segment_bytes=40)
+        self.assertEqual(_spool.count(), 0)
+        for value in range(5):
+            _spool.append({'Test': value})
+        self.assertEqual(_spool.count(), 5)
+        _spool.commit(list(_spool.records())[2][1])
+        self.assertEqual(_spool.count(), 2)
+
+    def test__recover(self):
+        """Testing method _recover."""
+        # Write an incomplete record as if the agent crashed
+        _spool = spool.Spool(self.directory)
+        _spool.append({'Test': 0})
+        _spool.close()
+        filepath = os.path.join(self.directory, self._segments()[0])
+        with open(filepath, 'ab') as f_handle:
+            f_handle.write(b'\x00\x00\x00\xff\x00')
+
+        # The incomplete record is removed before appending
+        _spool = spool.Spool(self.directory)
+        self.assertEqual(self._data(_spool), [{'Test': 0}])
+        _spool.append({'Test': 1})
+        self.assertEqual(self._data(_spool), [{'Test': 0}, {'Test': 1}])
+
+
+if __name__ == '__main__':
+    # Make sure the environment is OK to run unittests
+    UnittestConfig().create()
+
+    # Do the unit test
+    unittest.main()
@@ -29,8 +29,8 @@ from pattoo_shared.configuration import Config
 from pattoo_shared.constants import (
     DATA_INT, DATA_STRING, DATA_FLOAT, DATAPOINT_KEYS, AGENT_METADATA_KEYS)
 from pattoo_shared.variables import (
-    DataPoint, DataPointMetadata, ConverterMetadata, PostingDataPoints,
-    TargetDataPoints, TargetPollingPoints,
+    DataPoint, DataPointBatch, DataPointMetadata, ConverterMetadata,
+    PostingDataPoints, TargetDataPoints, TargetPollingPoints,
     PollingPoint, IPTargetPollingPoints, AgentPolledData, AgentAPIVariable)
 from tests.libraries.configuration import UnittestConfig
 
@@ -116,6 +116,13 @@ class TestDataPointMetadata(unittest.TestCase):
             result = DataPointMetadata(key, value)
             self.assertFalse(result.valid)
 
+        # Repeated keys and values are stored once
+        first = DataPointMetadata(' '.join(['key']), ''.join(['val', 'ue']))
+        second = DataPointMetadata('key ', 'value ')
+        self.assertIs(first.key, second.key)
+        self.assertIs(first.value, second.value)
+        self.assertFalse(hasattr(first, '__dict__'))
+
     def test___repr__(self):
         """Testing function __repr__."""
         # Setup DataPointMetadata
@@ -410,6 +417,129 @@ timestamp={}, valid=True>'''.format(variable.timestamp))
         self.assertEqual(variable.checksum, '''\
 2518ce8c9dc0683ef87a6a438c8c79c2ae3fd8ffd38032b6c1d253057d04c8f7''')
 
+        # DataPoints have no per-instance __dict__
+        self.assertFalse(hasattr(variable, '__dict__'))
+        with self.assertRaises(AttributeError):
+            variable.unknown = None
+
+        # DataPoints with the same metadata keys share the tuple of keys
+        datapoints = [DataPoint(_key_, value) for value in range(2)]
+        for datapoint in datapoints:
+            for key in [1, 3]:
+                datapoint.add(DataPointMetadata(key, datapoint.value))
+        self.assertEqual(datapoints[0]._checksum_keys, ('1', '3'))
+        self.assertIs(
+            datapoints[0]._checksum_keys, datapoints[1]._checksum_keys)
+
+
+class TestDataPointBatch(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test___init__(self):
+        """Testing function __init__."""
+        # Test
+        batch = DataPointBatch()
+        self.assertEqual(batch.data_type, DATA_INT)
+        self.assertFalse(batch.valid)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.keys, [])
+        self.assertEqual(batch.metadata, {})
+
+        # Nothing is added with an invalid data_type
+        batch = DataPointBatch(data_type=True)
+        batch.extend(['a'], [1])
+        self.assertFalse(batch.valid)
+        self.assertEqual(len(batch), 0)
+
+    def test___repr__(self):
+        """Testing function __repr__."""
+        # Test
+        batch = DataPointBatch(data_type=DATA_FLOAT)
+        batch.extend(['a', 'b'], [1.5, 2.5])
+        self.assertEqual(
+            batch.__repr__(),
+            '<DataPointBatch data_type=101, datapoints=2, valid=True>')
+
+    def test_extend(self):
+        """Testing function extend."""
+        # Valid columns are stored in arrays
+        batch = DataPointBatch()
+        batch.extend([' A', 'b', '3'], [1, 2, 3], timestamp=1000)
+        self.assertTrue(batch.valid)
+        self.assertEqual(batch.keys, ['a', 'b', '3'])
+        self.assertEqual(batch.values.typecode, 'q')
+        self.assertEqual(list(batch.values), [1, 2, 3])
+        self.assertEqual(list(batch.timestamps), [1000, 1000, 1000])
+
+        # Invalid and duplicate DataPoints are dropped. Values converted by
+        # DataPoint objects are converted the same way.
+        batch.extend(
+            ['c', 'a', 'pattoo_d', '', 'e', 'f', 'g'],
+            ['4', 5, 6, 7, True, 'x', 2.5], timestamp=2000)
+        self.assertEqual(batch.keys, ['a', 'b', '3', 'c', 'g'])
+        self.assertEqual(list(batch.values), [1, 2, 3, 4, 2.5])
+        self.assertEqual(
+            list(batch.timestamps), [1000, 1000, 1000, 2000, 2000])
+
+        # Columns of different lengths are ignored
+        batch.extend(['h', 'i'], [1])
+        self.assertEqual(len(batch), 5)
+
+        # Test floats and strings
+        batch = DataPointBatch(data_type=DATA_FLOAT)
+        batch.extend(['a', 'b'], [1.5, 2.5])
+        self.assertEqual(batch.values.typecode, 'd')
+        batch = DataPointBatch(data_type=DATA_STRING)
+        batch.extend(['a', 'b', 'c'], ['x', 2, None])
+        self.assertEqual(batch.keys, ['a', 'b'])
+        self.assertEqual(batch.values, ['x', '2'])
+
+    def test_add(self):
+        """Testing functions add and checksums."""
+        # Initialize key variables
+        batch = DataPointBatch()
+        batch.extend(['testing', 'other'], [1093454, 2])
+        metadata = [DataPointMetadata(key, value) for key, value in [
+            (1, 2), (3, 4), (5, 6)]]
+
+        # Checksums are the same as those of DataPoints
+        batch.add(metadata)
+        batch.add(DataPointMetadata(1, 3))
+        batch.add(DataPointMetadata(10, 20, update_checksum=False))
+        self.assertEqual(batch.metadata, {
+            '1': '2', '3': '4', '5': '6', '10': '20'})
+        self.assertEqual(batch.checksums()[0], '''\
+73ce7225ca1ea55f53c96991c9922a185cf695224b94f2051b8a853049ba1935''')
+        self.assertEqual(
+            batch.checksums(), [_.checksum for _ in batch.datapoints()])
+
+        # Reserved keys are ignored
+        for key in DATAPOINT_KEYS:
+            batch.add(DataPointMetadata(key, '_{}_'.format(key)))
+        self.assertEqual(len(batch.metadata), 4)
+
+    def test_datapoints(self):
+        """Testing function datapoints."""
+        # Test
+        batch = DataPointBatch(data_type=DATA_FLOAT)
+        batch.extend(['a', 'b'], [1.5, '2.5'], timestamp=1000)
+        batch.add(DataPointMetadata('c', 'd'))
+        result = batch.datapoints()
+        self.assertEqual(len(result), 2)
+        for (datapoint, key, value) in zip(
+                result, ['a', 'b'], [1.5, 2.5]):
+            self.assertTrue(isinstance(datapoint, DataPoint))
+            self.assertTrue(datapoint.valid)
+            self.assertEqual(datapoint.key, key)
+            self.assertEqual(datapoint.value, value)
+            self.assertEqual(datapoint.data_type, DATA_FLOAT)
+            self.assertEqual(datapoint.timestamp, 1000)
+            self.assertEqual(datapoint.metadata, {'c': 'd'})
+
 
 class TestTargetDataPoints(unittest.TestCase):
     """Checks all functions and methods."""
@@ -480,6 +610,60 @@ class TestTargetDataPoints(unittest.TestCase):
         self.assertEqual(_variable.value, value)
         self.assertEqual(_variable.key, _key_)
 
+        # Test adding DataPointBatch objects. Empty batches are ignored.
+        batch = DataPointBatch()
+        ddv.add(batch)
+        self.assertEqual(len(ddv.data), 1)
+        batch.extend(['a', 'b'], [1, 2])
+        ddv.add(batch)
+        self.assertEqual(len(ddv.data), 2)
+        self.assertEqual(ddv.data[1], batch)
+
+    def test_extend(self):
+        """Testing function extend."""
+        # Initialize key variables
+        ddv = TargetDataPoints('teddy_bear')
+        datapoints = [DataPoint('key_{}'.format(_), _) for _ in range(10)]
+
+        # Test adding from a generator. Duplicates are ignored.
+        ddv.extend(_ for _ in datapoints + datapoints[:5] + [None])
+        self.assertTrue(ddv.valid)
+        self.assertEqual(ddv.data, datapoints)
+
+        # Nothing is valid without a target
+        ddv = TargetDataPoints('')
+        ddv.extend(datapoints)
+        self.assertEqual(len(ddv.data), 10)
+        self.assertFalse(ddv.valid)
+
+    def test_merge(self):
+        """Testing function merge."""
+        # Initialize key variables
+        ddv = TargetDataPoints('teddy_bear')
+        ddv.add([DataPoint('a', 1), DataPoint('b', 2)])
+        other = TargetDataPoints('teddy_bear')
+        other.add([DataPoint('b', 2), DataPoint('c', 3)])
+
+        # Test
+        ddv.merge(other)
+        self.assertEqual([_.key for _ in ddv.data], ['a', 'b', 'c'])
+
+        # Objects of other targets are ignored
+        other = TargetDataPoints('koala_bear')
+        other.add(DataPoint('d', 4))
+        ddv.merge(other)
+        ddv.merge(None)
+        self.assertEqual(len(ddv.data), 3)
+
+    def test_get(self):
+        """Testing function get."""
+        # Test
+        ddv = TargetDataPoints('teddy_bear')
+        datapoint = DataPoint('a', 1)
+        ddv.add(datapoint)
+        self.assertEqual(ddv.get(datapoint.checksum), datapoint)
+        self.assertIsNone(ddv.get(DataPoint('b', 1).checksum))
+
 
 class TestAgentPolledData(unittest.TestCase):
     """Checks all functions and methods."""
@@ -732,6 +916,48 @@ class TestTargetPollingPoints(unittest.TestCase):
             self.assertEqual(item.address, address)
             self.assertEqual(item.multiplier, multiplier)
 
+        # Duplicates are ignored
+        dpt.add(PollingPoint(address=address, multiplier=multiplier))
+        self.assertEqual(len(dpt.data), 1)
+
+    def test_extend(self):
+        """Testing function extend."""
+        # Initialize key variables
+        dpt = TargetPollingPoints('localhost')
+        points = [PollingPoint(address=_) for _ in range(10)]
+
+        # Test adding from a generator. Duplicates are ignored.
+        dpt.extend(_ for _ in points + points[:5] + [None, PollingPoint()])
+        self.assertTrue(dpt.valid)
+        self.assertEqual(dpt.data, points)
+
+    def test_merge(self):
+        """Testing function merge."""
+        # Initialize key variables
+        dpt = TargetPollingPoints('localhost')
+        dpt.add([PollingPoint(address=1), PollingPoint(address=2)])
+        other = TargetPollingPoints('localhost')
+        other.add([PollingPoint(address=2), PollingPoint(address=3)])
+
+        # Test
+        dpt.merge(other)
+        self.assertEqual([_.address for _ in dpt.data], [1, 2, 3])
+
+        # Objects of other targets are ignored
+        other = TargetPollingPoints('127.0.0.1')
+        other.add(PollingPoint(address=4))
+        dpt.merge(other)
+        self.assertEqual(len(dpt.data), 3)
+
+    def test_get(self):
+        """Testing function get."""
+        # Test
+        dpt = TargetPollingPoints('localhost')
+        point = PollingPoint(address=1, multiplier=2)
+        dpt.add(point)
+        self.assertEqual(dpt.get(point.checksum), point)
+        self.assertIsNone(dpt.get(PollingPoint(address=1).checksum))
+
 
 class TestBasicFunctions(unittest.TestCase):
     """Checks all functions and methods."""
@@ -744,6 +970,35 @@ class TestBasicFunctions(unittest.TestCase):
         """Testing function _strip_non_printable."""
         pass
 
+    def test__checksum(self):
+        """Testing function _checksum."""
+        # Checksums are chained in the order metadata is added
+        checksum = variables.data.hashstring('{}{}'.format('key', DATA_INT))
+        self.assertEqual(variables._checksum(('key', DATA_INT)), checksum)
+        for (key, value) in [('b', '1'), ('a', '2')]:
+            checksum = variables.data.hashstring('{}{}{}'.format(
+                checksum, key, value))
+        result = variables._checksum(('key', DATA_INT, 'b', '1', 'a', '2'))
+        self.assertEqual(result, checksum)
+
+        # DataPoints polled again reuse cached checksums
+        datapoints = []
+        for _ in range(2):
+            datapoint = DataPoint('key', 1)
+            datapoint.add([
+                DataPointMetadata('b', 1), DataPointMetadata('a', 2),
+                DataPointMetadata('c', 3, update_checksum=False)])
+            datapoints.append(datapoint)
+        hits = variables._checksum.cache_info().hits
+        self.assertEqual(datapoints[0].checksum, checksum)
+        self.assertEqual(variables._checksum.cache_info().hits, hits + 1)
+        self.assertEqual(datapoints[1].checksum, checksum)
+        self.assertEqual(variables._checksum.cache_info().hits, hits + 2)
+
+        # Checksums are created again after metadata is added
+        datapoints[1].add(DataPointMetadata('d', 4))
+        self.assertNotEqual(datapoints[1].checksum, checksum)
+
     def test__key_value_valid(self):
         """Testing function _key_value_valid."""
         # Test with valid values